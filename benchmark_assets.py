@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - Asset Build Benchmark
+Times every create_* generator in generate_assets.py at several output
+scales and records wall time, allocations and encoded PNG size.
+Reports can be saved as JSON/CSV and compared against a previous run.
+"""
+
+from statistics import median
+import argparse
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from PIL import Image
+
+import generate_assets as ga
+
+DEFAULT_RUNS = 5
+DEFAULT_SCALES = (1, 2, 4)
+DEFAULT_THRESHOLD = 0.25
+
+# Metrics compared against a baseline, and how much noise each tolerates on top of --threshold
+COMPARED = {"render_ms": 0.5, "encode_ms": 0.5, "peak_kb": 0, "png_bytes": 0}
+
+def render_scaled(job, scale, seed):
+    """Render a job and nearest-neighbor scale it, as the build does"""
+    img = ga.render_image(job, seed)
+    if scale != 1:
+        img = img.resize((img.width * scale, img.height * scale), Image.NEAREST)
+    return img
+
+def bench_job(job, scale, runs, seed=ga.DEFAULT_SEED):
+    """Benchmark one job at one scale; returns a report row"""
+    render_times = []
+    encode_times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        img = render_scaled(job, scale, seed)
+        render_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        data = ga.encode_png(img)
+        encode_times.append(time.perf_counter() - start)
+
+    # Memory is measured in its own pass so tracing doesn't skew the timings
+    tracemalloc.start()
+    try:
+        img = render_scaled(job, scale, seed)
+        ga.encode_png(img)
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    allocated = sum(stat.size for stat in snapshot.statistics("filename"))
+
+    return {
+        "asset": ga.asset_name(job),
+        "generator": job.generator.__name__,
+        "scale": scale,
+        "width": img.width,
+        "height": img.height,
+        "runs": runs,
+        "render_ms": round(median(render_times) * 1000, 3),
+        "encode_ms": round(median(encode_times) * 1000, 3),
+        "peak_kb": round(peak / 1024, 1),
+        "retained_kb": round(allocated / 1024, 1),
+        "png_bytes": len(data),
+    }
+
+def git_revision():
+    """Current commit, if we're in a git checkout"""
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(jobs, scales=DEFAULT_SCALES, runs=DEFAULT_RUNS, seed=ga.DEFAULT_SEED):
+    """Benchmark every distinct job at every scale"""
+    rows = []
+    for job, _ in ga.dedupe_jobs(jobs):
+        for scale in scales:
+            row = bench_job(job, scale, runs, seed)
+            rows.append(row)
+            print(f"  {row['asset']:<32} {scale}x  render {row['render_ms']:8.2f} ms"
+                  f"  encode {row['encode_ms']:8.2f} ms  peak {row['peak_kb']:8.1f} KB  {row['png_bytes']:6d} B")
+    return {
+        "meta": {"revision": git_revision(), "python": platform.python_version(),
+                 "runs": runs, "scales": list(scales), "seed": seed},
+        "results": rows,
+    }
+
+def summarize(report):
+    """Per-generator totals, slowest first"""
+    totals = {}
+    for row in report["results"]:
+        t = totals.setdefault(row["generator"], {"ms": 0.0, "peak_kb": 0.0, "png_bytes": 0})
+        t["ms"] += row["render_ms"] + row["encode_ms"]
+        t["peak_kb"] = max(t["peak_kb"], row["peak_kb"])
+        t["png_bytes"] += row["png_bytes"]
+    return sorted(totals.items(), key=lambda item: item[1]["ms"], reverse=True)
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Rows that got worse than the baseline by more than threshold.
+
+    Timings get an extra absolute allowance (ms) since sub-millisecond
+    renders are dominated by noise.
+    """
+    previous = {(row["asset"], row["scale"]): row for row in baseline["results"]}
+    regressions = []
+    for row in report["results"]:
+        old = previous.get((row["asset"], row["scale"]))
+        if old is None:
+            continue
+        for metric, slack in COMPARED.items():
+            if metric in old and row[metric] > old[metric] * (1 + threshold) + slack:
+                regressions.append((row["asset"], row["scale"], metric, old[metric], row[metric]))
+    return regressions
+
+def write_csv(report, path):
+    """Write the result rows as CSV"""
+    rows = report["results"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main():
+    """Benchmark the asset generators"""
+    parser = argparse.ArgumentParser(description="Benchmark the Shared House asset generators")
+    parser.add_argument("--spec", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "asset-spec.json"),
+                        help="asset spec file (default: asset-spec.json next to this script)")
+    parser.add_argument("--only", action="append", metavar="PATTERN",
+                        help="only benchmark assets whose family, group or filename matches this glob")
+    parser.add_argument("-n", "--runs", type=int, default=DEFAULT_RUNS,
+                        help=f"timed runs per asset and scale (default: {DEFAULT_RUNS})")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="comma-separated output scales (default: 1,2,4)")
+    parser.add_argument("--json", help="write the report as JSON to this file")
+    parser.add_argument("--csv", help="write the report rows as CSV to this file")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"allowed relative regression before failing (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    try:
+        jobs, selected = ga.plan_jobs(ga.load_spec(args.spec), args.only)
+    except ValueError as e:
+        sys.exit(str(e))
+    if selected is not None:
+        jobs = [job for job in jobs if job.filename in selected]
+    scales = tuple(int(s) for s in args.scales.split(","))
+
+    print("⏱️ Cozy Claw Studio - Asset Build Benchmark")
+    print("=" * 50)
+    report = run_benchmark(jobs, scales=scales, runs=args.runs)
+
+    print("\n📊 Per generator (all scales):")
+    for generator, t in summarize(report):
+        print(f"   {generator:<24} {t['ms']:9.2f} ms  peak {t['peak_kb']:8.1f} KB  {t['png_bytes']:7d} B")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\n📁 Report saved to: {args.json}")
+    if args.csv:
+        write_csv(report, args.csv)
+        print(f"📁 CSV saved to: {args.csv}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        print(f"\n🔍 Compared against {args.baseline} ({baseline['meta'].get('revision') or 'unknown revision'})")
+        for asset, scale, metric, old, new in regressions:
+            print(f"   ❌ {asset} {scale}x {metric}: {old} -> {new}")
+        if regressions:
+            sys.exit(f"{len(regressions)} regression(s) over the {args.threshold:.0%} threshold")
+        print("   ✅ No regressions")
+
+if __name__ == "__main__":
+    main()
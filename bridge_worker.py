@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - Bridge Worker
+Delivers messages written to shared-house/inbox.jsonl to the OpenClaw gateway
+(port 18789) as soon as they land. Takes the place of bridge-connector.js,
+openclaw-relay.js and scripts/poller-daemon.js: the inbox directory is watched
+with inotify rather than polled, bursts are coalesced into batched
+/hooks/wake calls over a pool of keep-alive connections, and delivery
+resumes where it left off after a crash.
+
+Progress is a consumer cursor in the message_log index, advanced only past
+messages the gateway accepted. Delivered ids are also recorded, so a message
+is never sent twice, even if the worker dies between delivery and commit.
+`gateway` runs a local stand-in gateway for testing.
+"""
+
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import argparse
+import asyncio
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import random
+import signal
+import sqlite3
+import struct
+import sys
+import threading
+import time
+
+from compact_logs import message_time
+from http_client import HttpConnection
+from message_log import HOUSE_DIR, MessageLog
+
+DEFAULT_INBOX = os.path.join(HOUSE_DIR, "inbox.jsonl")
+DEFAULT_GATEWAY = os.environ.get("OPENCLAW_GATEWAY_URL", "http://127.0.0.1:18789")
+WAKE_PATH = "/hooks/wake"
+STATE_NAME = ".bridge-worker.db"
+# Same file ClawBotBridge.fallbackToFile writes to
+DEAD_LETTER = os.path.join(HOUSE_DIR, ".clawbot-queue.jsonl")
+CONSUMER = "bridge-worker"
+DEFAULT_BATCH = 20
+DEFAULT_CONNECTIONS = 4
+# How long to wait after the first new line for the rest of a burst
+DEFAULT_LINGER = 0.005
+# Without inotify, stat the inbox this often
+FALLBACK_POLL_INTERVAL = 0.25
+RETRY_BASE = 0.5
+RETRY_MAX = 30.0
+REQUEST_TIMEOUT = 15.0
+# Delivered ids are kept this long (a week of redelivery protection)
+DELIVERED_TTL = 7 * 86400
+# Statuses worth retrying; any other 4xx dead-letters the batch
+RETRYABLE = {408, 425, 429, 500, 502, 503, 504}
+
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS delivered (
+    msg_id TEXT PRIMARY KEY,
+    delivered_at REAL NOT NULL
+);
+"""
+
+# inotify(7) event bits
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+INOTIFY_EVENT = struct.Struct("iIII")
+
+class InboxWatcher:
+    """Sets an asyncio.Event whenever the inbox file changes.
+
+    Watches the directory rather than the file, so compaction replacing the
+    file (a new inode) is still seen. Falls back to polling its size and
+    inode where inotify isn't available.
+    """
+
+    def __init__(self, path, event):
+        self.path = os.path.abspath(path)
+        self.name = os.path.basename(self.path).encode()
+        self.event = event
+        self.fd = None
+        self.task = None
+
+    def start(self):
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name, use_errno=True) if libc_name else None
+        if libc is not None and hasattr(libc, "inotify_init1"):
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd >= 0 and libc.inotify_add_watch(fd, os.path.dirname(self.path).encode(),
+                                                  IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) >= 0:
+                self.fd = fd
+                asyncio.get_running_loop().add_reader(fd, self.on_events)
+                return "inotify"
+            if fd >= 0:
+                os.close(fd)
+        self.task = asyncio.create_task(self.poll())
+        return "polling"
+
+    def on_events(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        pos = 0
+        while pos < len(data):
+            _, _, _, length = INOTIFY_EVENT.unpack_from(data, pos)
+            name = data[pos + INOTIFY_EVENT.size:pos + INOTIFY_EVENT.size + length].rstrip(b"\0")
+            pos += INOTIFY_EVENT.size + length
+            if name == self.name:
+                self.event.set()
+
+    async def poll(self):
+        last = None
+        while True:
+            try:
+                st = os.stat(self.path)
+                current = (st.st_ino, st.st_size, st.st_mtime_ns)
+            except FileNotFoundError:
+                current = None
+            if current != last:
+                last = current
+                self.event.set()
+            await asyncio.sleep(FALLBACK_POLL_INTERVAL)
+
+    def stop(self):
+        if self.fd is not None:
+            asyncio.get_running_loop().remove_reader(self.fd)
+            os.close(self.fd)
+        if self.task:
+            self.task.cancel()
+
+class ConnectionPool:
+    """A fixed set of keep-alive connections to one host, handed out one request at a time"""
+
+    def __init__(self, host, port, size):
+        self.idle = asyncio.Queue()
+        for _ in range(size):
+            self.idle.put_nowait(HttpConnection(host, port))
+        self.size = size
+
+    async def request(self, method, path, body=None, headers=None):
+        """(status, body, response headers)"""
+        conn = await self.idle.get()
+        try:
+            status, data = await asyncio.wait_for(conn.request(method, path, body, headers), REQUEST_TIMEOUT)
+            return status, data, conn.headers
+        except BaseException:
+            conn.close()
+            raise
+        finally:
+            self.idle.put_nowait(conn)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+def batch_key(messages):
+    """Idempotency key for a batch: the same ids always give the same key"""
+    return hashlib.sha256("\n".join(str(m.get("id")) for m in messages).encode()).hexdigest()[:32]
+
+def wake_payload(messages):
+    """The /hooks/wake body: the text ClawBotBridge.forwardToOpenClaw sends, one line per message"""
+    return {
+        "text": "\n".join(f"[Companion House] {m.get('content', '')}" for m in messages),
+        "mode": "now",
+        "messages": [{"id": m.get("id"), "sessionId": m.get("sessionId"), "content": m.get("content"),
+                      "timestamp": m.get("timestamp")} for m in messages],
+    }
+
+class BridgeWorker:
+    """Batches new inbox messages to the gateway with bounded concurrency and ordered commits"""
+
+    def __init__(self, inbox, gateway=DEFAULT_GATEWAY, token=None, consumer=CONSUMER, batch=DEFAULT_BATCH,
+                 connections=DEFAULT_CONNECTIONS, linger=DEFAULT_LINGER, dead_letter=DEAD_LETTER, state_path=None):
+        self.log = MessageLog(inbox)
+        url = urlparse(gateway)
+        self.pool = ConnectionPool(url.hostname, url.port or 80, connections)
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.consumer = consumer
+        self.batch = batch
+        self.linger = linger
+        self.dead_letter = dead_letter
+        self.state = sqlite3.connect(state_path or os.path.join(os.path.dirname(self.log.path), STATE_NAME))
+        self.state.execute("PRAGMA journal_mode = WAL")
+        self.state.executescript(STATE_SCHEMA)
+        self.wake = asyncio.Event()
+        # seqs handed out but not yet committed, in log order, and which of them are finished
+        self.inflight = deque()
+        self.finished = set()
+        self.dispatched = None
+        self.tasks = set()
+        # Gateway asked us to back off (429/503 Retry-After) until this monotonic time
+        self.paused_until = 0.0
+        self.stats = {"delivered": 0, "batches": 0, "retries": 0, "skipped": 0, "dead_lettered": 0}
+        self.latencies = deque(maxlen=1000)
+
+    def already_delivered(self, msg_id):
+        return msg_id is not None and self.state.execute(
+            "SELECT 1 FROM delivered WHERE msg_id = ?", (str(msg_id),)).fetchone() is not None
+
+    def mark_delivered(self, messages):
+        now = time.time()
+        with self.state:
+            self.state.executemany("INSERT OR REPLACE INTO delivered (msg_id, delivered_at) VALUES (?, ?)",
+                                   [(str(m["id"]), now) for m in messages if m.get("id") is not None])
+
+    def prune(self):
+        with self.state:
+            self.state.execute("DELETE FROM delivered WHERE delivered_at < ?", (time.time() - DELIVERED_TTL,))
+
+    def finish(self, seqs):
+        """Mark seqs handled and advance the cursor over the finished prefix"""
+        self.finished.update(seqs)
+        last = None
+        while self.inflight and self.inflight[0] in self.finished:
+            last = self.inflight.popleft()
+            self.finished.discard(last)
+        if last is not None:
+            self.log.commit(self.consumer, last)
+
+    def on_done(self, task):
+        """A batch finished, so a connection is free again"""
+        self.tasks.discard(task)
+        self.wake.set()
+
+    def dispatch(self):
+        """Start deliveries for new messages while connections are free; returns how many batches started"""
+        started = 0
+        while len(self.tasks) < self.pool.size:
+            pending = self.log.pending(self.consumer, self.batch, after=self.dispatched)
+            if not pending:
+                break
+            self.dispatched = pending[-1][0]
+            self.inflight.extend(seq for seq, _ in pending)
+            fresh = [(seq, msg) for seq, msg in pending if not self.already_delivered(msg.get("id"))]
+            self.stats["skipped"] += len(pending) - len(fresh)
+            done = {seq for seq, _ in pending} - {seq for seq, _ in fresh}
+            if done:
+                self.finish(done)
+            if fresh:
+                task = asyncio.create_task(self.deliver(fresh))
+                self.tasks.add(task)
+                task.add_done_callback(self.on_done)
+                started += 1
+        return started
+
+    async def deliver(self, pending):
+        """POST one batch until the gateway accepts it (or permanently rejects it)"""
+        messages = [msg for _, msg in pending]
+        headers = dict(self.headers, **{"Idempotency-Key": batch_key(messages)})
+        attempt = 0
+        while True:
+            delay = self.paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                status, body, response_headers = await self.pool.request("POST", WAKE_PATH, wake_payload(messages),
+                                                                         headers)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                status, body, response_headers = None, str(e), {}
+            if status is not None and 200 <= status < 300:
+                self.mark_delivered(messages)
+                now = time.time()
+                for msg in messages:
+                    when = message_time(msg)
+                    if when is not None:
+                        self.latencies.append(now - when.timestamp())
+                self.stats["delivered"] += len(messages)
+                self.stats["batches"] += 1
+                break
+            if status is not None and status not in RETRYABLE:
+                print(f"❌ Gateway rejected {len(messages)} message(s) with {status}; "
+                      f"moved to {self.dead_letter}", file=sys.stderr)
+                with open(self.dead_letter, "a") as f:
+                    f.writelines(json.dumps(msg, ensure_ascii=False) + "\n" for msg in messages)
+                self.stats["dead_lettered"] += len(messages)
+                break
+            attempt += 1
+            self.stats["retries"] += 1
+            backoff = min(RETRY_MAX, RETRY_BASE * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            retry_after = response_headers.get("retry-after")
+            if retry_after and retry_after.isdigit():
+                # Applies to every batch, not just this one
+                self.paused_until = max(self.paused_until, time.monotonic() + int(retry_after))
+                backoff = max(backoff, int(retry_after))
+            if attempt == 1 or attempt % 10 == 0:
+                print(f"⚠️  Delivery failed ({status or body}), retry {attempt} in {backoff:.1f}s", file=sys.stderr)
+            await asyncio.sleep(backoff)
+        self.finish(seq for seq, _ in pending)
+
+    async def run(self, once=False, report_every=60.0):
+        """Deliver until cancelled (or, with once, until everything pending is delivered)"""
+        watcher = InboxWatcher(self.log.path, self.wake)
+        mode = watcher.start()
+        print(f"🌉 Bridge worker: {self.log.path} -> gateway ({mode}, "
+              f"{self.pool.size} connection(s), batches of {self.batch})")
+        self.prune()
+        last_report = time.monotonic()
+        try:
+            self.wake.set()
+            while True:
+                await self.wake.wait()
+                self.wake.clear()
+                # Let the rest of a burst land so it goes out as one batch
+                if self.linger and not self.tasks:
+                    await asyncio.sleep(self.linger)
+                self.dispatch()
+                if once and not self.tasks and not self.log.pending(self.consumer, 1, after=self.dispatched):
+                    break
+                if report_every and time.monotonic() - last_report >= report_every:
+                    self.report()
+                    last_report = time.monotonic()
+        finally:
+            watcher.stop()
+            if self.tasks:
+                await asyncio.gather(*self.tasks, return_exceptions=True)
+            self.pool.close()
+
+    def report(self):
+        latency = ""
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            latency = (f", latency p50 {ordered[len(ordered) // 2] * 1000:.0f}ms"
+                       f" p99 {ordered[min(len(ordered) - 1, len(ordered) * 99 // 100)] * 1000:.0f}ms")
+        print("📊 " + ", ".join(f"{k} {v}" for k, v in self.stats.items()) + latency)
+
+    def close(self):
+        self.log.close()
+        self.state.close()
+
+class StandInGateway(BaseHTTPRequestHandler):
+    """POST /hooks/wake like the OpenClaw gateway; GET /stats shows what arrived.
+
+    Counts repeated message ids and batch idempotency keys, and can fail or
+    throttle a share of requests to exercise the worker's retries.
+    """
+
+    server_version = "StandInGateway/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/stats":
+            self.send_json(404, {"error": "not found"})
+            return
+        with self.server.lock:
+            self.send_json(200, dict(self.server.counts, unique_messages=len(self.server.seen)))
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if urlparse(self.path).path != WAKE_PATH:
+            self.send_json(404, {"error": "not found"})
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        server = self.server
+        roll = random.random()
+        with server.lock:
+            server.counts["requests"] += 1
+            if roll < server.fail_rate:
+                server.counts["failed"] += 1
+                # A quarter of the failures also ask the worker to back off
+                throttle = {"Retry-After": "1"} if roll < server.fail_rate / 4 else None
+                self.send_json(503, {"error": "stand-in failure"}, throttle)
+                return
+            key = self.headers.get("Idempotency-Key")
+            if key and key in server.keys:
+                server.counts["replayed_batches"] += 1
+            server.keys.add(key)
+            for msg in json.loads(body or b"{}").get("messages", []):
+                if msg.get("id") in server.seen:
+                    server.counts["duplicate_messages"] += 1
+                server.seen.add(msg.get("id"))
+                server.counts["messages"] += 1
+            server.counts["batches"] += 1
+        self.send_json(200, {"ok": True})
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_gateway(host, port, fail_rate=0.0, latency=0.0):
+    """Run the stand-in gateway until interrupted"""
+    server = ThreadingHTTPServer((host, port), StandInGateway)
+    server.lock = threading.Lock()
+    server.seen, server.keys = set(), set()
+    server.counts = dict.fromkeys(("requests", "batches", "messages", "failed", "duplicate_messages",
+                                   "replayed_batches"), 0)
+    server.fail_rate, server.latency = fail_rate, latency
+    print(f"🧪 Stand-in gateway on http://{host}:{port}{WAKE_PATH} (fail rate {fail_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main():
+    """Run the Shared House bridge worker"""
+    parser = argparse.ArgumentParser(description="Deliver Shared House inbox messages to the OpenClaw gateway")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="watch the inbox and deliver new messages")
+    run.add_argument("--inbox", default=DEFAULT_INBOX, help="inbox log to deliver from")
+    run.add_argument("--gateway", default=DEFAULT_GATEWAY, help=f"gateway URL (default: {DEFAULT_GATEWAY})")
+    run.add_argument("--consumer", default=CONSUMER, help=f"cursor name in the log index (default: {CONSUMER})")
+    run.add_argument("--batch", type=int, default=DEFAULT_BATCH, help=f"messages per request (default: {DEFAULT_BATCH})")
+    run.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS,
+                     help=f"keep-alive connections, i.e. batches in flight (default: {DEFAULT_CONNECTIONS})")
+    run.add_argument("--linger", type=float, default=DEFAULT_LINGER,
+                     help=f"seconds to let a burst collect before sending (default: {DEFAULT_LINGER})")
+    run.add_argument("--from-end", action="store_true", help="skip messages already in the inbox on first start")
+    run.add_argument("--once", action="store_true", help="exit once everything pending is delivered")
+
+    gateway = sub.add_parser("gateway", help="run a local stand-in gateway for testing")
+    gateway.add_argument("--host", default="127.0.0.1")
+    gateway.add_argument("--port", type=int, default=18789)
+    gateway.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    gateway.add_argument("--latency-ms", type=float, default=0.0, help="delay before each response")
+    args = parser.parse_args()
+
+    if args.command == "gateway":
+        serve_gateway(args.host, args.port, args.fail_rate, args.latency_ms / 1000)
+        return
+
+    if not os.path.exists(args.inbox):
+        open(args.inbox, "a").close()
+    token = os.environ.get("OPENCLAW_GATEWAY_TOKEN")
+    worker = BridgeWorker(args.inbox, args.gateway, token, args.consumer, args.batch, args.connections, args.linger)
+    if args.from_end and args.consumer not in worker.log.stats()["cursors"]:
+        worker.log.commit(args.consumer)
+    # Stop as cleanly on SIGTERM (systemd, timeout) as on Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(worker.run(once=args.once))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.report()
+        worker.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - Database Bulk Export/Import
+Streams whole SQLite databases (shared-house/database/game.db, the agent
+memory DB) out to JSONL or columnar files in fixed-size chunks, and loads
+them back with executemany, one transaction per table. Loads run with
+bulk-tuned pragmas and rebuild the target tables' indexes once at the end
+instead of updating them row by row. Virtual tables (the FTS index and its
+vocabulary) are never exported; they are rebuilt from their content tables
+after a load instead.
+"""
+
+from datetime import datetime, timezone
+import argparse
+import base64
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DATABASES = {
+    "game": os.path.join(ROOT, "shared-house", "database", "game.db"),
+    "memory": os.environ.get("DB_PATH", os.path.join(ROOT, "shared-house", "memory", "agent_memory.db")),
+}
+MANIFEST = "manifest.json"
+FORMATS = ("jsonl", "columnar")
+DEFAULT_CHUNK_ROWS = 50000
+# content='table' option of an external-content FTS table
+FTS_CONTENT_RE = re.compile(r"""content\s*=\s*['"]?(\w+)""", re.IGNORECASE)
+
+# Pragmas for a bulk load: WAL with no fsync per commit, big page cache, temp data in memory
+LOAD_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA cache_size = -262144",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = OFF",
+)
+
+def resolve_db(name):
+    """'game'/'memory' shorthands or a path"""
+    return DATABASES.get(name, name)
+
+def encode_value(value):
+    """JSON-safe form of a SQLite value (BLOBs become {"$blob": base64})"""
+    if isinstance(value, bytes):
+        return {"$blob": base64.b64encode(value).decode()}
+    return value
+
+def decode_value(value):
+    """Inverse of encode_value"""
+    if isinstance(value, dict) and "$blob" in value:
+        return base64.b64decode(value["$blob"])
+    return value
+
+def is_virtual(sql):
+    """Whether a CREATE statement makes a virtual table (FTS index, fts5vocab, ...)"""
+    return bool(sql) and sql.upper().startswith("CREATE VIRTUAL")
+
+def user_tables(conn):
+    """Tables worth exporting: everything but SQLite's own, virtual and FTS shadow tables.
+
+    Virtual tables are derived data; an external-content FTS table dumped
+    and reloaded on top of its triggers would index every row twice.
+    """
+    rows = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+                        "ORDER BY name").fetchall()
+    virtual = [name for name, sql in rows if is_virtual(sql)]
+    return [name for name, sql in rows
+            if not is_virtual(sql) and not any(name.startswith(v + "_") for v in virtual)]
+
+def fts_tables(conn, tables):
+    """External-content FTS tables whose content table is one of tables"""
+    found = []
+    for name, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'").fetchall():
+        m = FTS_CONTENT_RE.search(sql or "")
+        if is_virtual(sql) and m and m.group(1) in tables:
+            found.append(name)
+    return found
+
+def table_indexes(conn, table):
+    """CREATE INDEX statements for a table's explicit (non-automatic) indexes"""
+    return [sql for (sql,) in conn.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? "
+                                           "AND sql IS NOT NULL ORDER BY name", (table,))]
+
+def deferrable_indexes(conn, table):
+    """(name, CREATE INDEX sql) of a table's explicit non-unique indexes.
+
+    Unique indexes stay in place during a load: they enforce the
+    OR REPLACE / OR IGNORE conflict handling.
+    """
+    names = [row[1] for row in conn.execute(f"PRAGMA index_list({quote(table)})") if row[2] == 0 and row[3] == "c"]
+    return [(name, conn.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?",
+                                (name,)).fetchone()[0]) for name in sorted(names)]
+
+def quote(name):
+    """Quote an identifier for SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+def write_chunk(out_dir, table, part, columns, rows, fmt):
+    """Write one chunk of rows; returns its filename"""
+    if fmt == "jsonl":
+        name = f"{table}.{part:05d}.jsonl.gz"
+        lines = (json.dumps(dict(zip(columns, map(encode_value, row))), ensure_ascii=False) + "\n" for row in rows)
+        data = "".join(lines).encode()
+    else:
+        # Column-major row group: similar values sit together and compress far better
+        name = f"{table}.{part:05d}.columns.json.gz"
+        data = json.dumps({col: [encode_value(row[i]) for row in rows] for i, col in enumerate(columns)},
+                          ensure_ascii=False).encode()
+    with open(os.path.join(out_dir, name), "wb") as f:
+        f.write(gzip.compress(data, compresslevel=1))
+    return name
+
+def read_chunk(path, columns):
+    """Rows of one chunk as tuples in `columns` order"""
+    with gzip.open(path, "rt") as f:
+        if path.endswith(".jsonl.gz"):
+            for line in f:
+                record = json.loads(line)
+                yield tuple(decode_value(record.get(col)) for col in columns)
+        else:
+            data = json.load(f)
+            yield from zip(*(map(decode_value, data[col]) for col in columns))
+
+def export_db(db_path, out_dir, tables=None, fmt="jsonl", chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Stream tables to out_dir in chunks; returns the manifest.
+
+    All tables are read inside one read transaction, so the export is a
+    consistent snapshot even while the server keeps writing.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    manifest = {"source": os.path.abspath(db_path), "format": fmt, "chunk_rows": chunk_rows,
+                "exported_at": datetime.now(timezone.utc).isoformat(), "tables": {}}
+    try:
+        conn.execute("BEGIN")
+        for table in tables or user_tables(conn):
+            start = time.perf_counter()
+            sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+            if sql is None:
+                raise ValueError(f"No table {table} in {db_path}")
+            cursor = conn.execute(f"SELECT * FROM {quote(table)}")
+            columns = [d[0] for d in cursor.description]
+            files, count = [], 0
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                files.append(write_chunk(out_dir, table, len(files), columns, rows, fmt))
+                count += len(rows)
+            manifest["tables"][table] = {"schema": sql[0], "indexes": table_indexes(conn, table),
+                                         "columns": columns, "rows": count, "files": files}
+            print(f"Exported: {table} ({count} rows, {len(files)} chunk(s), {time.perf_counter() - start:.2f}s)")
+        conn.rollback()
+    finally:
+        conn.close()
+
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def import_db(db_path, in_dir, tables=None, mode="append", truncate=False):
+    """Load an export into db_path; returns {table: rows loaded}.
+
+    Missing tables are created from the exported schema. Each table loads
+    in a single transaction: its indexes are dropped, rows go in with
+    executemany and the indexes are recreated before the commit, so a
+    failed load rolls back to the table as it was, indexes included.
+    Virtual tables in the export (from older exports) are skipped, and FTS
+    indexes over the loaded tables are rebuilt at the end.
+    """
+    with open(os.path.join(in_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+    verb = {"append": "INSERT", "replace": "INSERT OR REPLACE", "ignore": "INSERT OR IGNORE"}[mode]
+    selected = tables or list(manifest["tables"])
+    missing = set(selected) - set(manifest["tables"])
+    if missing:
+        raise ValueError(f"Not in this export: {', '.join(sorted(missing))}")
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    loaded = {}
+    try:
+        for pragma in LOAD_PRAGMAS:
+            conn.execute(pragma)
+        for table in selected:
+            info = manifest["tables"][table]
+            target = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                  (table,)).fetchone()
+            if is_virtual(info["schema"]) or (target and is_virtual(target[0])):
+                print(f"Skipped: {table} (virtual table, rebuilt from its content instead)")
+                continue
+            start = time.perf_counter()
+            conn.execute("BEGIN")
+            if target is None:
+                conn.execute(info["schema"])
+                for sql in info["indexes"]:
+                    conn.execute(sql)
+            # Deferred index build: drop the target's non-unique indexes, rebuild them after the load
+            deferred = deferrable_indexes(conn, table)
+            for name, _ in deferred:
+                conn.execute(f"DROP INDEX {quote(name)}")
+            if truncate:
+                conn.execute(f"DELETE FROM {quote(table)}")
+
+            columns = info["columns"]
+            insert = (f"{verb} INTO {quote(table)} ({', '.join(map(quote, columns))}) "
+                      f"VALUES ({', '.join('?' * len(columns))})")
+            count = 0
+            for name in info["files"]:
+                rows = list(read_chunk(os.path.join(in_dir, name), columns))
+                conn.executemany(insert, rows)
+                count += len(rows)
+            for _, sql in deferred:
+                conn.execute(sql)
+            conn.execute("COMMIT")
+            loaded[table] = count
+            print(f"Imported: {table} ({count} rows, {len(deferred)} deferred index(es), "
+                  f"{time.perf_counter() - start:.2f}s)")
+        for fts in fts_tables(conn, loaded):
+            # Triggers indexed the loaded rows, but not any the load replaced or truncated
+            start = time.perf_counter()
+            conn.execute(f"INSERT INTO {quote(fts)} ({quote(fts)}) VALUES ('rebuild')")
+            print(f"Rebuilt: {fts} ({time.perf_counter() - start:.2f}s)")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("ANALYZE")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return loaded
+
+def main():
+    """Bulk export/import a Shared House database"""
+    parser = argparse.ArgumentParser(description="Bulk export/import for the Shared House SQLite databases")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="stream tables out to chunk files")
+    export.add_argument("--db", default="game", help="'game', 'memory' or a database path (default: game)")
+    export.add_argument("-o", "--out", required=True, help="output directory")
+    export.add_argument("--table", action="append", dest="tables", help="only this table (repeatable)")
+    export.add_argument("--format", choices=FORMATS, default="jsonl", help="chunk format (default: jsonl)")
+    export.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f"rows per chunk file (default: {DEFAULT_CHUNK_ROWS})")
+
+    load = sub.add_parser("import", help="load an export into a database")
+    load.add_argument("dir", help="export directory")
+    load.add_argument("--db", default="game", help="'game', 'memory' or a database path (default: game)")
+    load.add_argument("--table", action="append", dest="tables", help="only this table (repeatable)")
+    load.add_argument("--mode", choices=("append", "replace", "ignore"), default="append",
+                      help="on primary key conflicts: fail, replace the row or keep the existing one (default: append)")
+    load.add_argument("--truncate", action="store_true", help="empty each table before loading it")
+    args = parser.parse_args()
+
+    db_path = resolve_db(args.db)
+    start = time.perf_counter()
+    try:
+        if args.command == "export":
+            if not os.path.exists(db_path):
+                sys.exit(f"Database not found: {db_path}")
+            print(f"📤 Exporting {db_path}")
+            manifest = export_db(db_path, args.out, args.tables, args.format, args.chunk_rows)
+            rows = sum(t["rows"] for t in manifest["tables"].values())
+            print(f"\n✅ Exported {len(manifest['tables'])} table(s), {rows} rows in {time.perf_counter() - start:.2f}s")
+        else:
+            print(f"📥 Importing into {db_path}")
+            loaded = import_db(db_path, args.dir, args.tables, args.mode, args.truncate)
+            print(f"\n✅ Imported {len(loaded)} table(s), {sum(loaded.values())} rows in {time.perf_counter() - start:.2f}s")
+    except (ValueError, sqlite3.Error) as e:
+        sys.exit(str(e))
+
+if __name__ == "__main__":
+    main()
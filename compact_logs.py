@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - Message Log Compaction
+Keeps the append-only JSONL message logs (inbox.jsonl, outbox.jsonl and
+memory/message-queue/outgoing/<sessionId>.jsonl) from growing forever:
+entries older than the queue's 24h messageTTL are dropped, repeated ids are
+removed, and the live file is rotated aside and replaced by the kept lines. Expired entries can be kept
+in gzip archive segments of a fixed size, with a sparse timestamp index so a
+time range can be read without decompressing whole segments.
+"""
+
+from datetime import datetime, timedelta, timezone
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import zlib
+
+from message_log import parse_line, print_messages, queue_logs
+
+# Same as MessageQueue.messageTTL in bridge/message-queue.js
+DEFAULT_TTL_HOURS = 24
+DEFAULT_SEGMENT_SIZE = 4 << 20  # uncompressed bytes per archive segment
+DEFAULT_BLOCK_LINES = 256       # lines per gzip member, i.e. per sparse index entry
+ARCHIVE_INDEX = "index.json"
+# Writers append by path (open, write, close), so after renaming a log aside
+# we wait this long for an append that opened it just before to land
+ROTATE_GRACE = 0.05
+
+def message_time(msg):
+    """A message's timestamp as an aware datetime, or None if it has none"""
+    ts = msg.get("timestamp")
+    if isinstance(ts, (int, float)):
+        return datetime.fromtimestamp(ts / 1000, timezone.utc)
+    if not isinstance(ts, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def iso(when):
+    """Fixed-width UTC ISO string, so archive index timestamps compare as strings"""
+    return when.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+def archive_dir(log_path):
+    """Where a log's archive segments live: inbox.jsonl -> inbox.archive/"""
+    return os.path.splitext(log_path)[0] + ".archive"
+
+def load_archive_index(directory):
+    """The archive's segment list (empty for a new archive)"""
+    path = os.path.join(directory, ARCHIVE_INDEX)
+    if not os.path.exists(path):
+        return {"segments": []}
+    with open(path) as f:
+        return json.load(f)
+
+def save_archive_index(directory, index):
+    """Atomically replace the archive index"""
+    path = os.path.join(directory, ARCHIVE_INDEX)
+    with open(path + ".tmp", "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def append_archive(log_path, lines, segment_size=DEFAULT_SEGMENT_SIZE, block_lines=DEFAULT_BLOCK_LINES):
+    """Append (timestamp, raw line) pairs to a log's archive segments.
+
+    Each block of lines is its own gzip member, so the sparse index can map
+    the block's first timestamp to a byte offset that decompresses on its own.
+    A segment is closed once it holds segment_size uncompressed bytes.
+    """
+    if not lines:
+        return 0
+    directory = archive_dir(log_path)
+    os.makedirs(directory, exist_ok=True)
+    index = load_archive_index(directory)
+    segments = index["segments"]
+
+    for start in range(0, len(lines), block_lines):
+        block = lines[start:start + block_lines]
+        if not segments or segments[-1]["bytes"] >= segment_size:
+            name = f"{os.path.basename(directory)[:-len('.archive')]}-{len(segments) + 1:06d}.jsonl.gz"
+            segments.append({"file": name, "first": block[0][0], "last": block[0][0],
+                             "lines": 0, "bytes": 0, "blocks": []})
+        segment = segments[-1]
+        path = os.path.join(directory, segment["file"])
+        data = b"".join(raw + b"\n" for _, raw in block)
+        offset = os.path.getsize(path) if os.path.exists(path) else 0
+        with open(path, "ab") as f:
+            f.write(gzip.compress(data, mtime=0))
+        segment["blocks"].append([block[0][0], offset])
+        segment["last"] = max(segment["last"], max(ts for ts, _ in block))
+        segment["lines"] += len(block)
+        segment["bytes"] += len(data)
+
+    save_archive_index(directory, index)
+    return len(lines)
+
+def read_archive(log_path, since=None, until=None):
+    """Archived messages with since <= timestamp < until (ISO strings), in order.
+
+    Segments outside the range are skipped and reading starts at the last
+    block whose first timestamp is before `since`.
+    """
+    since = since and iso(message_time({"timestamp": since}))
+    until = until and iso(message_time({"timestamp": until}))
+    directory = archive_dir(log_path)
+    for segment in load_archive_index(directory)["segments"]:
+        if (since and segment["last"] < since) or (until and segment["first"] >= until):
+            continue
+        offset = 0
+        if since:
+            for first, block_offset in segment["blocks"]:
+                if first > since:
+                    break
+                offset = block_offset
+        with open(os.path.join(directory, segment["file"]), "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # Decompress member by member; every member is a self-contained gzip stream
+        while data:
+            d = zlib.decompressobj(wbits=31)
+            chunk = d.decompress(data)
+            data = d.unused_data
+            for raw in chunk.splitlines():
+                msg = parse_line(raw)
+                if msg is None:
+                    continue
+                when = message_time(msg)
+                ts = iso(when) if when else ""
+                if until and ts >= until:
+                    return
+                if not since or ts >= since:
+                    yield msg
+
+def rotate(log_path, n=0):
+    """Rename the live log aside; the next append creates a fresh one. Returns the old file's path"""
+    aside = f"{log_path}.rotated{n or ''}"
+    os.rename(log_path, aside)
+    return aside
+
+def drain(src, out, offset=0):
+    """Copy src from offset onto the open file out"""
+    with open(src, "rb") as f:
+        f.seek(offset)
+        while True:
+            chunk = f.read(1 << 16)
+            if not chunk:
+                break
+            out.write(chunk)
+
+def compact_log(log_path, ttl=timedelta(hours=DEFAULT_TTL_HOURS), archive=False, now=None,
+                segment_size=DEFAULT_SEGMENT_SIZE, block_lines=DEFAULT_BLOCK_LINES, dry_run=False):
+    """Drop expired and repeated entries from one log; returns a stats dict.
+
+    The log is rotated aside before its kept lines are written to a temp
+    file, so appends made meanwhile go to a fresh log. The temp file is then
+    hard-linked into place, which only succeeds while no fresh log exists;
+    otherwise the fresh log is rotated aside too and the link retried. Once
+    in-flight appends have landed, whatever the rotated files gained is
+    appended to the new log. No append is lost, though ones made during the
+    swap may land after a few newer ones.
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - ttl
+    with open(log_path, "rb") as f:
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+
+    kept, expired = [], []
+    seen = set()
+    duplicates = invalid = 0
+    for raw in data[:end].splitlines():
+        msg = parse_line(raw)
+        if msg is None:
+            invalid += 1
+            continue
+        msg_id = msg.get("id")
+        if msg_id is not None:
+            if msg_id in seen:
+                duplicates += 1
+                continue
+            seen.add(msg_id)
+        when = message_time(msg)
+        if when is not None and when < cutoff:
+            expired.append((iso(when), raw))
+        else:
+            kept.append(raw)
+
+    stats = {"path": log_path, "before": len(data), "kept": len(kept), "expired": len(expired),
+             "duplicates": duplicates, "invalid": invalid, "archived": 0,
+             "after": sum(len(raw) + 1 for raw in kept) + len(data) - end}
+    if dry_run or not (expired or duplicates or invalid):
+        return stats
+
+    if archive:
+        stats["archived"] = append_archive(log_path, expired, segment_size, block_lines)
+
+    tmp = log_path + ".compact"
+    rotated = time.monotonic()
+    aside = rotate(log_path)
+    with open(tmp, "wb") as out:
+        out.writelines(raw + b"\n" for raw in kept)
+        time.sleep(max(0.0, rotated + ROTATE_GRACE - time.monotonic()))
+        # Carry over anything appended since we read the file (including a partial last line)
+        drain(aside, out, end)
+    os.remove(aside)
+    fresh = []
+    while True:
+        try:
+            os.link(tmp, log_path)
+            break
+        except FileExistsError:
+            fresh.append(rotate(log_path, len(fresh) + 1))
+    os.remove(tmp)
+    if fresh:
+        time.sleep(ROTATE_GRACE)
+        with open(log_path, "ab") as out:
+            for aside in fresh:
+                drain(aside, out)
+                os.remove(aside)
+    stats["after"] = os.path.getsize(log_path)
+    return stats
+
+def main():
+    """Compact Shared House message logs"""
+    parser = argparse.ArgumentParser(description="Compact and archive the Shared House JSONL message logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    compact = sub.add_parser("compact", help="drop expired and repeated entries (default: all Shared House logs)")
+    compact.add_argument("logs", nargs="*")
+    compact.add_argument("--ttl-hours", type=float, default=DEFAULT_TTL_HOURS,
+                         help=f"drop entries older than this (default: {DEFAULT_TTL_HOURS}, the queue's messageTTL)")
+    compact.add_argument("--archive", action="store_true", help="keep expired entries in gzip archive segments")
+    compact.add_argument("--segment-size", type=int, default=DEFAULT_SEGMENT_SIZE,
+                         help=f"uncompressed bytes per archive segment (default: {DEFAULT_SEGMENT_SIZE})")
+    compact.add_argument("--block-lines", type=int, default=DEFAULT_BLOCK_LINES,
+                         help=f"lines per compressed block / index entry (default: {DEFAULT_BLOCK_LINES})")
+    compact.add_argument("-n", "--dry-run", action="store_true", help="report what would change without writing")
+
+    read = sub.add_parser("read", help="print archived messages in a time range")
+    read.add_argument("log", help="the live log whose archive to read")
+    read.add_argument("--since", help="ISO timestamp, inclusive")
+    read.add_argument("--until", help="ISO timestamp, exclusive")
+    args = parser.parse_args()
+
+    if args.command == "read":
+        print_messages(read_archive(args.log, args.since, args.until))
+        return
+
+    logs = args.logs or queue_logs()
+    if not logs:
+        sys.exit("No message logs found")
+    print("🧹 Cozy Claw Studio - Message Log Compaction")
+    print("=" * 50)
+    saved = 0
+    for path in logs:
+        stats = compact_log(path, timedelta(hours=args.ttl_hours), archive=args.archive,
+                            segment_size=args.segment_size, block_lines=args.block_lines, dry_run=args.dry_run)
+        saved += stats["before"] - stats["after"]
+        print(f"{os.path.basename(path)}: kept {stats['kept']}, expired {stats['expired']}"
+              f" (archived {stats['archived']}), duplicates {stats['duplicates']}, invalid {stats['invalid']}"
+              f" - {stats['before']} -> {stats['after']} bytes")
+    print("\n" + "=" * 50)
+    print(f"✅ {'Would compact' if args.dry_run else 'Compacted'} {len(logs)} log(s), {saved} bytes freed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - Game Analytics
+Precomputes the economy and decor stats the Shared House dashboard shows.
+Rows from shared-house/database/game.db (daily rewards and minigame scores
+incrementally, the inventory in full) are read into dictionary-encoded NumPy
+column arrays, aggregated in bulk, and written as JSON documents to a small
+summary database that /api/economy/weekly, /api/economy/stats and
+/api/decor/stats read by key. The game databases only see one short read
+transaction per run.
+"""
+
+from datetime import datetime, timezone
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+GAME_DB = os.path.join(ROOT, "shared-house", "database", "game.db")
+MEMORY_DB = os.environ.get("DB_PATH", os.path.join(ROOT, "shared-house", "memory", "agent_memory.db"))
+SUMMARY_DB = os.environ.get("ANALYTICS_DB_PATH", os.path.join(ROOT, "shared-house", "memory", "analytics.db"))
+STATE_FILE = "analytics-columns.npz"
+
+WEEK = 7 * 86400
+MONDAY = 4 * 86400  # 1970-01-01 was a Thursday; weeks start on Monday (UTC)
+HISTORY_WEEKS = 12
+LEADERBOARD_SIZE = 10
+POPULAR_ITEMS = 20
+PERCENTILES = (25, 50, 75, 90, 99)
+
+# game.db tables and the columns kept from each. Strings are
+# dictionary-encoded against a shared vocabulary ("player", "item", "game"),
+# timestamps become epoch seconds.
+TABLES = {
+    "daily_rewards": {"player": ("player_id", "player"), "coins": ("coins_received", "int"),
+                      "ts": ("claimed_at", "time")},
+    "inventory": {"player": ("player_id", "player"), "item": ("item_id", "item"),
+                  "quantity": ("quantity", "int"), "ts": ("acquired_at", "time")},
+    "minigame_scores": {"player": ("player_id", "player"), "game": ("minigame_type", "game"),
+                        "score": ("score", "int"), "accuracy": ("accuracy", "int"),
+                        "completed": ("completed", "int"), "ts": ("played_at", "time")},
+}
+
+# Tables whose rows are updated in place (inventory quantities), so they are
+# read again in full every run; the rest only ever gain rows, or lose them
+# to a player's cascaded delete
+SNAPSHOT_TABLES = ("inventory",)
+
+SUMMARY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+def to_epoch(values):
+    """SQLite timestamps ('YYYY-MM-DD HH:MM:SS', ISO strings, dates or epoch ms) as int64 epoch seconds"""
+    out = np.zeros(len(values), dtype=np.int64)
+    for i, value in enumerate(values):
+        if isinstance(value, (int, float)):
+            out[i] = int(value / 1000) if value > 1e11 else int(value)
+        elif value:
+            try:
+                parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+            except ValueError:
+                continue
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            out[i] = int(parsed.timestamp())
+    return out
+
+def week_start(ts):
+    """Epoch seconds of the Monday 00:00 UTC starting each timestamp's week"""
+    return (np.asarray(ts) - MONDAY) // WEEK * WEEK + MONDAY
+
+def iso_date(epoch):
+    return datetime.fromtimestamp(int(epoch), timezone.utc).strftime("%Y-%m-%d")
+
+class ColumnStore:
+    """Dictionary-encoded column arrays for the game tables.
+
+    Append-only tables keep the highest rowid ingested, so a refresh only
+    reads rows added since the last one. One that lost rows below that mark
+    (a player was deleted, or the table was recreated) is read again from
+    scratch, as are SNAPSHOT_TABLES every time.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.vocab = {"player": [], "item": [], "game": []}
+        self.tables = {name: self.empty(name) for name in TABLES}
+        if os.path.exists(path):
+            self.load()
+        self.codes = {kind: {v: i for i, v in enumerate(values)} for kind, values in self.vocab.items()}
+
+    @staticmethod
+    def empty(table):
+        columns = {col: np.zeros(0, dtype=np.int64) for col in TABLES[table]}
+        columns["rowid"] = np.zeros(0, dtype=np.int64)
+        return columns
+
+    def load(self):
+        with np.load(self.path) as data:
+            for kind in self.vocab:
+                self.vocab[kind] = data[f"vocab.{kind}"].tolist()
+            for table, columns in self.tables.items():
+                for col in columns:
+                    key = f"{table}.{col}"
+                    if key in data:
+                        columns[col] = data[key]
+
+    def save(self):
+        arrays = {f"vocab.{kind}": np.array(values, dtype=str) for kind, values in self.vocab.items()}
+        for table, columns in self.tables.items():
+            arrays.update({f"{table}.{col}": values for col, values in columns.items()})
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, self.path)
+
+    def encode(self, kind, values):
+        """Codes for a batch of strings, growing the vocabulary as needed"""
+        codes, vocab = self.codes[kind], self.vocab[kind]
+        out = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            value = "" if value is None else str(value)
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(vocab)
+                vocab.append(value)
+            out[i] = code
+        return out
+
+    def high_water(self, table):
+        rowids = self.tables[table]["rowid"]
+        return int(rowids[-1]) if len(rowids) else 0
+
+    def ingest(self, conn, table):
+        """Append a table's new rows (or re-read all of it); returns how many were read"""
+        spec = TABLES[table]
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is None:
+            self.tables[table] = self.empty(table)
+            return 0
+        last = self.high_water(table)
+        if last and (table in SNAPSHOT_TABLES or conn.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE rowid <= ?", (last,)).fetchone()[0] != len(self.tables[table]["rowid"])):
+            self.tables[table] = self.empty(table)
+            last = 0
+        sources = [source for source, _ in spec.values()]
+        rows = conn.execute(f"SELECT rowid, {', '.join(sources)} FROM {table} WHERE rowid > ? ORDER BY rowid",
+                            (last,)).fetchall()
+        if not rows:
+            return 0
+        raw = list(zip(*rows))
+        batch = {"rowid": np.array(raw[0], dtype=np.int64)}
+        for (col, (_, kind)), values in zip(spec.items(), raw[1:]):
+            if kind == "time":
+                batch[col] = to_epoch(values)
+            elif kind == "int":
+                batch[col] = np.array([v or 0 for v in values], dtype=np.int64)
+            else:
+                batch[col] = self.encode(kind, values)
+        columns = self.tables[table]
+        for col, values in batch.items():
+            columns[col] = np.concatenate([columns[col], values])
+        return len(rows)
+
+def read_game_snapshot(store, db_path):
+    """Ingest new rows and read the small mutable tables, all in one read transaction"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, isolation_level=None)
+    try:
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("BEGIN")
+        ingested = {table: store.ingest(conn, table) for table in TABLES}
+        players = conn.execute("SELECT id, username, coins FROM players").fetchall()
+        shop = conn.execute("SELECT id, name, emoji, price_coins, rarity FROM shop_items").fetchall()
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return ingested, players, shop
+
+def player_names(store, players):
+    """Usernames indexed by player code (the raw id for players no longer in players)"""
+    names = dict((pid, username) for pid, username, _ in players)
+    return [names.get(pid, pid) for pid in store.vocab["player"]]
+
+def item_prices(store, shop):
+    """Coin price per item code (0 for items no longer in the shop)"""
+    prices = {item_id: price or 0 for item_id, _, _, price, _ in shop}
+    return np.array([prices.get(item, 0) for item in store.vocab["item"]], dtype=np.int64)
+
+def weekly_summary(store, players, shop, now, weeks=HISTORY_WEEKS):
+    """Coin flow and activity for the current week plus the weeks before it"""
+    rewards, purchases, games = (store.tables[t] for t in ("daily_rewards", "inventory", "minigame_scores"))
+    spent = item_prices(store, shop)[purchases["item"]] * purchases["quantity"] if len(purchases["item"]) else \
+        np.zeros(0, dtype=np.int64)
+    current = int(week_start(now))
+    first = current - (weeks - 1) * WEEK
+
+    def bucket(ts):
+        """Week slot (0 = oldest) per row, and the mask of rows inside the window"""
+        slot = (week_start(ts) - first) // WEEK
+        return slot, (slot >= 0) & (slot < weeks)
+
+    def per_week(ts, weights=None):
+        slot, inside = bucket(ts)
+        w = None if weights is None else weights[inside]
+        return np.bincount(slot[inside], weights=w, minlength=weeks).astype(np.int64)
+
+    earned = per_week(rewards["ts"], rewards["coins"])
+    spent_weekly = per_week(purchases["ts"], spent)
+    games_weekly = per_week(games["ts"])
+    # Distinct (week, player) pairs across every kind of activity
+    slots, players_seen = [], []
+    for table in (rewards, purchases, games):
+        slot, inside = bucket(table["ts"])
+        slots.append(slot[inside])
+        players_seen.append(table["player"][inside])
+    pairs = np.unique(np.concatenate(slots) * max(1, len(store.vocab["player"])) + np.concatenate(players_seen))
+    active = np.bincount(pairs // max(1, len(store.vocab["player"])), minlength=weeks)
+
+    names = player_names(store, players)
+    slot, inside = bucket(rewards["ts"])
+    this_week = inside & (slot == weeks - 1)
+    by_player = np.bincount(rewards["player"][this_week], weights=rewards["coins"][this_week],
+                            minlength=len(names)).astype(np.int64)
+    top = np.argsort(-by_player, kind="stable")[:LEADERBOARD_SIZE]
+
+    history = [{"weekStart": iso_date(first + i * WEEK), "coinsEarned": int(earned[i]),
+                "coinsSpent": int(spent_weekly[i]), "netFlow": int(earned[i] - spent_weekly[i]),
+                "gamesPlayed": int(games_weekly[i]), "activePlayers": int(active[i])} for i in range(weeks)]
+    return {**history[-1],
+            "rewardsClaimed": int(np.count_nonzero(this_week)),
+            "purchases": int(per_week(purchases["ts"])[-1]),
+            "topEarners": [{"playerId": store.vocab["player"][p], "username": names[p], "coins": int(by_player[p])}
+                           for p in top if by_player[p] > 0],
+            "history": history}
+
+def minigame_stats(store, names):
+    """Per-minigame plays, score percentiles, accuracy and best-score leaderboard"""
+    games = store.tables["minigame_scores"]
+    result = {}
+    for code, game in enumerate(store.vocab["game"]):
+        mask = games["game"] == code
+        if not mask.any():
+            continue
+        scores, players = games["score"][mask], games["player"][mask]
+        best = np.full(len(names), np.iinfo(np.int64).min)
+        np.maximum.at(best, players, scores)
+        ranked = [p for p in np.argsort(-best, kind="stable")[:LEADERBOARD_SIZE] if best[p] != np.iinfo(np.int64).min]
+        result[game] = {
+            "plays": int(mask.sum()),
+            "players": int(len(np.unique(players))),
+            "averageScore": round(float(scores.mean()), 2),
+            "averageAccuracy": round(float(games["accuracy"][mask].mean()), 2),
+            "completionRate": round(float(games["completed"][mask].astype(bool).mean()), 4),
+            "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(scores, PERCENTILES))},
+            # Score at every whole percentile, so a client can place a score by binary search
+            "quantiles": np.percentile(scores, np.arange(101)).round(2).tolist(),
+            "leaderboard": [{"playerId": store.vocab["player"][p], "username": names[p], "bestScore": int(best[p])}
+                            for p in ranked],
+        }
+    return result
+
+def economy_stats(store, players, shop):
+    """All-time totals, leaderboards, minigame percentiles and item popularity"""
+    rewards, purchases = store.tables["daily_rewards"], store.tables["inventory"]
+    names = player_names(store, players)
+    prices = item_prices(store, shop)
+    spent = prices[purchases["item"]] * purchases["quantity"] if len(purchases["item"]) else np.zeros(0, dtype=np.int64)
+
+    coins = np.array([c or 0 for _, _, c in players], dtype=np.int64)
+    richest = np.argsort(-coins, kind="stable")[:LEADERBOARD_SIZE]
+
+    units = np.bincount(purchases["item"], weights=purchases["quantity"], minlength=len(prices)).astype(np.int64)
+    owner_pairs = np.unique(purchases["item"] * max(1, len(names)) + purchases["player"])
+    owners = np.bincount(owner_pairs // max(1, len(names)), minlength=len(prices))
+    shop_info = {item_id: (name, emoji, rarity) for item_id, name, emoji, _, rarity in shop}
+    popular = [p for p in np.argsort(-units, kind="stable")[:POPULAR_ITEMS] if units[p] > 0]
+
+    return {
+        "totalPlayers": len(players),
+        "coinsInCirculation": int(coins.sum()),
+        "coinsEarned": int(rewards["coins"].sum()),
+        "coinsSpent": int(spent.sum()),
+        "rewardsClaimed": int(len(rewards["coins"])),
+        "purchases": int(len(purchases["item"])),
+        "gamesPlayed": int(len(store.tables["minigame_scores"]["score"])),
+        "richestPlayers": [{"playerId": players[i][0], "username": players[i][1], "coins": int(coins[i])}
+                           for i in richest],
+        "minigames": minigame_stats(store, names),
+        "popularItems": [{"itemId": store.vocab["item"][i],
+                          "name": shop_info.get(store.vocab["item"][i], (store.vocab["item"][i],))[0],
+                          "emoji": shop_info.get(store.vocab["item"][i], (None, None))[1],
+                          "unitsOwned": int(units[i]), "owners": int(owners[i]),
+                          "coinsSpent": int(units[i] * prices[i])} for i in popular],
+    }
+
+def decor_stats(db_path):
+    """decor_stats plus placement popularity by item, category and theme; None without the decor tables"""
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("BEGIN")
+        try:
+            stats = conn.execute("SELECT * FROM decor_stats").fetchone()
+            placements = conn.execute("SELECT item_id, theme_id FROM decor_placements").fetchall()
+            catalog = {row["id"]: row for row in conn.execute("SELECT id, name, category, icon FROM decor_items")}
+        except sqlite3.OperationalError:
+            return None
+        finally:
+            conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    items, item_codes = np.unique(np.array([p["item_id"] for p in placements], dtype=str), return_inverse=True)
+    counts = np.bincount(item_codes, minlength=len(items)) if len(items) else np.zeros(0, dtype=np.int64)
+    categories = {}
+    for item, count in zip(items.tolist(), counts.tolist()):
+        category = catalog[item]["category"] if item in catalog else "unknown"
+        categories[category] = categories.get(category, 0) + count
+    theme_names, theme_counts = np.unique(np.array([p["theme_id"] or "default" for p in placements], dtype=str),
+                                          return_counts=True)
+    themes = dict(zip(theme_names.tolist(), theme_counts.tolist()))
+    order = np.argsort(-counts, kind="stable")[:POPULAR_ITEMS]
+    # Same fields as DecorDatabase.getStats, plus the breakdowns
+    return {
+        **(dict(stats) if stats else {}),
+        "totalPlaced": len(placements),
+        "byCategory": categories,
+        "byTheme": themes,
+        "popularItems": [{"itemId": items[i], "name": catalog[items[i]]["name"] if items[i] in catalog else items[i],
+                          "icon": catalog[items[i]]["icon"] if items[i] in catalog else None,
+                          "count": int(counts[i])} for i in order],
+    }
+
+def write_summaries(path, summaries, now):
+    """Replace the summary documents in one transaction"""
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SUMMARY_SCHEMA)
+        updated = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        conn.execute("BEGIN")
+        conn.executemany("INSERT OR REPLACE INTO summaries (key, value, updated_at) VALUES (?, ?, ?)",
+                         [(key, json.dumps({**value, "updatedAt": updated}, ensure_ascii=False), updated)
+                          for key, value in summaries.items()])
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+def read_summary(path, key):
+    """A stored summary document, or None"""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT value FROM summaries WHERE key = ?", (key,)).fetchone()
+    finally:
+        conn.close()
+    return json.loads(row[0]) if row else None
+
+def run(game_db=GAME_DB, memory_db=MEMORY_DB, summary_db=SUMMARY_DB, rebuild=False, now=None):
+    """One ingest + aggregate pass; returns {table: new rows}"""
+    now = now or time.time()
+    state = os.path.join(os.path.dirname(summary_db), STATE_FILE)
+    if rebuild and os.path.exists(state):
+        os.remove(state)
+    store = ColumnStore(state)
+    ingested, players, shop = read_game_snapshot(store, game_db)
+    summaries = {
+        "economy.weekly": weekly_summary(store, players, shop, now),
+        "economy.stats": economy_stats(store, players, shop),
+    }
+    decor = decor_stats(memory_db)
+    if decor is not None:
+        summaries["decor.stats"] = decor
+    write_summaries(summary_db, summaries, now)
+    store.save()
+    return ingested
+
+def main():
+    """Refresh the Shared House stats summaries"""
+    parser = argparse.ArgumentParser(description="Precompute Shared House economy, minigame and decor stats")
+    parser.add_argument("--game-db", default=GAME_DB, help="game database (default: shared-house/database/game.db)")
+    parser.add_argument("--memory-db", default=MEMORY_DB, help="agent memory database with the decor tables "
+                        "(default: $DB_PATH or shared-house/memory/agent_memory.db)")
+    parser.add_argument("--out", default=SUMMARY_DB, help="summary database "
+                        "(default: $ANALYTICS_DB_PATH or shared-house/memory/analytics.db)")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="keep refreshing at this interval")
+    parser.add_argument("--rebuild", action="store_true", help="discard the ingested columns and read everything again")
+    parser.add_argument("--show", metavar="KEY", help="print a stored summary (economy.weekly, economy.stats, decor.stats)")
+    args = parser.parse_args()
+
+    if args.show:
+        summary = read_summary(args.out, args.show)
+        if summary is None:
+            sys.exit(f"No summary {args.show} in {args.out}")
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+        return
+    if not os.path.exists(args.game_db):
+        sys.exit(f"Database not found: {args.game_db}")
+
+    rebuild = args.rebuild
+    while True:
+        start = time.perf_counter()
+        try:
+            ingested = run(args.game_db, args.memory_db, args.out, rebuild)
+        except sqlite3.Error as e:
+            if not args.watch:
+                sys.exit(str(e))
+            print(f"⚠️  Refresh failed: {e}", file=sys.stderr)
+        else:
+            new = ", ".join(f"{table} +{count}" for table, count in ingested.items())
+            print(f"📊 Summaries refreshed ({new}) in {time.perf_counter() - start:.3f}s")
+        rebuild = False
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+
+if __name__ == "__main__":
+    main()
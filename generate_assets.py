@@ -6,67 +6,323 @@ Style: Cozy pixel art, top-down RPG view, warm colors
 """
 
 from PIL import Image, ImageDraw
+import numpy as np
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache, lru_cache, partial
+import argparse
+import fnmatch
+import hashlib
+import inspect
+import io
+import json
+import math
 import os
 import random
+import re
+import shutil
+import struct
+import sys
+import zlib
 
-def save_img(img, filename):
-    """Save image to assets folder"""
-    path = f"/home/zak/.openclaw/workspace/cozy-claw-studio/shared-house/public/assets/{filename}"
-    img.save(path, "PNG")
-    print(f"Created: {filename}")
-    return path
+# Build cache manifest, kept next to the generated assets
+CACHE_MANIFEST = ".asset-cache.json"
+CACHE_VERSION = 2
 
-def create_floor_wood(variation=1):
-    """Create wooden floor tile (32x32)"""
-    img = Image.new('RGBA', (32, 32), (139, 90, 43, 255))
-    draw = ImageDraw.Draw(img)
+# Pixel densities every sprite ships at (nearest-neighbor scaled), listed in densities.json
+DENSITIES = (1, 2, 4)
+DENSITY_MANIFEST = "densities.json"
+
+# Sprite atlas: frame index plus atlas_<n>.png power-of-two sheets
+ATLAS_INDEX = "atlas.json"
+ATLAS_MAX_SIZE = 1024
+ATLAS_PADDING = 2
+ATLAS_EXTRUDE = 1
+
+# 1-bit alpha hit masks: one packed bitmap per sprite (over its trimmed
+# bounds) in a single binary file, indexed by hitmasks.json; walk_grid.py
+# shapes item footprints with them
+HITMASK_INDEX = "hitmasks.json"
+HITMASK_FILE = "hitmasks.bin"
+# Pixels at least this opaque count as a hit; fainter ones (shadows) don't
+HIT_ALPHA = 128
+
+# Pre-baked theme backgrounds: Wang-tiled wall and floor art per theme and
+# room size, cut into a few large chunks indexed by backgrounds.json
+BACKGROUND_INDEX = "backgrounds.json"
+BACKGROUND_VERSION = 1
+# Brightness of shade levels -2..2 (grooves, speckles, highlights, rivets),
+# and how much of the theme's accent color accent pixels take on
+BACKGROUND_SHADES = (0.7, 0.85, 1.0, 1.12, 1.25)
+BACKGROUND_ACCENT_MIX = 0.4
+
+# Base tile size; HD tile variants are integer multiples of it
+TILE_SIZE = 32
+TILE_HD_SIZE = 256
+
+# Animated character sheets: frame size, row order and playback rates
+CHAR_FRAME = (32, 48)
+CHAR_DIRECTIONS = ("down", "left", "right", "up")
+ANIMATION_FPS = {"walk": 8, "idle": 2}
+ANIMATION_MANIFEST = "animations.json"
+
+# Content-hashed copies (sofa_v1.3f9a2c1d.png) that can be cached forever,
+# indexed by asset-manifest.json; the service worker precaches from a JS
+# manifest written next to it
+FINGERPRINT_LENGTH = 8
+FINGERPRINT_RE = re.compile(r"\.[0-9a-f]{%d}\.\w+$" % FINGERPRINT_LENGTH)
+ASSET_MANIFEST = "asset-manifest.json"
+PRECACHE_MANIFEST = "precache-manifest.js"
+
+HEART_BITMAP = [
+    "..##............##..",
+    ".####..........####.",
+    "######........######",
+    "#######......#######",
+    "########....########",
+    ".########..########.",
+    "..################..",
+    "...##############...",
+    "....############....",
+    ".....##########.....",
+    "......########......",
+    ".......######.......",
+    "........####........",
+    ".........##.........",
+]
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Deflate passes per image; the smaller stream wins
+ZLIB_STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)
+
+# Default build seed; every asset's RNG is derived from this plus its name
+DEFAULT_SEED = 0
+
+def png_chunk(tag, data):
+    """Length-prefixed, CRC-suffixed PNG chunk"""
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+def quantize_lossless(arr):
+    """(palette, indices) for an RGBA array with at most 256 colors, else None"""
+    packed = np.ascontiguousarray(arr).view(np.uint32).reshape(-1)
+    colors, index = np.unique(packed, return_inverse=True)
+    if len(colors) > 256:
+        return None
+    palette = colors.view(np.uint8).reshape(-1, 4)
+    # Translucent entries first so the tRNS chunk can stop at the last one
+    order = np.argsort(palette[:, 3] == 255, kind="stable")
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    return palette[order], remap[index].reshape(arr.shape[:2]).astype(np.uint8)
+
+def pack_indices(index, depth):
+    """Pack 8-bit palette indices into depth-bit scanlines"""
+    if depth == 8:
+        return index
+    per_byte = 8 // depth
+    h, w = index.shape
+    padded = np.zeros((h, -(-w // per_byte) * per_byte), np.uint8)
+    padded[:, :w] = index
+    shifts = (8 - depth) - depth * np.arange(per_byte, dtype=np.uint8)
+    groups = padded.reshape(h, -1, per_byte) << shifts
+    return np.bitwise_or.reduce(groups, axis=2).astype(np.uint8)
+
+def filter_scanlines(raw, bpp):
+    """All five PNG filters applied to every row: {filter_type: filtered}"""
+    raw16 = raw.astype(np.int16)
+    a = np.zeros_like(raw16)
+    a[:, bpp:] = raw16[:, :-bpp]
+    b = np.zeros_like(raw16)
+    b[1:] = raw16[:-1]
+    c = np.zeros_like(raw16)
+    c[1:, bpp:] = raw16[:-1, :-bpp]
+    
+    p = a + b - c
+    pa, pb, pc = np.abs(p - a), np.abs(p - b), np.abs(p - c)
+    paeth = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+    
+    return {
+        0: raw,
+        1: (raw16 - a).astype(np.uint8),
+        2: (raw16 - b).astype(np.uint8),
+        3: (raw16 - ((a + b) >> 1)).astype(np.uint8),
+        4: (raw16 - paeth).astype(np.uint8),
+    }
+
+def filtered_scanlines(raw, bpp, indexed=False):
+    """One filtered scanline stream, filters chosen the way libpng does.
+    
+    Palette and sub-byte rows stay unfiltered (differences of indices mean
+    nothing); other rows each take the filter with the smallest sum of
+    |signed bytes|.
+    """
+    h = raw.shape[0]
+    if indexed:
+        return np.hstack([np.zeros((h, 1), np.uint8), raw]).tobytes()
+    filtered = filter_scanlines(raw, bpp)
+    costs = np.stack([np.abs(rows.view(np.int8).astype(np.int32)).sum(axis=1) for rows in filtered.values()])
+    best = costs.argmin(axis=0)
+    stacked = np.stack([np.hstack([np.full((h, 1), ft, np.uint8), rows]) for ft, rows in filtered.items()])
+    return stacked[best, np.arange(h)].tobytes()
+
+def deflate(data, strategy=zlib.Z_DEFAULT_STRATEGY):
+    """zlib-compress at maximum effort with the given strategy"""
+    z = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+    return z.compress(data) + z.flush()
+
+def smallest_idat(data):
+    """Smallest zlib stream of the filtered scanlines over ZLIB_STRATEGIES"""
+    return min((deflate(data, strategy) for strategy in ZLIB_STRATEGIES), key=len)
+
+def encode_png(img):
+    """Encode an image as a small lossless PNG.
+    
+    Images with at most 256 colors are written as indexed PNGs at the
+    lowest bit depth that fits (smaller than RGB/RGBA for every sprite we
+    draw), others as RGB or RGBA. No metadata chunks are written.
+    """
+    arr = np.asarray(img.convert('RGBA'))
+    h, w = arr.shape[:2]
+    chunks = []
+    
+    quantized = quantize_lossless(arr)
+    if quantized is not None:
+        palette, index = quantized
+        depth = next(d for d in (1, 2, 4, 8) if len(palette) <= 1 << d)
+        color_type, raw, bpp = 3, pack_indices(index, depth), 1
+        chunks.append(png_chunk(b"PLTE", palette[:, :3].tobytes()))
+        translucent = int((palette[:, 3] < 255).sum())
+        if translucent:
+            chunks.append(png_chunk(b"tRNS", palette[:translucent, 3].tobytes()))
+    elif (arr[:, :, 3] == 255).all():
+        depth, color_type, raw, bpp = 8, 2, arr[:, :, :3].reshape(h, w * 3), 3
+    else:
+        depth, color_type, raw, bpp = 8, 6, arr.reshape(h, w * 4), 4
     
-    # Wood planks
-    colors = [(160, 110, 60, 255), (140, 95, 50, 255), (150, 100, 55, 255)]
+    header = png_chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, depth, color_type, 0, 0, 0))
+    idat = smallest_idat(filtered_scanlines(raw, bpp, indexed=color_type == 3))
+    return b"".join([PNG_SIGNATURE, header, *chunks, png_chunk(b"IDAT", idat), png_chunk(b"IEND", b"")])
+
+def encode_png_default(img):
+    """Encode with Pillow's default PNG settings (the size baseline we report against)"""
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    return buf.getvalue()
+
+def encode_webp(img):
+    """Encode an image as lossless WebP, keeping colors under transparent pixels"""
+    buf = io.BytesIO()
+    # method 6 squeezes out ~7% more but is ~100x slower on 4x sprites
+    img.save(buf, "WEBP", lossless=True, quality=100, method=4, exact=True)
+    return buf.getvalue()
+
+def encode_outputs(img, filename):
+    """Every format an image ships in, keyed by output filename"""
+    stem = os.path.splitext(filename)[0]
+    return {f"{stem}.png": encode_png(img), f"{stem}.webp": encode_webp(img)}
+
+def save_img(img, filename, assets_dir, report=False):
+    """Save image to assets folder as PNG and WebP, returning the written paths.
+    
+    With report, the PNG is also encoded with Pillow's defaults to show the saving.
+    """
+    outputs = encode_outputs(img, filename)
+    paths = []
+    for name, data in outputs.items():
+        paths.append(os.path.join(assets_dir, name))
+        with open(paths[-1], "wb") as f:
+            f.write(data)
+    size = len(outputs[filename])
+    if report:
+        baseline = len(encode_png_default(img))
+        saved = baseline - size
+        print(f"Created: {filename} ({size} bytes, saved {saved} / {saved * 100 // max(baseline, 1)}%) + webp")
+    else:
+        print(f"Created: {filename} ({size} bytes) + webp")
+    return paths
+
+def pixel_grid(shape):
+    """Row and column index arrays for a (width, height) canvas"""
+    w, h = shape
+    return np.mgrid[0:h, 0:w]
+
+def noise_mask(shape, count, rng, margin=0):
+    """Mask with count random speckles, at least margin pixels from the edge"""
+    w, h = shape
+    gen = np.random.default_rng(rng.getrandbits(64))
+    mask = np.zeros((h, w), bool)
+    mask[gen.integers(margin, h - margin, count), gen.integers(margin, w - margin, count)] = True
+    return mask
+
+def stripe_mask(shape, period, width, vertical=True):
+    """Stripes width pixels wide repeating every period pixels"""
+    ys, xs = pixel_grid(shape)
+    return ((xs if vertical else ys) % period) < width
+
+def dot_mask(shape, period, radius):
+    """Round dots of the given radius centred in each period x period cell"""
+    ys, xs = pixel_grid(shape)
+    dx = xs % period - period // 2
+    dy = ys % period - period // 2
+    return dx * dx + dy * dy <= radius * radius
+
+def diamond_mask(shape, period, start, stop):
+    """Checkerboard of squares covering [start, stop) of every other cell"""
+    ys, xs = pixel_grid(shape)
+    cx, cy = xs % period, ys % period
+    inside = (cx >= start) & (cx < stop) & (cy >= start) & (cy < stop)
+    return inside & ((xs // period + ys // period) % 2 == 0)
+
+def bitmap_mask(shape, rows, origin=(0, 0)):
+    """Mask from ASCII rows ('#' set, anything else clear) placed at origin"""
+    w, h = shape
+    x0, y0 = origin
+    bits = np.array([[c == '#' for c in row] for row in rows], bool)
+    mask = np.zeros((h, w), bool)
+    mask[y0:y0 + bits.shape[0], x0:x0 + bits.shape[1]] = bits
+    return mask
+
+def create_floor_wood(variation=1, rng=None, size=TILE_SIZE):
+    """Create wooden floor tile (32x32, or size x size for HD)"""
+    s = size // TILE_SIZE
+    ys, xs = pixel_grid((size, size))
     
-    for y in range(0, 32, 8):
-        color = colors[(y // 8 + variation) % 3]
-        draw.rectangle([0, y, 31, y+7], fill=color)
-        # Plank lines
-        draw.line([(0, y), (31, y)], fill=(100, 60, 30, 255), width=1)
+    # Wood planks
+    colors = np.array([(160, 110, 60, 255), (140, 95, 50, 255), (150, 100, 55, 255)], np.uint8)
+    arr = colors[(ys // (8 * s) + variation) % 3]
+    # Plank lines
+    arr[ys % (8 * s) < s] = (100, 60, 30, 255)
     
     # Wood grain detail
-    for i in range(5):
-        x = random.randint(2, 30)
-        y = random.randint(2, 30)
-        draw.point((x, y), fill=(120, 80, 40, 255))
+    rng = rng or random.Random(variation)
+    arr[noise_mask((size, size), 5 * s * s, rng, margin=2 * s)] = (120, 80, 40, 255)
     
-    return img
+    return Image.fromarray(arr)
 
-def create_floor_carpet(variation=1):
-    """Create carpet tile (32x32)"""
+def create_floor_carpet(variation=1, rng=None, size=TILE_SIZE):
+    """Create carpet tile (32x32, or size x size for HD)"""
     base_colors = [(180, 130, 100, 255), (160, 110, 130, 255), (140, 120, 90, 255)]
     base = base_colors[variation % 3]
-    img = Image.new('RGBA', (32, 32), base)
-    draw = ImageDraw.Draw(img)
+    s = size // TILE_SIZE
+    arr = np.full((size, size, 4), base, np.uint8)
     
     # Carpet pattern
     pattern_color = (base[0]-20, base[1]-20, base[2]-20, 255)
     
     if variation == 1:
         # Diamond pattern
-        for y in range(0, 32, 8):
-            for x in range(0, 32, 8):
-                if (x + y) % 16 == 0:
-                    draw.rectangle([x+2, y+2, x+6, y+6], fill=pattern_color)
+        mask = diamond_mask((size, size), 8 * s, 2 * s, 7 * s)
     elif variation == 2:
         # Stripes
-        for x in range(0, 32, 4):
-            draw.rectangle([x, 0, x+2, 31], fill=pattern_color)
+        mask = stripe_mask((size, size), 4 * s, 3 * s)
     else:
         # Dots
-        for y in range(4, 32, 8):
-            for x in range(4, 32, 8):
-                draw.ellipse([x-2, y-2, x+2, y+2], fill=pattern_color)
+        mask = dot_mask((size, size), 8 * s, 2.5 * s)
+    arr[mask] = pattern_color
     
-    return img
+    return Image.fromarray(arr)
 
-def create_floor_tiles(variation=1):
+def create_floor_tiles(variation=1, rng=None):
     """Create tile floor (32x32)"""
     img = Image.new('RGBA', (32, 32), (220, 220, 210, 255))
     draw = ImageDraw.Draw(img)
@@ -84,7 +340,7 @@ def create_floor_tiles(variation=1):
     
     return img
 
-def create_wall_brick(variation=1):
+def create_wall_brick(variation=1, rng=None):
     """Create brick wall (32x32)"""
     img = Image.new('RGBA', (32, 32), (160, 100, 80, 255))
     draw = ImageDraw.Draw(img)
@@ -103,8 +359,8 @@ def create_wall_brick(variation=1):
     
     return img
 
-def create_wall_paint(variation=1):
-    """Create painted wall (32x32)"""
+def create_wall_paint(variation=1, rng=None, size=TILE_SIZE):
+    """Create painted wall (32x32, or size x size for HD)"""
     colors = [
         (255, 230, 200, 255),  # Warm cream
         (230, 240, 255, 255),  # Soft blue
@@ -112,19 +368,17 @@ def create_wall_paint(variation=1):
         (240, 255, 220, 255),  # Sage green
     ]
     base = colors[variation % 4]
-    img = Image.new('RGBA', (32, 32), base)
-    draw = ImageDraw.Draw(img)
+    s = size // TILE_SIZE
+    arr = np.full((size, size, 4), base, np.uint8)
     
     # Subtle texture
-    for i in range(20):
-        x = random.randint(0, 31)
-        y = random.randint(0, 31)
-        shade = (base[0]-10, base[1]-10, base[2]-10, 255)
-        draw.point((x, y), fill=shade)
+    rng = rng or random.Random(variation)
+    shade = (base[0]-10, base[1]-10, base[2]-10, 255)
+    arr[noise_mask((size, size), 20 * s * s, rng)] = shade
     
-    return img
+    return Image.fromarray(arr)
 
-def create_sofa(variation=1):
+def create_sofa(variation=1, rng=None):
     """Create sofa sprite (64x64 top-down)"""
     img = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -154,7 +408,7 @@ def create_sofa(variation=1):
     
     return img
 
-def create_plant(variation=1, big=False):
+def create_plant(variation=1, big=False, rng=None):
     """Create plant sprite"""
     size = 64 if big else 64
     img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
@@ -213,7 +467,7 @@ def create_plant(variation=1, big=False):
     
     return img
 
-def create_tv(variation=1):
+def create_tv(variation=1, rng=None):
     """Create TV sprite (64x64 top-down)"""
     img = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -236,7 +490,7 @@ def create_tv(variation=1):
     
     return img
 
-def create_bookshelf(variation=1):
+def create_bookshelf(variation=1, rng=None):
     """Create bookshelf sprite (64x64 top-down)"""
     img = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -255,22 +509,23 @@ def create_bookshelf(variation=1):
     ]
     
     # Draw shelves and books
+    rng = rng or random.Random(variation)
     for shelf_y in [16, 28, 40]:
         draw.line([(10, shelf_y), (54, shelf_y)], fill=wood_dark, width=2)
         # Random books
         x = 12
         while x < 50:
-            book_w = random.choice([4, 5, 6])
+            book_w = rng.choice([4, 5, 6])
             if x + book_w > 52:
                 break
-            color = random.choice(book_colors)
+            color = rng.choice(book_colors)
             draw.rectangle([x, shelf_y - 10, x + book_w, shelf_y], fill=color, 
                           outline=(color[0]-30, color[1]-30, color[2]-30, 255), width=1)
             x += book_w + 1
     
     return img
 
-def create_table(variation=1, dining=False):
+def create_table(variation=1, dining=False, rng=None):
     """Create table sprite (64x64 top-down)"""
     img = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -299,7 +554,7 @@ def create_table(variation=1, dining=False):
     
     return img
 
-def create_lamp(variation=1):
+def create_lamp(variation=1, rng=None):
     """Create lamp sprite (64x64 top-down)"""
     img = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -318,7 +573,7 @@ def create_lamp(variation=1):
     
     return img
 
-def create_bed(variation=1):
+def create_bed(variation=1, rng=None):
     """Create bed sprite (64x64 top-down)"""
     img = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -348,7 +603,7 @@ def create_bed(variation=1):
     
     return img
 
-def create_rug(variation=1):
+def create_rug(variation=1, rng=None):
     """Create rug sprite (64x64 top-down)"""
     img = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -389,7 +644,7 @@ def create_rug(variation=1):
     
     return img
 
-def create_human_sprite(variation=1):
+def create_human_sprite(variation=1, rng=None):
     """Create human character sprite sheet (32x48 with 4 directions)"""
     # Create sprite sheet: 4 columns (down, left, right, up) x 1 row
     img = Image.new('RGBA', (128, 48), (0, 0, 0, 0))
@@ -441,7 +696,7 @@ def create_human_sprite(variation=1):
     
     return img
 
-def create_lobster_agent(variation=1):
+def create_lobster_agent(variation=1, rng=None):
     """Create lobster agent sprite (32x48)"""
     img = Image.new('RGBA', (128, 48), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -483,7 +738,7 @@ def create_lobster_agent(variation=1):
     
     return img
 
-def create_robot_agent(variation=1):
+def create_robot_agent(variation=1, rng=None):
     """Create robot agent sprite (32x48)"""
     img = Image.new('RGBA', (128, 48), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -521,7 +776,197 @@ def create_robot_agent(variation=1):
     
     return img
 
-def create_button(variation=1):
+def crop_part(img):
+    """(cropped layer, (x, y)) for a part drawn on a full frame canvas"""
+    bbox = img.getbbox()
+    if bbox is None:
+        return None, (0, 0)
+    return img.crop(bbox), bbox[:2]
+
+def shirt_color(variation):
+    """Shirt color of a human variant"""
+    return (100, 150, 200, 255) if variation == 1 else (200, 100, 100, 255) if variation == 2 else (100, 180, 100, 255)
+
+@lru_cache(maxsize=None)
+def human_part(part, direction, variation):
+    """One body part of the human sprite, drawn once and cached"""
+    img = Image.new('RGBA', CHAR_FRAME, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    skin = (255, 220, 180, 255)
+    pants = (60, 60, 80, 255)
+    hair = (80, 60, 40, 255)
+    cx = CHAR_FRAME[0] // 2
+    side = direction in ('left', 'right')
+    
+    if part == 'leg_l':
+        draw.rectangle([cx-6, 32, cx-2, 46] if side else [cx-5, 32, cx-1, 46], fill=pants)
+    elif part == 'leg_r':
+        draw.rectangle([cx+2, 32, cx+6, 46] if side else [cx+1, 32, cx+5, 46], fill=pants)
+    elif part == 'body':
+        draw.rectangle([cx-7, 18, cx+7, 34], fill=shirt_color(variation))
+    elif part == 'arm_l' and direction != 'right':
+        draw.rectangle([cx-9, 20, cx-5, 32], fill=skin)
+    elif part == 'arm_r' and direction != 'left':
+        draw.rectangle([cx+5, 20, cx+9, 32], fill=skin)
+    elif part == 'head':
+        draw.ellipse([cx-6, 8, cx+6, 20], fill=skin)
+    elif part == 'hair':
+        if direction == 'up':
+            draw.ellipse([cx-6, 6, cx+6, 14], fill=hair)
+        else:
+            draw.arc([cx-6, 6, cx+6, 16], 0, 180, fill=hair, width=3)
+    return crop_part(img)
+
+@lru_cache(maxsize=None)
+def lobster_part(part, direction, variation):
+    """One body part of the lobster agent, drawn once and cached"""
+    img = Image.new('RGBA', CHAR_FRAME, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    shell = (220, 80, 60, 255)
+    shell_dark = (180, 60, 40, 255)
+    cx = CHAR_FRAME[0] // 2
+    
+    if part == 'body':
+        draw.ellipse([cx-8, 20, cx+8, 44], fill=shell)
+        draw.ellipse([cx-6, 16, cx+6, 28], fill=shell_dark)
+    elif part == 'claw_l':
+        if direction == 'left':
+            draw.ellipse([cx-14, 24, cx-6, 32], fill=shell)
+        elif direction == 'right':
+            draw.ellipse([cx+6, 24, cx+14, 32], fill=shell)
+        else:
+            draw.ellipse([cx-12, 24, cx-4, 32], fill=shell)
+    elif part == 'claw_r':
+        if direction == 'left':
+            draw.ellipse([cx+2, 28, cx+6, 36], fill=shell_dark)
+        elif direction == 'right':
+            draw.ellipse([cx-6, 28, cx-2, 36], fill=shell_dark)
+        else:
+            draw.ellipse([cx+4, 24, cx+12, 32], fill=shell)
+    elif part == 'eyes' and direction != 'up':
+        draw.ellipse([cx-4, 12, cx-1, 16], fill=(255, 255, 255, 255))
+        draw.ellipse([cx+1, 12, cx+4, 16], fill=(255, 255, 255, 255))
+        draw.point([cx-2, 14], fill=(0, 0, 0, 255))
+        draw.point([cx+2, 14], fill=(0, 0, 0, 255))
+    elif part == 'antennae':
+        draw.line([(cx-3, 10), (cx-6, 4)], fill=shell_dark, width=1)
+        draw.line([(cx+3, 10), (cx+6, 4)], fill=shell_dark, width=1)
+    return crop_part(img)
+
+@lru_cache(maxsize=None)
+def robot_part(part, direction, variation):
+    """One body part of the robot agent, drawn once and cached"""
+    img = Image.new('RGBA', CHAR_FRAME, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    body = (180, 180, 190, 255)
+    body_dark = (140, 140, 150, 255)
+    accent = (100, 200, 255, 255) if variation == 1 else (255, 200, 100, 255)
+    cx = CHAR_FRAME[0] // 2
+    
+    if part == 'wheels':
+        draw.rounded_rectangle([cx-8, 38, cx+8, 46], radius=2, fill=(80, 80, 80, 255))
+    elif part == 'body':
+        draw.rounded_rectangle([cx-8, 20, cx+8, 40], radius=3, fill=body, outline=body_dark, width=1)
+    elif part == 'head':
+        draw.rounded_rectangle([cx-6, 10, cx+6, 22], radius=2, fill=body, outline=body_dark, width=1)
+    elif part == 'visor':
+        if direction == 'left':
+            draw.rectangle([cx-5, 14, cx-1, 18], fill=accent)
+        elif direction == 'right':
+            draw.rectangle([cx+1, 14, cx+5, 18], fill=accent)
+        else:
+            draw.rectangle([cx-4, 14, cx+4, 18], fill=accent)
+    elif part == 'antenna':
+        draw.line([(cx, 10), (cx, 4)], fill=body_dark, width=2)
+        draw.ellipse([cx-2, 2, cx+2, 6], fill=(255, 100, 100, 255))
+    return crop_part(img)
+
+def swing(frame, frames):
+    """Walk-cycle phase in pixels: 0, 2, 0, -2, ... over the cycle"""
+    return round(2 * math.sin(2 * math.pi * frame / frames))
+
+def human_motion(animation, direction, frame, frames):
+    """Per-part (dx, dy) offsets of the human for one frame"""
+    side = direction in ('left', 'right')
+    if animation == 'idle':
+        breath = 1 if frame >= frames // 2 else 0
+        return {'arm_l': (0, breath), 'arm_r': (0, breath), 'head': (0, breath), 'hair': (0, breath)}
+    s = swing(frame, frames)
+    bob = -(frame % 2)
+    offsets = {part: (0, bob) for part in ('body', 'arm_l', 'arm_r', 'head', 'hair')}
+    if side:
+        offsets.update({'leg_l': (s, 0), 'leg_r': (-s, 0), 'arm_l': (-s // 2, bob), 'arm_r': (s // 2, bob)})
+    else:
+        offsets.update({'leg_l': (0, min(0, -s)), 'leg_r': (0, min(0, s))})
+    return offsets
+
+def lobster_motion(animation, direction, frame, frames):
+    """Per-part (dx, dy) offsets of the lobster for one frame"""
+    if animation == 'idle':
+        sway = 1 if frame >= frames // 2 else 0
+        return {'antennae': (sway, 0), 'claw_l': (0, sway), 'claw_r': (0, -sway)}
+    s = swing(frame, frames)
+    bob = -(frame % 2)
+    offsets = {part: (0, bob) for part in ('body', 'eyes', 'antennae')}
+    offsets.update({'claw_l': (0, bob + min(0, -s)), 'claw_r': (0, bob + min(0, s))})
+    return offsets
+
+def robot_motion(animation, direction, frame, frames):
+    """Per-part (dx, dy) offsets of the robot for one frame"""
+    if animation == 'idle':
+        scan = 1 if frame >= frames // 2 else -1
+        return {'visor': (scan if direction in ('down', 'up') else 0, 0)}
+    bob = -(frame % 2)
+    offsets = {part: (0, bob) for part in ('body', 'head', 'visor', 'antenna')}
+    offsets['wheels'] = (swing(frame, frames) // 2, 0)
+    return offsets
+
+# Character rigs: parts in draw order, cached part renderer and motion
+CHARACTER_RIGS = {
+    'human': (('leg_l', 'leg_r', 'body', 'arm_l', 'arm_r', 'head', 'hair'), human_part, human_motion),
+    'lobster': (('body', 'claw_l', 'claw_r', 'eyes', 'antennae'), lobster_part, lobster_motion),
+    'robot': (('wheels', 'body', 'head', 'visor', 'antenna'), robot_part, robot_motion),
+}
+
+def sheet_layout(walk=4, idle=2):
+    """Rows of a cycle sheet: {animation: {"frames": n, "rows": {direction: row}}}"""
+    layout = {}
+    row = 0
+    for animation, frames in (('walk', walk), ('idle', idle)):
+        if frames:
+            layout[animation] = {"frames": frames, "rows": {}}
+            for direction in CHAR_DIRECTIONS:
+                layout[animation]["rows"][direction] = row
+                row += 1
+    return layout
+
+def create_character_sheet(variation=1, rng=None, character='human', walk=4, idle=2):
+    """Create an animated walk/idle sprite sheet (32x48 frames).
+    
+    One row per animation and direction, one column per frame. Frames are
+    composited from cached body parts offset per frame, so each part is
+    drawn once per direction rather than once per frame.
+    """
+    parts, part_fn, motion = CHARACTER_RIGS[character]
+    layout = sheet_layout(walk, idle)
+    fw, fh = CHAR_FRAME
+    rows = sum(len(a["rows"]) for a in layout.values())
+    img = Image.new('RGBA', (fw * max(walk, idle), fh * rows), (0, 0, 0, 0))
+    
+    for animation, info in layout.items():
+        for direction, row in info["rows"].items():
+            for frame in range(info["frames"]):
+                offsets = motion(animation, direction, frame, info["frames"])
+                for part in parts:
+                    layer, (x, y) = part_fn(part, direction, variation)
+                    if layer is None:
+                        continue
+                    dx, dy = offsets.get(part, (0, 0))
+                    img.alpha_composite(layer, (frame * fw + x + dx, row * fh + y + dy))
+    
+    return img
+
+def create_button(variation=1, rng=None):
     """Create UI button (various sizes, return 64x32)"""
     img = Image.new('RGBA', (64, 32), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -544,7 +989,7 @@ def create_button(variation=1):
     
     return img
 
-def create_panel(variation=1):
+def create_panel(variation=1, rng=None):
     """Create UI panel (128x128)"""
     img = Image.new('RGBA', (128, 128), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -560,7 +1005,7 @@ def create_panel(variation=1):
     
     return img
 
-def create_coin_icon(variation=1):
+def create_coin_icon(variation=1, rng=None):
     """Create coin icon (32x32)"""
     img = Image.new('RGBA', (32, 32), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
@@ -579,11 +1024,8 @@ def create_coin_icon(variation=1):
     
     return img
 
-def create_heart_icon(variation=1):
+def create_heart_icon(variation=1, rng=None):
     """Create heart icon (32x32)"""
-    img = Image.new('RGBA', (32, 32), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
     # Heart color
     if variation == 1:
         color = (220, 80, 100, 255)
@@ -592,113 +1034,1067 @@ def create_heart_icon(variation=1):
         color = (255, 150, 150, 255)
         shadow = (220, 100, 100, 255)
     
-    # Draw heart shape using pixels
-    heart_pixels = [
-        (8, 6), (9, 6), (22, 6), (23, 6),
-        (7, 7), (8, 7), (9, 7), (10, 7), (21, 7), (22, 7), (23, 7), (24, 7),
-        (6, 8), (7, 8), (8, 8), (9, 8), (10, 8), (11, 8), (20, 8), (21, 8), (22, 8), (23, 8), (24, 8), (25, 8),
-        (6, 9), (7, 9), (8, 9), (9, 9), (10, 9), (11, 9), (12, 9), (19, 9), (20, 9), (21, 9), (22, 9), (23, 9), (24, 9), (25, 9),
-        (6, 10), (7, 10), (8, 10), (9, 10), (10, 10), (11, 10), (12, 10), (13, 10), (18, 10), (19, 10), (20, 10), (21, 10), (22, 10), (23, 10), (24, 10), (25, 10),
-        (7, 11), (8, 11), (9, 11), (10, 11), (11, 11), (12, 11), (13, 11), (14, 11), (17, 11), (18, 11), (19, 11), (20, 11), (21, 11), (22, 11), (23, 11), (24, 11),
-        (8, 12), (9, 12), (10, 12), (11, 12), (12, 12), (13, 12), (14, 12), (15, 12), (16, 12), (17, 12), (18, 12), (19, 12), (20, 12), (21, 12), (22, 12), (23, 12),
-        (9, 13), (10, 13), (11, 13), (12, 13), (13, 13), (14, 13), (15, 13), (16, 13), (17, 13), (18, 13), (19, 13), (20, 13), (21, 13), (22, 13),
-        (10, 14), (11, 14), (12, 14), (13, 14), (14, 14), (15, 14), (16, 14), (17, 14), (18, 14), (19, 14), (20, 14), (21, 14),
-        (11, 15), (12, 15), (13, 15), (14, 15), (15, 15), (16, 15), (17, 15), (18, 15), (19, 15), (20, 15),
-        (12, 16), (13, 16), (14, 16), (15, 16), (16, 16), (17, 16), (18, 16), (19, 16),
-        (13, 17), (14, 17), (15, 17), (16, 17), (17, 17), (18, 17),
-        (14, 18), (15, 18), (16, 18), (17, 18),
-        (15, 19), (16, 19),
-    ]
+    # Draw heart shape from its bitmap
+    arr = np.zeros((32, 32, 4), np.uint8)
+    arr[bitmap_mask((32, 32), HEART_BITMAP, (6, 6))] = color
     
-    for x, y in heart_pixels:
-        draw.point((x, y), fill=color)
+    return Image.fromarray(arr)
+
+def hex_to_rgb(color):
+    """'#8B4513' -> (139, 69, 19)"""
+    color = color.lstrip('#')
+    return tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
+
+@lru_cache(maxsize=None)
+def recolor_base(source, variation):
+    """Render a recolor source once per process, as (palette, indices).
+    
+    The base is seeded from its own name so every color variant of it
+    shares the exact same geometry.
+    """
+    img = GENERATORS[source](variation, rng=random.Random(f"{source}:{variation}"))
+    quantized = quantize_lossless(np.asarray(img.convert('RGBA')))
+    if quantized is None:
+        raise ValueError(f"{source}({variation}) has more than 256 colors and can't be palette-swapped")
+    return quantized
+
+def recolor_palette(palette, counts, color, tint=None, anchor=None):
+    """Tint palette entries so anchor becomes color.
+    
+    Tinted entries keep their per-channel ratio to the anchor, so shadows
+    and highlights stay relatively darker/lighter. tint lists the RGB
+    colors to recolor (default: every opaque entry); anchor defaults to
+    the most used tinted color.
+    """
+    rgb = palette[:, :3].astype(np.float64)
+    if tint is None:
+        tinted = palette[:, 3] == 255
+    else:
+        tinted = (rgb[:, None, :] == np.array(tint, np.float64)[None]).all(axis=2).any(axis=1)
+    if anchor is None:
+        anchor = rgb[np.argmax(np.where(tinted, counts, -1))]
+    
+    out = palette.copy()
+    ratio = rgb[tinted] / np.maximum(np.array(anchor, np.float64), 1)
+    out[tinted, :3] = np.clip(np.rint(ratio * hex_to_rgb(color)), 0, 255)
+    return out
+
+def create_recolor(variation=1, rng=None, source="create_sofa", color="#8B4513", tint=None, anchor=None):
+    """Palette-swapped copy of another generator's sprite.
+    
+    The source is rendered once per process; each color is a lookup-table
+    remap of its palette indices rather than a redraw.
+    """
+    palette, index = recolor_base(source, variation)
+    counts = np.bincount(index.ravel(), minlength=len(palette))
+    return Image.fromarray(recolor_palette(palette, counts, color, tint, anchor)[index])
+
+AssetJob = namedtuple('AssetJob', ['generator', 'variation', 'options', 'filename', 'scales'])
+
+def asset_job(generator, variation, filename, scales=DENSITIES, **options):
+    """Describe one asset render: generator(variation, **options) -> filename"""
+    return AssetJob(generator, variation, tuple(sorted(options.items())), filename, tuple(scales))
+
+# Every create_* generator, by name, for the spec to refer to
+GENERATORS = {name: fn for name, fn in globals().items() if name.startswith("create_")}
+
+def load_spec(path):
+    """Load an asset spec, resolving its output_dir and catalog relative to the spec file"""
+    with open(path) as f:
+        spec = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    spec["output_dir"] = os.path.join(base, spec.get("output_dir", "."))
+    if "catalog" in spec:
+        spec["catalog"] = os.path.join(base, spec["catalog"])
+    if "precache" in spec:
+        spec["precache"]["public_dir"] = os.path.join(base, spec["precache"]["public_dir"])
+    return spec
+
+def load_catalog_colors(path):
+    """colorOptions per item from decor/furniture-catalog.js.
+    
+    The catalog is a JS object literal with one `key: {` per item and a
+    one-line colorOptions array, so a line scan is enough here.
+    """
+    colors = {}
+    item = None
+    with open(path) as f:
+        for line in f:
+            m = re.match(r"\s{8}(\w+): \{", line)
+            if m:
+                item = m.group(1)
+            m = re.search(r"colorOptions:\s*\[(.*?)\]", line)
+            if m and item:
+                colors[item] = re.findall(r"'(#[0-9A-Fa-f]{6})'", m.group(1))
+    return colors
+
+def freeze(value):
+    """Lists (from JSON) -> tuples, so job options stay hashable"""
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def plan_jobs(spec, only=None):
+    """Expand the spec's asset families into jobs.
+    
+    Returns (jobs, selected): every job in spec order, plus the set of
+    filenames matched by the --only patterns (family name, group or
+    filename globs), or None when nothing is filtered.
+    """
+    jobs = []
+    selected = set() if only else None
+    matched = set()
+    catalog = None
+    
+    for family in spec["families"]:
+        generator = GENERATORS.get(family["generator"])
+        if generator is None:
+            raise ValueError(f"{family['name']}: unknown generator {family['generator']!r}")
+        options = {k: freeze(v) for k, v in family.get("options", {}).items()}
+        scales = family.get("densities", spec.get("densities", DENSITIES))
+        offset = family.get("offset", 0)
+        
+        # Color families expand over a catalog item's colorOptions (or explicit colors)
+        colors = family.get("colors", [None])
+        if "catalog_item" in family:
+            if catalog is None:
+                catalog = load_catalog_colors(spec["catalog"])
+            colors = catalog.get(family["catalog_item"])
+            if not colors:
+                raise ValueError(f"{family['name']}: no colorOptions for {family['catalog_item']!r}")
+        
+        family_jobs = []
+        for v in family["variants"]:
+            for color in colors:
+                extra = {} if color is None else {"color": color}
+                filename = family["filename"].format(v=v, color=(color or "").lstrip('#').lower())
+                family_jobs.append(asset_job(generator, v + offset, filename, scales, **options, **extra))
+        if "default" in family:
+            family_jobs.append(family_jobs[0]._replace(filename=family["default"]))
+        jobs += family_jobs
+        
+        for pattern in only or []:
+            for job in family_jobs:
+                if any(fnmatch.fnmatch(name, pattern)
+                       for name in (family["name"], family.get("group", ""), job.filename)):
+                    selected.add(job.filename)
+                    matched.add(pattern)
+    
+    unmatched = set(only or []) - matched
+    if unmatched:
+        raise ValueError(f"--only matched no assets: {', '.join(sorted(unmatched))}")
+    return jobs, selected
+
+def is_selected(job, aliases, selected):
+    """True if a dedupe group has to be built for the current --only selection"""
+    return selected is None or not selected.isdisjoint([job.filename] + aliases)
+
+def dedupe_jobs(jobs):
+    """Group jobs that render the same image.
+    
+    Returns a list of (job, alias_filenames): the job is rendered once and
+    every alias is linked to its output afterwards.
+    """
+    groups = {}
+    for job in jobs:
+        key = (asset_name(job), job.scales)
+        if key in groups:
+            groups[key][1].append(job.filename)
+        else:
+            groups[key] = (job, [])
+    return list(groups.values())
+
+def asset_name(job):
+    """Stable name for what a job draws, e.g. 'create_plant:2:big=True'"""
+    parts = [job.generator.__name__, str(job.variation)]
+    parts += [f"{k}={v}" for k, v in job.options]
+    return ":".join(parts)
+
+def asset_rng(seed, job):
+    """RNG for a job, derived from the build seed and the asset name.
     
-    return img
+    Seeding from a string is stable across runs and PYTHONHASHSEED.
+    """
+    return random.Random(f"{seed}:{asset_name(job)}")
+
+def render_image(job, seed=DEFAULT_SEED):
+    """Run a job's generator with its derived RNG"""
+    return job.generator(job.variation, rng=asset_rng(seed, job), **dict(job.options))
+
+def density_filename(filename, scale):
+    """sofa_v1.png -> sofa_v1@2x.png (1x keeps the plain name)"""
+    if scale == 1:
+        return filename
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}@{scale}x{ext}"
+
+def density_images(img, filename, scales):
+    """(filename, image) for each density, nearest-neighbor scaled from one render"""
+    for scale in scales:
+        scaled = img if scale == 1 else img.resize((img.width * scale, img.height * scale), Image.NEAREST)
+        yield density_filename(filename, scale), scaled
+
+def output_names(filename, scales):
+    """Every file a job writes for filename, in the order it writes them"""
+    names = []
+    for scale in scales:
+        stem = os.path.splitext(density_filename(filename, scale))[0]
+        names += [f"{stem}.png", f"{stem}.webp"]
+    return names
+
+def render_job(job, assets_dir, seed=DEFAULT_SEED, report=False):
+    """Render and save a single job (runs inside a worker process)"""
+    img = render_image(job, seed)
+    return [path for name, scaled in density_images(img, job.filename, job.scales)
+            for path in save_img(scaled, name, assets_dir, report)]
+
+def render_digests(job, seed=DEFAULT_SEED):
+    """Render a job in memory and return {output filename: sha256}"""
+    img = render_image(job, seed)
+    return {name: hashlib.sha256(data).hexdigest()
+            for filename, scaled in density_images(img, job.filename, job.scales)
+            for name, data in encode_outputs(scaled, filename).items()}
+
+def link_asset(src, dst):
+    """Hard-link dst to src, falling back to a copy across filesystems"""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+    print(f"Linked: {os.path.basename(dst)} -> {os.path.basename(src)}")
+    return dst
+
+# Shared helpers besides the generator that decide output bytes; part of each cache key
+SHARED_HELPERS = (hex_to_rgb, recolor_base, recolor_palette,
+                  pixel_grid, noise_mask, stripe_mask, dot_mask, diamond_mask, bitmap_mask,
+                  png_chunk, quantize_lossless, pack_indices, filter_scanlines, filtered_scanlines,
+                  deflate, smallest_idat, encode_png, encode_webp, encode_outputs, density_images)
+
+# Helpers only some generators draw with; part of those generators' cache keys
+GENERATOR_HELPERS = {
+    "create_character_sheet": (crop_part, shirt_color, human_part, lobster_part, robot_part, swing,
+                               human_motion, lobster_motion, robot_motion, sheet_layout),
+}
+
+# Module constants generators and helpers draw with; also part of every cache key
+SHARED_CONSTANTS = repr((TILE_SIZE, HEART_BITMAP, CHAR_FRAME, CHAR_DIRECTIONS,
+                         {name: rig[0] for name, rig in CHARACTER_RIGS.items()}))
+
+@cache
+def source_digest(fn):
+    """sha256 of a function's source (read once per process)"""
+    return hashlib.sha256(inspect.getsource(fn).encode()).digest()
+
+def job_cache_key(job, seed=DEFAULT_SEED):
+    """Hash everything that determines a job's output bytes"""
+    h = hashlib.sha256()
+    h.update(f"v{CACHE_VERSION}".encode())
+    h.update(SHARED_CONSTANTS.encode())
+    sources = [GENERATORS[v] for k, v in job.options if k == "source"]
+    helpers = GENERATOR_HELPERS.get(job.generator.__name__, ())
+    for fn in (job.generator, *sources) + helpers + SHARED_HELPERS:
+        h.update(source_digest(fn))
+    h.update(repr((job.variation, job.options, job.scales, seed)).encode())
+    return h.hexdigest()
+
+def file_digest(path):
+    """sha256 of a file's contents"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_cache(assets_dir):
+    """Load the build cache manifest, or an empty one"""
+    try:
+        with open(os.path.join(assets_dir, CACHE_MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != CACHE_VERSION:
+        return {}
+    return manifest.get("assets", {})
+
+def save_cache(assets_dir, entries):
+    """Atomically write the build cache manifest"""
+    path = os.path.join(assets_dir, CACHE_MANIFEST)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": CACHE_VERSION, "assets": entries}, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+def is_fresh(cache, assets_dir, filename, key):
+    """True if filename's outputs were built from key and are untouched on disk"""
+    entry = cache.get(filename)
+    if not entry or entry["key"] != key:
+        return False
+    for name, digest in entry["outputs"].items():
+        path = os.path.join(assets_dir, name)
+        if not os.path.exists(path) or file_digest(path) != digest:
+            return False
+    return True
+
+def link_outputs(assets_dir, job, alias):
+    """Link every output of job to the matching output name of alias"""
+    return [link_asset(os.path.join(assets_dir, src), os.path.join(assets_dir, dst))
+            for src, dst in zip(output_names(job.filename, job.scales), output_names(alias, job.scales))]
+
+def alias_entry(entry, job, alias):
+    """Cache entry for an alias, with the job's output digests under the alias' names"""
+    names = dict(zip(output_names(job.filename, job.scales), output_names(alias, job.scales)))
+    return {"key": entry["key"], "outputs": {names[n]: d for n, d in entry["outputs"].items()}}
+
+def map_jobs(fn, jobs, workers=None):
+    """Map fn over jobs, across a process pool when there is more than one worker"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        return [fn(job) for job in jobs]
+    # Batch jobs per worker so thousands of tiny sprites don't pay IPC per item
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, jobs, chunksize=chunksize))
+
+def run_jobs(jobs, assets_dir, workers=None, force=False, seed=DEFAULT_SEED, selected=None, report=False):
+    """Render all stale jobs across a process pool.
+    
+    Only dedupe groups containing a selected filename are built (all of them
+    if selected is None); the rest keep their cache entries untouched. With
+    report, each PNG's saving over Pillow's default encoder is printed.
+    Returns (written_paths, skipped_file_count). Cache entries for files that no
+    job produces any more are evicted and their outputs removed.
+    """
+    cache = load_cache(assets_dir)
+    entries = {}
+    pending = []
+    written = []
+    skipped = 0
+    
+    for job, aliases in dedupe_jobs(jobs):
+        if not is_selected(job, aliases, selected):
+            entries.update((f, cache[f]) for f in [job.filename] + aliases if f in cache)
+            continue
+        key = job_cache_key(job, seed)
+        if force or not is_fresh(cache, assets_dir, job.filename, key):
+            pending.append((job, aliases, key))
+            continue
+        skipped += len(cache[job.filename]["outputs"])
+        entries[job.filename] = cache[job.filename]
+        for alias in aliases:
+            if is_fresh(cache, assets_dir, alias, key):
+                skipped += len(cache[alias]["outputs"])
+            else:
+                written += link_outputs(assets_dir, job, alias)
+            entries[alias] = alias_entry(cache[job.filename], job, alias)
+    
+    rendered = map_jobs(partial(render_job, assets_dir=assets_dir, seed=seed, report=report),
+                        [job for job, _, _ in pending], workers)
+    
+    for paths, (job, aliases, key) in zip(rendered, pending):
+        written += paths
+        entry = {"key": key, "outputs": {os.path.basename(p): file_digest(p) for p in paths}}
+        entries[job.filename] = entry
+        for alias in aliases:
+            written += link_outputs(assets_dir, job, alias)
+            entries[alias] = alias_entry(entry, job, alias)
+    
+    # Evict outputs of generators/jobs that no longer exist
+    for filename in sorted(set(cache) - set(entries)):
+        for name in cache[filename]["outputs"]:
+            path = os.path.join(assets_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"Removed stale: {name}")
+    
+    if entries != cache:
+        save_cache(assets_dir, entries)
+    
+    return written, skipped
+
+def verify_jobs(jobs, assets_dir, workers=None, seed=DEFAULT_SEED, selected=None):
+    """Re-render every (selected) job in memory and compare against the files on disk.
+    
+    Returns the list of filenames whose bytes differ (or are missing).
+    """
+    unique = [group for group in dedupe_jobs(jobs) if is_selected(*group, selected)]
+    rendered = map_jobs(partial(render_digests, seed=seed), [job for job, _ in unique], workers)
+    mismatched = []
+    for digests, (job, aliases) in zip(rendered, unique):
+        for filename in [job.filename] + aliases:
+            names = zip(output_names(job.filename, job.scales), output_names(filename, job.scales))
+            for name, output in names:
+                path = os.path.join(assets_dir, output)
+                if not os.path.exists(path) or file_digest(path) != digests[name]:
+                    mismatched.append(output)
+    return mismatched
+
+def write_manifest(assets_dir, name, manifest):
+    """Write a JSON manifest, only when its contents change so no-op builds leave it alone"""
+    write_if_changed(os.path.join(assets_dir, name), json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+
+def write_if_changed(path, data):
+    """Write text to path unless it already holds exactly that; True if written"""
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == data:
+                return False
+    with open(path, "w") as f:
+        f.write(data)
+    return True
+
+def write_density_manifest(assets_dir, jobs):
+    """Write densities.json: for each asset, its file per density and format"""
+    manifest = {}
+    for job in jobs:
+        manifest[job.filename] = {}
+        for scale in job.scales:
+            stem = os.path.splitext(density_filename(job.filename, scale))[0]
+            manifest[job.filename][f"{scale}x"] = {"png": f"{stem}.png", "webp": f"{stem}.webp"}
+    write_manifest(assets_dir, DENSITY_MANIFEST, manifest)
+
+def write_animation_manifest(assets_dir, jobs):
+    """Write animations.json: frame grid of every character cycle sheet.
+    
+    Frame i of an animation facing a direction sits at
+    (i * frame_width, row * frame_height) in the sheet.
+    """
+    manifest = {}
+    for job in jobs:
+        if job.generator is not create_character_sheet:
+            continue
+        options = dict(job.options)
+        layout = sheet_layout(options.get("walk", 4), options.get("idle", 2))
+        for animation, info in layout.items():
+            info["fps"] = ANIMATION_FPS[animation]
+        manifest[job.filename] = {
+            "character": options.get("character", "human"),
+            "frame_width": CHAR_FRAME[0],
+            "frame_height": CHAR_FRAME[1],
+            "animations": layout,
+        }
+    write_manifest(assets_dir, ANIMATION_MANIFEST, manifest)
+
+def trim_box(img):
+    """Bounds (x0, y0, x1, y1) of an RGBA image's non-transparent pixels.
+    
+    A fully transparent image keeps a single pixel, so every sprite still
+    has a frame.
+    """
+    return Image.fromarray(np.asarray(img)[:, :, 3]).getbbox() or (0, 0, 1, 1)
+
+def pack_hit_mask(img, box):
+    """Bit-packed rows of the pixels inside box that are at least HIT_ALPHA opaque.
+    
+    Rows are padded to whole bytes, most significant bit first, so pixel
+    (x, y) of the box is bit 7 - x % 8 of byte y * stride + x // 8.
+    """
+    x0, y0, x1, y1 = box
+    solid = np.asarray(img)[y0:y1, x0:x1, 3] >= HIT_ALPHA
+    return np.packbits(solid, axis=1)
+
+def write_hit_masks(assets_dir):
+    """Write every cached sprite's trimmed bounds and 1-bit alpha mask.
+    
+    All masks go into one binary file; the JSON index maps each filename
+    to its source size, trim box and byte offset/stride in that file. A
+    stride of 0 means every pixel of the trim box is a hit. Files with
+    identical contents share one mask. Returns the number of
+    masks written, or None if they were already up to date.
+    """
+    entries = load_cache(assets_dir)
+    digests = {f: e["outputs"][f] for f, e in entries.items()}
+    key = hashlib.sha256(repr((sorted(digests.items()), HIT_ALPHA)).encode()).hexdigest()
+    
+    index_path = os.path.join(assets_dir, HITMASK_INDEX)
+    try:
+        with open(index_path) as f:
+            if json.load(f)["meta"]["key"] == key and os.path.exists(os.path.join(assets_dir, HITMASK_FILE)):
+                return None
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    blob = bytearray()
+    by_digest = {}
+    sprites = {}
+    for filename in sorted(entries):
+        digest = digests[filename]
+        if digest not in by_digest:
+            with Image.open(os.path.join(assets_dir, filename)) as img:
+                img = img.convert('RGBA')
+            box = trim_box(img)
+            bits = pack_hit_mask(img, box)
+            w, h = box[2] - box[0], box[3] - box[1]
+            # Fully solid boxes (tiles, panels) need no bits at all
+            solid = bool((np.unpackbits(bits, axis=1)[:, :w] == 1).all())
+            by_digest[digest] = {
+                "sourceSize": {"w": img.width, "h": img.height},
+                "trim": {"x": box[0], "y": box[1], "w": w, "h": h},
+                "offset": len(blob),
+                "stride": 0 if solid else bits.shape[1],
+            }
+            if not solid:
+                blob += bits.tobytes()
+        sprites[filename] = by_digest[digest]
+    
+    path = os.path.join(assets_dir, HITMASK_FILE)
+    with open(path + ".tmp", "wb") as f:
+        f.write(blob)
+    os.replace(path + ".tmp", path)
+    write_manifest(assets_dir, HITMASK_INDEX, {
+        "sprites": sprites,
+        "meta": {"key": key, "file": HITMASK_FILE, "bytes": len(blob), "alpha": HIT_ALPHA},
+    })
+    return len(by_digest)
+
+HitMask = namedtuple('HitMask', ['source', 'trim', 'solid'])
+
+def load_hit_masks(assets_dir):
+    """{filename: HitMask} from hitmasks.json/.bin; solid is a bool array over the trim box"""
+    with open(os.path.join(assets_dir, HITMASK_INDEX)) as f:
+        index = json.load(f)
+    with open(os.path.join(assets_dir, index["meta"]["file"]), "rb") as f:
+        blob = np.frombuffer(f.read(), np.uint8)
+    masks = {}
+    for filename, entry in index["sprites"].items():
+        trim = entry["trim"]
+        if entry["stride"] == 0:
+            solid = np.ones((trim["h"], trim["w"]), bool)
+        else:
+            rows = blob[entry["offset"]:entry["offset"] + trim["h"] * entry["stride"]]
+            solid = np.unpackbits(rows.reshape(trim["h"], entry["stride"]), axis=1)[:, :trim["w"]].astype(bool)
+        masks[filename] = HitMask((entry["sourceSize"]["w"], entry["sourceSize"]["h"]),
+                                  (trim["x"], trim["y"], trim["w"], trim["h"]), solid)
+    return masks
+
+def extrude_sprite(img, amount):
+    """Pad a sprite by repeating its edge pixels outward"""
+    if amount <= 0:
+        return img
+    w, h = img.size
+    out = Image.new('RGBA', (w + 2 * amount, h + 2 * amount), (0, 0, 0, 0))
+    out.paste(img, (amount, amount))
+    # Edges
+    out.paste(img.crop((0, 0, w, 1)).resize((w, amount)), (amount, 0))
+    out.paste(img.crop((0, h - 1, w, h)).resize((w, amount)), (amount, h + amount))
+    out.paste(img.crop((0, 0, 1, h)).resize((amount, h)), (0, amount))
+    out.paste(img.crop((w - 1, 0, w, h)).resize((amount, h)), (w + amount, amount))
+    # Corners
+    for sx, sy, dx, dy in [(0, 0, 0, 0), (w - 1, 0, w + amount, 0),
+                           (0, h - 1, 0, h + amount), (w - 1, h - 1, w + amount, h + amount)]:
+        out.paste(img.crop((sx, sy, sx + 1, sy + 1)).resize((amount, amount)), (dx, dy))
+    return out
+
+class MaxRectsBin:
+    """MaxRects bin packer (best short side fit)"""
+    
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = [(0, 0, width, height)]
+        self.extent = (0, 0)
+    
+    def insert(self, w, h):
+        """Place a w x h rect, returning its (x, y) or None if it doesn't fit"""
+        best = None
+        best_fit = None
+        for fx, fy, fw, fh in self.free:
+            if w <= fw and h <= fh:
+                fit = (min(fw - w, fh - h), max(fw - w, fh - h))
+                if best_fit is None or fit < best_fit:
+                    best, best_fit = (fx, fy), fit
+        if best is None:
+            return None
+        
+        self._split((best[0], best[1], w, h))
+        self.extent = (max(self.extent[0], best[0] + w), max(self.extent[1], best[1] + h))
+        return best
+    
+    def _split(self, used):
+        ux, uy, uw, uh = used
+        free = []
+        for rect in self.free:
+            fx, fy, fw, fh = rect
+            if ux >= fx + fw or ux + uw <= fx or uy >= fy + fh or uy + uh <= fy:
+                free.append(rect)
+                continue
+            # Keep the maximal free rects left over on each side of the used one
+            if ux > fx:
+                free.append((fx, fy, ux - fx, fh))
+            if ux + uw < fx + fw:
+                free.append((ux + uw, fy, fx + fw - ux - uw, fh))
+            if uy > fy:
+                free.append((fx, fy, fw, uy - fy))
+            if uy + uh < fy + fh:
+                free.append((fx, uy + uh, fw, fy + fh - uy - uh))
+        self.free = [r for i, r in enumerate(free)
+                     if not any(_contains(o, r) and (o != r or j < i) for j, o in enumerate(free) if j != i)]
+
+def _contains(outer, inner):
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return ix >= ox and iy >= oy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+def next_pow2(n):
+    """Smallest power of two >= n"""
+    return 1 << max(0, n - 1).bit_length()
+
+def pack_atlas(assets_dir, max_size=ATLAS_MAX_SIZE, padding=ATLAS_PADDING, extrude=ATLAS_EXTRUDE):
+    """Pack every cached asset into power-of-two sheets plus a JSON frame map.
+    
+    Transparent borders are trimmed before packing; each frame records
+    where its pixels sit in the original canvas (spriteSourceSize) and the
+    canvas size (sourceSize). Files with identical contents share one
+    frame. Returns the number of sheets written, or None if the atlas was
+    already up to date.
+    """
+    entries = load_cache(assets_dir)
+    digests = {f: e["outputs"][f] for f, e in entries.items()}
+    key = hashlib.sha256(repr((sorted(digests.items()),
+                               max_size, padding, extrude, "trim")).encode()).hexdigest()
+    
+    index_path = os.path.join(assets_dir, ATLAS_INDEX)
+    try:
+        with open(index_path) as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+    if previous.get("meta", {}).get("key") == key:
+        return None
+    
+    # One packed frame per distinct image
+    by_digest = {}
+    for filename in sorted(entries):
+        by_digest.setdefault(digests[filename], []).append(filename)
+    sprites = []
+    for filenames in by_digest.values():
+        with Image.open(os.path.join(assets_dir, filenames[0])) as img:
+            img = img.convert('RGBA')
+        # Frames hold only the sprite's visible pixels; the offset is recorded
+        box = trim_box(img)
+        sprites.append((img.crop(box), filenames, box, img.size))
+    # Largest first packs tightest
+    sprites.sort(key=lambda s: (max(s[0].size), s[0].size[0] * s[0].size[1]), reverse=True)
+    
+    bins = []
+    placements = []
+    for img, filenames, box, source in sprites:
+        w, h = img.size[0] + 2 * extrude, img.size[1] + 2 * extrude
+        if w > max_size or h > max_size:
+            raise ValueError(f"{filenames[0]} ({img.size[0]}x{img.size[1]}) does not fit a {max_size}px atlas")
+        for sheet, packer in enumerate(bins):
+            pos = packer.insert(w + padding, h + padding)
+            if pos:
+                break
+        else:
+            # Padding only separates frames, so the sheet edge doesn't need it
+            packer = MaxRectsBin(max_size + padding, max_size + padding)
+            bins.append(packer)
+            sheet, pos = len(bins) - 1, packer.insert(w + padding, h + padding)
+        placements.append((img, filenames, box, source, sheet, pos))
+    
+    sheets = []
+    for i, packer in enumerate(bins):
+        size = (next_pow2(packer.extent[0] - padding), next_pow2(packer.extent[1] - padding))
+        sheets.append({"image": f"atlas_{i}.png", "size": {"w": size[0], "h": size[1]},
+                       "canvas": Image.new('RGBA', size, (0, 0, 0, 0))})
+    
+    frames = {}
+    for img, filenames, box, source, sheet, (x, y) in placements:
+        sheets[sheet]["canvas"].paste(extrude_sprite(img, extrude), (x, y))
+        frame = {"sheet": sheets[sheet]["image"],
+                 "frame": {"x": x + extrude, "y": y + extrude, "w": img.size[0], "h": img.size[1]},
+                 "trimmed": img.size != source,
+                 "spriteSourceSize": {"x": box[0], "y": box[1], "w": img.size[0], "h": img.size[1]},
+                 "sourceSize": {"w": source[0], "h": source[1]}}
+        for filename in filenames:
+            frames[filename] = frame
+    
+    for sheet in sheets:
+        with open(os.path.join(assets_dir, sheet["image"]), "wb") as f:
+            f.write(encode_png(sheet.pop("canvas")))
+        print(f"Packed: {sheet['image']} ({sheet['size']['w']}x{sheet['size']['h']})")
+    # Drop sheets left over from a larger previous atlas
+    for old in previous.get("meta", {}).get("sheets", []):
+        if old["image"] not in {s["image"] for s in sheets}:
+            old_path = os.path.join(assets_dir, old["image"])
+            if os.path.exists(old_path):
+                os.remove(old_path)
+    
+    with open(index_path, "w") as f:
+        json.dump({"frames": frames,
+                   "meta": {"key": key, "sheets": sheets, "padding": padding, "extrude": extrude}},
+                  f, indent=2, sort_keys=True)
+        f.write("\n")
+    return len(sheets)
+
+def surface_structure(pattern, size):
+    """Shade levels (-2..2) of a surface pattern's grooves and highlights, tileable at size"""
+    ys, xs = pixel_grid((size, size))
+    level = np.zeros((size, size), np.int8)
+    if pattern == "planks":
+        plank = size // 4
+        # Butt joints stagger from one plank row to the next
+        joint = (xs - ys // plank * (size * 3 // 8)) % size == 0
+        # Grain: broken streaks along the middle of each plank
+        grain = (ys % plank == plank // 2) & ((xs + ys // plank * 5) % (size // 2) < size // 3)
+        level[grain] = -1
+        level[ys % plank == 1] = 1
+        level[(ys % plank == 0) | joint] = -2
+    elif pattern in ("tiles", "panels"):
+        cell = size // 2
+        level[(xs % cell == 1) | (ys % cell == 1)] = 1
+        level[(xs % cell == 0) | (ys % cell == 0)] = -2
+        if pattern == "panels":
+            rivet = np.isin(xs % cell, (3, cell - 3)) & np.isin(ys % cell, (3, cell - 3))
+            level[rivet] = 2
+    elif pattern == "brick":
+        course, brick = size // 4, size // 2
+        offset = ys // course % 2 * (brick // 2)
+        level[ys % course == 1] = 1
+        level[(ys % course == 0) | ((xs + offset) % brick == 0)] = -2
+    elif pattern != "paint":
+        raise ValueError(f"unknown background pattern: {pattern}")
+    return level
+
+def edge_texture(structure, color, rng, accent=0.0):
+    """Shade levels and accent mask of the texture drawn beside a Wang edge of one color.
+    
+    Color 0 is plain speckle. Higher colors add a feature (a worn patch,
+    or a sprinkle of accent) centred on the edge midpoints, (size/2, 0)
+    and (0, size/2). Wherever two tiles share that edge they both draw
+    this texture there, so the feature carries on across the seam.
+    """
+    size = structure.shape[0]
+    level = structure.astype(np.int16)
+    flat = level == 0
+    level[noise_mask((size, size), size * size // 16, rng) & flat] = -1
+    level[noise_mask((size, size), size * size // 24, rng) & flat] = 1
+    accents = noise_mask((size, size), round(size * size * accent), rng) & flat
+    
+    if color:
+        gen = np.random.default_rng(rng.getrandbits(64))
+        ys, xs = pixel_grid((size, size))
+        for cy, cx in ((0, size // 2), (size // 2, 0)):
+            # Wrapped distance, so the half of the feature past the edge
+            # lands on the far side of the texture
+            dy = (ys - cy + size // 2) % size - size // 2
+            dx = (xs - cx + size // 2) % size - size // 2
+            radius = size / 6 * (0.75 + 0.5 * gen.random((size, size)))
+            blob = dx * dx + dy * dy <= radius * radius
+            if color % 2:
+                level[blob] += 1
+            else:
+                accents |= blob & (gen.random((size, size)) < 0.3) & (structure == 0)
+    return np.clip(level, -2, 2).astype(np.int8), accents
+
+def wang_tiles(textures):
+    """All K**4 edge-matched tiles from K edge textures.
+    
+    Tile (n, e, s, w) has index ((n * K + e) * K + s) * K + w. Each pixel
+    takes the texture of its nearest edge, so the tile splits into four
+    triangles that meet at its centre.
+    """
+    levels = np.stack([t[0] for t in textures])
+    accents = np.stack([t[1] for t in textures])
+    k, size = len(textures), levels.shape[1]
+    ys, xs = pixel_grid((size, size))
+    side = np.argmin(np.stack([ys, size - 1 - xs, size - 1 - ys, xs]), axis=0)
+    combos = np.array(np.unravel_index(np.arange(k ** 4), (k,) * 4)).T
+    texture = combos[:, side]
+    return levels[texture, ys, xs], accents[texture, ys, xs]
+
+def wang_surface(tiles, shape, rng):
+    """Lay edge-matched tiles over shape (h, w) with random edge colors.
+    
+    Each edge's color is drawn once and shared by the two tiles beside
+    it, so every seam matches without the layout ever repeating.
+    """
+    levels, accents = tiles
+    k = round(len(levels) ** 0.25)
+    size = levels.shape[1]
+    h, w = shape
+    rows, cols = -(-h // size), -(-w // size)
+    gen = np.random.default_rng(rng.getrandbits(64))
+    horizontal = gen.integers(0, k, (rows + 1, cols))
+    vertical = gen.integers(0, k, (rows, cols + 1))
+    index = ((horizontal[:-1] * k + vertical[:, 1:]) * k + horizontal[1:]) * k + vertical[:, :-1]
+    
+    def lay(stack):
+        grid = stack[index].transpose(0, 2, 1, 3).reshape(rows * size, cols * size)
+        return grid[:h, :w]
+    return lay(levels), lay(accents)
+
+def shade_surface(level, accents, color, accent):
+    """RGBA pixels for shade levels over a base color, with accent pixels mixed in"""
+    base = np.array(hex_to_rgb(color), float)
+    palette = np.clip(np.outer(BACKGROUND_SHADES, base), 0, 255)
+    rgb = palette[level + 2]
+    rgb[accents] += (np.array(hex_to_rgb(accent), float) - rgb[accents]) * BACKGROUND_ACCENT_MIX
+    alpha = np.full(level.shape + (1,), 255.0)
+    return np.concatenate([rgb, alpha], axis=2).round().astype(np.uint8)
+
+def theme_background(theme, settings, width, height, seed=DEFAULT_SEED):
+    """One theme's wall-over-floor room background at width x height screen pixels.
+    
+    Art is drawn at 1/pixel resolution and scaled up with nearest
+    neighbor, like the sprites' density variants.
+    """
+    size, pixel = settings.get("tile", TILE_SIZE), settings.get("pixel", 2)
+    k = settings.get("edge_colors", 2)
+    art_w, art_h = -(-width // pixel), -(-height // pixel)
+    wall_h = round(art_h * settings.get("floor_start", 0.7))
+    
+    layers = []
+    for surface, rows in (("wall", wall_h), ("floor", art_h - wall_h)):
+        style = theme[surface]
+        rng = random.Random(f"{seed}:background:{theme['name']}:{surface}")
+        structure = surface_structure(style["pattern"], size)
+        textures = [edge_texture(structure, c, rng, style.get("accent", 0.0)) for c in range(k)]
+        layout_rng = random.Random(f"{seed}:background:{theme['name']}:{surface}:{width}x{height}")
+        level, accents = wang_surface(wang_tiles(textures), (rows, art_w), layout_rng)
+        if surface == "floor":
+            # Skirting board where the wall meets the floor
+            level[:2] = -2
+        layers.append(shade_surface(level, accents, style["color"], theme["accent"]))
+    
+    art = np.concatenate(layers)
+    full = art.repeat(pixel, axis=0).repeat(pixel, axis=1)[:height, :width]
+    return Image.fromarray(full)
+
+def render_background(job):
+    """Render one theme at one room size and encode its chunks: [(chunk info, png bytes)].
+    
+    Runs in a pool worker, so only the settings go in and only the
+    encoded chunks come back.
+    """
+    name, theme, settings, width, height, seed = job
+    img = theme_background({**theme, "name": name}, settings, width, height, seed)
+    chunk = settings.get("chunk", 512)
+    chunks = []
+    for y in range(0, height, chunk):
+        for x in range(0, width, chunk):
+            w, h = min(chunk, width - x), min(chunk, height - y)
+            info = {"file": f"bg_{name}_{width}x{height}_{len(chunks)}.png", "x": x, "y": y, "w": w, "h": h}
+            chunks.append((info, encode_png(img.crop((x, y, x + w, y + h)))))
+    return chunks
+
+def write_backgrounds(spec, assets_dir, seed=DEFAULT_SEED, workers=None):
+    """Bake every theme's background at every room size into large PNG chunks.
+    
+    Each background is cut into tiles of at most chunk x chunk pixels, so
+    a room draws in a handful of images instead of hundreds of 32x32
+    tiles. backgrounds.json lists each chunk's file and position. Chunks
+    no longer built are removed. Returns the number of chunks written, or
+    None if the backgrounds were already up to date.
+    """
+    settings = spec["backgrounds"]
+    key = hashlib.sha256(repr((json.dumps(settings, sort_keys=True), seed,
+                               BACKGROUND_VERSION)).encode()).hexdigest()
+    index_path = os.path.join(assets_dir, BACKGROUND_INDEX)
+    try:
+        with open(index_path) as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+    old_files = {chunk["file"] for sizes in previous.get("themes", {}).values()
+                 for size in sizes.values() for chunk in size["chunks"]}
+    if previous.get("meta", {}).get("key") == key and \
+            all(os.path.exists(os.path.join(assets_dir, f)) for f in old_files):
+        return None
+    
+    jobs = [(name, theme, settings, width, height, seed)
+            for name, theme in sorted(settings["themes"].items()) for width, height in settings["sizes"]]
+    themes, written = {}, set()
+    for (name, _, _, width, height, _), chunks in zip(jobs, map_jobs(render_background, jobs, workers)):
+        for info, data in chunks:
+            path = os.path.join(assets_dir, info["file"])
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+            written.add(info["file"])
+        themes.setdefault(name, {})[f"{width}x{height}"] = {
+            "width": width, "height": height,
+            "floor_start": settings.get("floor_start", 0.7), "chunks": [info for info, _ in chunks],
+        }
+    for filename in old_files - written:
+        if os.path.exists(os.path.join(assets_dir, filename)):
+            os.remove(os.path.join(assets_dir, filename))
+    
+    write_manifest(assets_dir, BACKGROUND_INDEX, {
+        "themes": themes,
+        "meta": {"key": key, "tile": settings.get("tile", TILE_SIZE), "pixel": settings.get("pixel", 2),
+                 "edge_colors": settings.get("edge_colors", 2), "chunk": settings.get("chunk", 512)},
+    })
+    return len(written)
+
+def fingerprint_name(name, digest):
+    """sofa_v1.png -> sofa_v1.3f9a2c1d.png"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+def fingerprint_assets(assets_dir):
+    """Give every built file a content-hashed twin and index them in asset-manifest.json.
+    
+    Covers every cached output plus the atlas sheets and JSON manifests.
+    Twins are copies rather than hard links because the builder rewrites
+    outputs in place, which would change a linked twin's bytes under its
+    hash. Twins of contents no longer built are removed. Returns the
+    manifest's {name: {"file", "sha256"}} map.
+    """
+    digests = {}
+    for entry in load_cache(assets_dir).values():
+        digests.update(entry["outputs"])
+    extra = [DENSITY_MANIFEST, ANIMATION_MANIFEST, ATLAS_INDEX, HITMASK_INDEX, HITMASK_FILE, BACKGROUND_INDEX]
+    try:
+        with open(os.path.join(assets_dir, ATLAS_INDEX)) as f:
+            extra += [sheet["image"] for sheet in json.load(f)["meta"]["sheets"]]
+    except (OSError, ValueError, KeyError):
+        pass
+    try:
+        with open(os.path.join(assets_dir, BACKGROUND_INDEX)) as f:
+            extra += [chunk["file"] for sizes in json.load(f)["themes"].values()
+                      for size in sizes.values() for chunk in size["chunks"]]
+    except (OSError, ValueError, KeyError):
+        pass
+    for name in extra:
+        path = os.path.join(assets_dir, name)
+        if os.path.exists(path):
+            digests[name] = file_digest(path)
+    
+    assets = {}
+    for name, digest in sorted(digests.items()):
+        hashed = fingerprint_name(name, digest)
+        path = os.path.join(assets_dir, hashed)
+        if not os.path.exists(path):
+            shutil.copyfile(os.path.join(assets_dir, name), path)
+        assets[name] = {"file": hashed, "sha256": digest}
+    
+    current = {asset["file"] for asset in assets.values()}
+    for name in os.listdir(assets_dir):
+        if FINGERPRINT_RE.search(name) and name not in current:
+            os.remove(os.path.join(assets_dir, name))
+    write_manifest(assets_dir, ASSET_MANIFEST, {"version": 1, "assets": assets})
+    return assets
+
+def write_precache_manifest(spec, assets_dir, assets):
+    """Write the service worker's precache list, or return None if the spec has no precache section.
+    
+    App shell files keep their URLs and carry a content revision; assets
+    matching the spec's patterns are listed by fingerprinted URL and need
+    none. The service worker refetches only entries whose URL or revision
+    changed. Returns the number of entries.
+    """
+    precache = spec.get("precache")
+    if not precache:
+        return None
+    public_dir = precache["public_dir"]
+    prefix = os.path.relpath(assets_dir, public_dir).replace(os.sep, "/")
+    if prefix.startswith(".."):
+        print(f"Skipping {PRECACHE_MANIFEST}: {assets_dir} is outside {public_dir}")
+        return None
+    
+    entries = []
+    for url in precache.get("shell", []):
+        path = os.path.join(public_dir, url.lstrip("/") + ("index.html" if url.endswith("/") else ""))
+        if not os.path.exists(path):
+            raise ValueError(f"precache shell file not found: {path}")
+        entries.append({"url": url, "revision": file_digest(path)[:FINGERPRINT_LENGTH]})
+    entries.append({"url": f"/{prefix}/{ASSET_MANIFEST}",
+                    "revision": file_digest(os.path.join(assets_dir, ASSET_MANIFEST))[:FINGERPRINT_LENGTH]})
+    for name, asset in assets.items():
+        if any(fnmatch.fnmatch(name, pattern) for pattern in precache.get("assets", [])):
+            entries.append({"url": f"/{prefix}/{asset['file']}", "revision": None})
+    
+    data = ("// Generated by generate_assets.py - do not edit\n"
+            f"self.__PRECACHE_MANIFEST = {json.dumps(entries, indent=2)};\n")
+    write_if_changed(os.path.join(public_dir, PRECACHE_MANIFEST), data)
+    return len(entries)
 
 def main():
     """Generate all assets"""
-    assets_dir = "/home/zak/.openclaw/workspace/cozy-claw-studio/shared-house/public/assets/"
+    parser = argparse.ArgumentParser(description="Generate pixel art assets for Shared House")
+    parser.add_argument("--spec", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "asset-spec.json"),
+                        help="asset spec file (default: asset-spec.json next to this script)")
+    parser.add_argument("-o", "--out", help="output directory (default: the spec's output_dir)")
+    parser.add_argument("--only", action="append", metavar="PATTERN",
+                        help="only rebuild assets whose family, group or filename matches this glob (repeatable)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore the build cache and re-render everything")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                        help=f"build seed for procedural detail (default: {DEFAULT_SEED})")
+    parser.add_argument("--verify", action="store_true",
+                        help="re-render everything after the build and fail unless output is byte-identical")
+    parser.add_argument("--report", action="store_true",
+                        help="report each PNG's size saving over Pillow's default encoder")
+    parser.add_argument("--no-atlas", dest="atlas", action="store_false",
+                        help="skip packing the sprite atlas")
+    parser.add_argument("--atlas-size", type=int, default=ATLAS_MAX_SIZE,
+                        help=f"maximum atlas sheet size in pixels (default: {ATLAS_MAX_SIZE})")
+    parser.add_argument("--no-backgrounds", dest="backgrounds", action="store_false",
+                        help="skip baking the theme backgrounds")
+    args = parser.parse_args()
+    
+    spec = load_spec(args.spec)
+    assets_dir = args.out or spec["output_dir"]
     os.makedirs(assets_dir, exist_ok=True)
     
     print("🎨 Cozy Claw Studio - Art Asset Generator")
     print("=" * 50)
     
-    generated_files = []
-    
-    # 1. Floor tilesets (32x32)
-    print("\n📦 Generating Floor Tilesets...")
-    for v in range(1, 4):
-        generated_files.append(save_img(create_floor_wood(v), f"floor_wood_v{v}.png"))
-        generated_files.append(save_img(create_floor_carpet(v), f"floor_carpet_v{v}.png"))
-        generated_files.append(save_img(create_floor_tiles(v), f"floor_tiles_v{v}.png"))
-        generated_files.append(save_img(create_wall_brick(v), f"wall_brick_v{v}.png"))
-        generated_files.append(save_img(create_wall_paint(v), f"wall_paint_v{v}.png"))
-    
-    # Also create default versions
-    save_img(create_floor_wood(1), "floor_wood.png")
-    save_img(create_floor_carpet(1), "floor_carpet.png")
-    save_img(create_floor_tiles(1), "floor_tiles.png")
-    save_img(create_wall_brick(1), "wall_brick.png")
-    save_img(create_wall_paint(1), "wall_paint.png")
-    
-    # 2. Furniture sprites (64x64)
-    print("\n🛋️ Generating Furniture Sprites...")
-    for v in range(1, 4):
-        generated_files.append(save_img(create_sofa(v), f"sofa_v{v}.png"))
-        generated_files.append(save_img(create_sofa(v+1), f"sofa_fancy_v{v}.png"))
-        generated_files.append(save_img(create_plant(v, big=False), f"plant_v{v}.png"))
-        generated_files.append(save_img(create_plant(v+1, big=True), f"plant_big_v{v}.png"))
-        generated_files.append(save_img(create_tv(v), f"tv_v{v}.png"))
-        generated_files.append(save_img(create_bookshelf(v), f"bookshelf_v{v}.png"))
-        generated_files.append(save_img(create_table(v, dining=False), f"coffee_table_v{v}.png"))
-        generated_files.append(save_img(create_table(v, dining=True), f"dining_table_v{v}.png"))
-        generated_files.append(save_img(create_lamp(v), f"lamp_v{v}.png"))
-        generated_files.append(save_img(create_bed(v), f"bed_v{v}.png"))
-        generated_files.append(save_img(create_rug(v), f"rug_v{v}.png"))
-    
-    # Default versions
-    save_img(create_sofa(1), "sofa.png")
-    save_img(create_sofa(2), "sofa_fancy.png")
-    save_img(create_plant(1, False), "plant.png")
-    save_img(create_plant(2, True), "plant_big.png")
-    save_img(create_tv(1), "tv.png")
-    save_img(create_bookshelf(1), "bookshelf.png")
-    save_img(create_table(1, False), "coffee_table.png")
-    save_img(create_table(1, True), "dining_table.png")
-    save_img(create_lamp(1), "lamp.png")
-    save_img(create_bed(1), "bed.png")
-    save_img(create_rug(1), "rug.png")
-    
-    # 3. Character sprites (32x48, 4-direction sprite sheets)
-    print("\n👤 Generating Character Sprites...")
-    for v in range(1, 4):
-        generated_files.append(save_img(create_human_sprite(v), f"human_walk_v{v}.png"))
-        generated_files.append(save_img(create_lobster_agent(v), f"agent_lobster_v{v}.png"))
-        generated_files.append(save_img(create_robot_agent(v), f"agent_robot_v{v}.png"))
-    
-    # Default versions
-    save_img(create_human_sprite(1), "human_walk.png")
-    save_img(create_lobster_agent(1), "agent_lobster.png")
-    save_img(create_robot_agent(1), "agent_robot.png")
-    
-    # 4. UI Elements
-    print("\n🖱️ Generating UI Elements...")
-    for v in range(1, 4):
-        generated_files.append(save_img(create_button(v), f"button_v{v}.png"))
-        generated_files.append(save_img(create_panel(v), f"panel_v{v}.png"))
-        generated_files.append(save_img(create_coin_icon(v), f"coin_icon_v{v}.png"))
-        generated_files.append(save_img(create_heart_icon(v), f"heart_icon_v{v}.png"))
-    
-    # Default versions
-    save_img(create_button(1), "button.png")
-    save_img(create_panel(1), "panel.png")
-    save_img(create_coin_icon(1), "coin_icon.png")
-    save_img(create_heart_icon(1), "heart_icon.png")
+    try:
+        jobs, selected = plan_jobs(spec, args.only)
+    except ValueError as e:
+        sys.exit(str(e))
+    count = len(jobs) if selected is None else len(selected)
+    print(f"\n📦 Rendering {count} assets with {args.workers} workers...")
+    generated_files, skipped = run_jobs(jobs, assets_dir, workers=args.workers,
+                                        force=args.force, seed=args.seed, selected=selected,
+                                        report=args.report)
+    write_density_manifest(assets_dir, jobs)
+    write_animation_manifest(assets_dir, jobs)
+    
+    if args.atlas:
+        print("\n🗺️ Packing sprite atlas...")
+        sheets = pack_atlas(assets_dir, max_size=args.atlas_size)
+        print("Atlas up to date" if sheets is None else f"Packed {sheets} atlas sheet(s)")
+    
+    print("\n🎯 Packing hit masks...")
+    masks = write_hit_masks(assets_dir)
+    print("Hit masks up to date" if masks is None else f"Packed {masks} hit mask(s) into {HITMASK_FILE}")
+    
+    if args.backgrounds and spec.get("backgrounds"):
+        print("\n🧱 Baking theme backgrounds...")
+        try:
+            chunks = write_backgrounds(spec, assets_dir, seed=args.seed, workers=args.workers)
+        except ValueError as e:
+            sys.exit(str(e))
+        print("Backgrounds up to date" if chunks is None else f"Baked {chunks} background chunk(s)")
+    
+    print("\n🔖 Fingerprinting assets...")
+    assets = fingerprint_assets(assets_dir)
+    print(f"Indexed {len(assets)} files in {ASSET_MANIFEST}")
+    try:
+        count = write_precache_manifest(spec, assets_dir, assets)
+    except ValueError as e:
+        sys.exit(str(e))
+    if count is not None:
+        print(f"Listed {count} precache entries in {PRECACHE_MANIFEST}")
     
     print("\n" + "=" * 50)
-    print(f"✅ Generated {len(generated_files) + 22} total assets!")
+    print(f"✅ Generated {len(generated_files)} assets ({skipped} unchanged)!")
     print(f"📁 Assets saved to: {assets_dir}")
     
+    if args.verify:
+        print("\n🔁 Verifying reproducible output...")
+        mismatched = verify_jobs(jobs, assets_dir, workers=args.workers, seed=args.seed, selected=selected)
+        for filename in mismatched:
+            print(f"   ❌ {filename} differs from a fresh render")
+        if mismatched:
+            sys.exit(f"Verification failed: {len(mismatched)} asset(s) are not reproducible")
+        print(f"All {len(generated_files) + skipped} assets are byte-identical")
+    
     # List all files
     print("\n📋 Asset List:")
     for f in sorted(os.listdir(assets_dir)):
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - Sound Effect Generator
+Synthesizes the Shared House sound effects (the cues audio.js plays) with
+NumPy DSP: oscillators, envelopes, filtered noise and decaying modes.
+Silence is trimmed from each cue and all of them are packed into one audio
+sprite, sfx_sprite.wav, with a JSON manifest of each cue's offset and
+duration, so audio.js fetches and decodes a single file.
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 22050
+SPRITE_FILE = "sfx_sprite.wav"
+SPRITE_MANIFEST = "sfx_sprite.json"
+MANIFEST_VERSION = 1
+# Silence between cues, so resampling at playback never bleeds one into the next
+SPRITE_GAP = 0.05
+# Cues are trimmed where they fall below this level (relative to their peak)
+TRIM_DB = -50
+# Cues are leveled to this RMS loudness, as far as their peaks allow
+RMS_DB = -16
+PEAK_DB = -1
+FADE = 0.002
+
+DEFAULT_SEED = 0
+
+def timeline(duration):
+    """Sample times (seconds) for a buffer of this length"""
+    return np.arange(int(round(duration * SAMPLE_RATE))) / SAMPLE_RATE
+
+def envelope(t, attack, decay):
+    """Linear attack into an exponential decay (decay = time constant in seconds)"""
+    rise = np.clip(t / attack, 0, 1) if attack else 1.0
+    return rise * np.exp(-np.maximum(t - attack, 0) / decay)
+
+def sweep(t, start, end):
+    """Oscillator phase for an exponential pitch glide from start to end Hz"""
+    freq = start * (end / start) ** (t / max(t[-1], 1e-9))
+    return 2 * np.pi * np.cumsum(freq) / SAMPLE_RATE
+
+def bandlimit(x, low=None, high=None, order=2):
+    """Butterworth-shaped high/low-pass applied in the frequency domain (zero phase)"""
+    n = len(x)
+    size = 1 << int(np.ceil(np.log2(2 * n)))  # pad so the circular convolution doesn't wrap
+    spectrum = np.fft.rfft(x, size)
+    freq = np.fft.rfftfreq(size, 1 / SAMPLE_RATE)
+    gain = np.ones_like(freq)
+    if high:
+        gain /= np.sqrt(1 + (freq / high) ** (2 * order))
+    if low:
+        gain /= np.sqrt(1 + (low / np.maximum(freq, 1e-6)) ** (2 * order))
+    return np.fft.irfft(spectrum * gain, size)[:n]
+
+def modes(t, partials):
+    """Sum of exponentially decaying sinusoids [(freq, decay, amplitude)]: knocks, bells, thuds"""
+    freq, decay, amp = (np.array(column, dtype=float)[:, None] for column in zip(*partials))
+    return (amp * np.exp(-t / decay) * np.sin(2 * np.pi * freq * t)).sum(axis=0)
+
+def place(buffer, signal, at):
+    """Mix signal into buffer starting at `at` seconds"""
+    start = int(round(at * SAMPLE_RATE))
+    end = min(len(buffer), start + len(signal))
+    buffer[start:end] += signal[:end - start]
+    return buffer
+
+def sfx_coin_get(rng):
+    """Two-note chime, up a fourth"""
+    t = timeline(0.45)
+    out = np.zeros_like(t)
+    for at, freq in ((0.0, 988.0), (0.08, 1319.0)):
+        note = t[:len(t) - int(at * SAMPLE_RATE)]
+        tone = np.sin(2 * np.pi * freq * note) + 0.3 * np.sin(2 * np.pi * 3 * freq * note)
+        place(out, tone * envelope(note, 0.003, 0.09), at)
+    return out
+
+def sfx_chat_receive(rng):
+    """Soft rising bloop with a brighter echo"""
+    t = timeline(0.2)
+    out = np.sin(sweep(t, 600, 900)) * envelope(t, 0.005, 0.04)
+    echo = t[:len(t) - int(0.07 * SAMPLE_RATE)]
+    return place(out, 0.5 * np.sin(2 * np.pi * 1200 * echo) * envelope(echo, 0.004, 0.035), 0.07)
+
+def latch_click(rng, duration=0.02):
+    """Short bright click of a door latch"""
+    t = timeline(duration)
+    return bandlimit(rng.standard_normal(len(t)), low=2000, high=7000) * envelope(t, 0.0005, 0.003)
+
+def sfx_door_open(rng):
+    """Latch click, then a wobbling hinge creak"""
+    t = timeline(0.75)
+    wobble = 1 + 0.08 * np.sin(2 * np.pi * 7 * t) + 0.04 * bandlimit(rng.standard_normal(len(t)), high=20) * 20
+    phase = 2 * np.pi * np.cumsum(260 * wobble) / SAMPLE_RATE
+    saw = 2 * ((phase / (2 * np.pi)) % 1) - 1
+    creak = bandlimit(saw, low=350, high=2200) * np.clip(t / 0.15, 0, 1) * np.exp(-np.maximum(t - 0.45, 0) / 0.08)
+    out = 0.6 * creak
+    return place(out, latch_click(rng), 0.0)
+
+def sfx_door_close(rng):
+    """Low wooden thud with the latch catching just after"""
+    t = timeline(0.4)
+    thud = np.sin(sweep(t, 95, 55)) * envelope(t, 0.002, 0.07)
+    knock = modes(t, [(180, 0.03, 0.5), (410, 0.02, 0.3), (930, 0.012, 0.15)])
+    body = bandlimit(rng.standard_normal(len(t)), low=80, high=900) * envelope(t, 0.001, 0.02)
+    out = thud + knock + 0.4 * body
+    return place(out, 0.5 * latch_click(rng), 0.05)
+
+def sfx_cooking_sizzle(rng):
+    """Hissing band of noise with random fat crackles"""
+    t = timeline(1.0)
+    hiss = bandlimit(rng.standard_normal(len(t)), low=2500, high=9000)
+    swell = 0.7 + 0.3 * bandlimit(rng.standard_normal(len(t)), high=6) * 30
+    pops = np.zeros_like(t)
+    pops[rng.choice(len(t), 60, replace=False)] = rng.uniform(-1, 1, 60) * 6
+    kernel = envelope(timeline(0.006), 0.0002, 0.0015)
+    crackle = bandlimit(np.convolve(pops, kernel)[:len(t)], low=800)
+    fade = np.clip(t / 0.05, 0, 1) * np.clip((t[-1] - t) / 0.1, 0, 1)
+    return (0.35 * hiss * np.clip(swell, 0, None) + crackle) * fade
+
+def sfx_step_wood(rng):
+    """Heel knock on floorboards"""
+    t = timeline(0.12)
+    knock = modes(t, [(170, 0.025, 0.6), (430, 0.015, 0.4), (980, 0.008, 0.2)])
+    scuff = bandlimit(rng.standard_normal(len(t)), low=500, high=3000) * envelope(t, 0.0005, 0.006)
+    return knock + 0.3 * scuff
+
+def sfx_step_carpet(rng):
+    """Muffled footfall"""
+    t = timeline(0.13)
+    return bandlimit(rng.standard_normal(len(t)), low=60, high=550) * envelope(t, 0.01, 0.03)
+
+def sfx_furniture_place(rng):
+    """Soft thump of something heavy set down, with a wooden ring"""
+    t = timeline(0.35)
+    thump = np.sin(sweep(t, 120, 70)) * envelope(t, 0.003, 0.06)
+    ring = modes(t, [(260, 0.06, 0.35), (610, 0.04, 0.2), (1150, 0.02, 0.08)])
+    dust = bandlimit(rng.standard_normal(len(t)), low=200, high=1500) * envelope(t, 0.001, 0.015)
+    return thump + ring + 0.3 * dust
+
+def sfx_success(rng):
+    """Bell arpeggio up a major chord"""
+    t = timeline(0.8)
+    out = np.zeros_like(t)
+    for i, freq in enumerate((523.25, 659.25, 783.99, 1046.5)):
+        note = t[:len(t) - int(i * 0.07 * SAMPLE_RATE)]
+        place(out, modes(note, [(freq, 0.25, 1.0), (2 * freq, 0.1, 0.3), (3.01 * freq, 0.05, 0.1)]), i * 0.07)
+    return out
+
+def sfx_error(rng):
+    """Two descending muted buzzes"""
+    t = timeline(0.4)
+    out = np.zeros_like(t)
+    for at, freq in ((0.0, 220.0), (0.16, 185.0)):
+        note = timeline(0.13)
+        buzz = bandlimit(np.sign(np.sin(2 * np.pi * freq * note)), high=1400)
+        place(out, buzz * np.clip(note / 0.005, 0, 1) * np.clip((note[-1] - note) / 0.02, 0, 1), at)
+    return out
+
+SFX = {name[len("sfx_"):]: fn for name, fn in globals().items() if name.startswith("sfx_")}
+DSP_HELPERS = (timeline, envelope, sweep, bandlimit, modes, place, latch_click)
+
+def cue_rng(seed, name):
+    """RNG for one cue, derived from the build seed and its name (stable across runs)"""
+    return np.random.default_rng(int.from_bytes(hashlib.sha256(f"{seed}:{name}".encode()).digest()[:8], "big"))
+
+def trim_silence(x, threshold_db=TRIM_DB):
+    """Cut leading/trailing samples below threshold_db of the peak, with short fades at the cuts"""
+    level = np.abs(x)
+    loud = np.flatnonzero(level > level.max() * 10 ** (threshold_db / 20))
+    if not len(loud):
+        return x[:0]
+    x = x[loud[0]:loud[-1] + 1].copy()
+    fade = min(len(x) // 2, int(FADE * SAMPLE_RATE))
+    if fade:
+        ramp = np.linspace(0, 1, fade)
+        if loud[0]:
+            x[:fade] *= ramp
+        x[-fade:] *= ramp[::-1]
+    return x
+
+def normalize(x, rms_db=RMS_DB, peak_db=PEAK_DB):
+    """Scale to rms_db loudness, or less if that would push the peak past peak_db"""
+    peak = np.abs(x).max()
+    if not peak:
+        return x
+    rms = np.sqrt(np.mean(x ** 2))
+    return x * min(10 ** (rms_db / 20) / rms, 10 ** (peak_db / 20) / peak)
+
+def render_cue(name, seed=DEFAULT_SEED):
+    """One cue as trimmed, leveled float samples"""
+    return normalize(trim_silence(SFX[name](cue_rng(seed, name))))
+
+def to_pcm16(x):
+    return (np.clip(x, -1, 1) * 32767).round().astype("<i2").tobytes()
+
+def write_wav(path, samples):
+    """Write mono 16-bit PCM"""
+    tmp = path + ".tmp"
+    with wave.open(tmp, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(to_pcm16(samples))
+    os.replace(tmp, path)
+
+def pack_sprite(cues):
+    """(samples, {name: {offset, duration}}) with the cues laid end to end, SPRITE_GAP apart"""
+    gap = np.zeros(int(SPRITE_GAP * SAMPLE_RATE))
+    parts, sprites, position = [], {}, 0
+    for name, samples in cues.items():
+        sprites[name] = {"offset": round(position / SAMPLE_RATE, 6), "duration": round(len(samples) / SAMPLE_RATE, 6),
+                         "start": position, "length": len(samples)}
+        parts += [samples, gap]
+        position += len(samples) + len(gap)
+    return np.concatenate(parts) if parts else gap, sprites
+
+def build_key(names, seed):
+    """Hash everything that determines the sprite's bytes"""
+    h = hashlib.sha256(f"v{MANIFEST_VERSION}:{SAMPLE_RATE}:{SPRITE_GAP}:{TRIM_DB}:{RMS_DB}:{PEAK_DB}:{seed}".encode())
+    for fn in DSP_HELPERS + (trim_silence, normalize, pack_sprite) + tuple(SFX[name] for name in names):
+        h.update(inspect.getsource(fn).encode())
+    h.update(repr(names).encode())
+    return h.hexdigest()
+
+def is_fresh(out_dir, key):
+    """True if the sprite on disk was built from key and is untouched"""
+    try:
+        with open(os.path.join(out_dir, SPRITE_MANIFEST)) as f:
+            manifest = json.load(f)
+        with open(os.path.join(out_dir, manifest["file"]), "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+    except (OSError, ValueError, KeyError):
+        return False
+    return manifest.get("key") == key and manifest.get("sha256") == digest
+
+def build(out_dir, names=None, seed=DEFAULT_SEED, force=False, write_cues=False):
+    """Render, trim and pack the cues; returns the manifest, or None if it was already up to date"""
+    names = sorted(names or SFX)
+    key = build_key(names, seed)
+    if not force and not write_cues and is_fresh(out_dir, key):
+        return None
+    cues = {name: render_cue(name, seed) for name in names}
+    samples, sprites = pack_sprite(cues)
+    path = os.path.join(out_dir, SPRITE_FILE)
+    write_wav(path, samples)
+    if write_cues:
+        for name, cue in cues.items():
+            write_wav(os.path.join(out_dir, f"{name}.wav"), cue)
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    manifest = {"version": MANIFEST_VERSION, "file": SPRITE_FILE, "sampleRate": SAMPLE_RATE,
+                "key": key, "sha256": digest, "sprites": sprites}
+    tmp = os.path.join(out_dir, SPRITE_MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, os.path.join(out_dir, SPRITE_MANIFEST))
+    return manifest
+
+def main():
+    """Generate the sound effect sprite"""
+    parser = argparse.ArgumentParser(description="Synthesize Shared House sound effects into one audio sprite")
+    parser.add_argument("-o", "--out", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           "shared-house", "public", "audio"),
+                        help="output directory (default: shared-house/public/audio)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                        help=f"build seed for noise and crackle (default: {DEFAULT_SEED})")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the sprite is up to date")
+    parser.add_argument("--write-cues", action="store_true",
+                        help="also write each cue as its own <cue>.wav (replaces the existing files)")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+
+    print("🔊 Cozy Claw Studio - Sound Effect Generator")
+    print("=" * 50)
+    manifest = build(args.out, seed=args.seed, force=args.force, write_cues=args.write_cues)
+    if manifest is None:
+        print("Sprite up to date")
+        return
+    for name, sprite in manifest["sprites"].items():
+        print(f"   🎵 {name}: {sprite['duration'] * 1000:.0f} ms at {sprite['offset']:.3f}s")
+    size = os.path.getsize(os.path.join(args.out, SPRITE_FILE))
+    print("\n" + "=" * 50)
+    print(f"✅ Packed {len(manifest['sprites'])} cues into {SPRITE_FILE} ({size} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - Async HTTP Client
+A minimal keep-alive HTTP/1.1 client on asyncio streams, shared by the load
+tester (load_test.py) and the bridge delivery worker (bridge_worker.py).
+JSON bodies go out as JSON and JSON responses come back parsed; chunked
+responses are reassembled.
+"""
+
+import asyncio
+import json
+
+class HttpConnection:
+    """One keep-alive HTTP/1.1 connection; requests on it are serialized"""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+        self.lock = asyncio.Lock()
+        self.headers = {}  # of the last response
+
+    async def request(self, method, path, body=None, headers=None):
+        """(status, parsed JSON or raw bytes); reconnects once if the server closed the connection"""
+        data = json.dumps(body).encode() if body is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nConnection: keep-alive\r\n"
+                f"Content-Length: {len(data)}\r\n")
+        if body is not None:
+            head += "Content-Type: application/json\r\n"
+        head += "".join(f"{key}: {value}\r\n" for key, value in (headers or {}).items())
+        async with self.lock:
+            for attempt in range(2):
+                fresh = self.writer is None
+                if fresh:
+                    self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+                try:
+                    self.writer.write(head.encode() + b"\r\n" + data)
+                    await self.writer.drain()
+                    return await self.read_response()
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    self.close()
+                    if fresh or attempt:
+                        raise
+
+    async def read_response(self):
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                parts.append(chunk[:-2])
+            payload = b"".join(parts)
+        else:
+            payload = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        self.headers = headers
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        if "json" in headers.get("content-type", ""):
+            return status, json.loads(payload or b"null")
+        return status, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
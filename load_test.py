@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - Load Test
+Simulates many homes against a running (or freshly started) shared-house
+server.js: each client holds a Socket.IO connection and sends the chat
+messages of a session recorded in inbox.jsonl with its original pacing,
+polls /api/clawbot/responses like companion.js, and places and moves decor
+through /api/decor/place and /api/decor/move. Latency per endpoint and
+event goes into fixed-bucket histograms, and the run is written as a JSON
+report that `compare` can diff against an earlier one.
+
+Uses only asyncio streams: keep-alive HTTP/1.1 and a minimal WebSocket
+client speaking Engine.IO v4 / Socket.IO v5.
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from urllib.parse import quote, urlparse
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import os
+import random
+import resource
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from compact_logs import message_time
+from http_client import HttpConnection
+from message_log import HOUSE_DIR, parse_line
+
+DEFAULT_URL = "http://127.0.0.1:3000"
+DEFAULT_INBOX = os.path.join(HOUSE_DIR, "inbox.jsonl")
+DEFAULT_CLIENTS = 100
+DEFAULT_DURATION = 60.0
+# companion.js polls for bridge responses every 500ms
+DEFAULT_POLL_INTERVAL = 0.5
+# Mean seconds between one client's decor edits
+DEFAULT_DECOR_INTERVAL = 10.0
+# Recorded gaps between chat messages are capped at this many seconds
+MAX_CHAT_GAP = 30.0
+REQUEST_TIMEOUT = 30.0
+GRID = (20, 15)
+# Fixed 1-2-5 bucket upper bounds (ms), so histograms from different runs line up
+HISTOGRAM_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+PERCENTILES = (50, 95, 99)
+# compare flags a p95/p99 this much slower than the baseline
+REGRESSION_THRESHOLD = 0.10
+
+class Recorder:
+    """Latency samples and error counts per endpoint/event name"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.received = Counter()
+
+    def record(self, name, start):
+        self.samples[name].append((time.perf_counter() - start) * 1000)
+
+    def error(self, name, reason):
+        self.errors[name][reason] += 1
+
+    def report(self, elapsed):
+        """Per-name count, errors, throughput, percentiles and histogram"""
+        endpoints = {}
+        for name in sorted(set(self.samples) | set(self.errors)):
+            samples = sorted(self.samples[name])
+            entry = {"count": len(samples), "errors": sum(self.errors[name].values()),
+                     "error_kinds": dict(self.errors[name]),
+                     "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0}
+            if samples:
+                entry.update({f"p{p}_ms": round(percentile(samples, p), 3) for p in PERCENTILES})
+                entry["mean_ms"] = round(sum(samples) / len(samples), 3)
+                entry["max_ms"] = round(samples[-1], 3)
+                entry["histogram"] = histogram(samples)
+            endpoints[name] = entry
+        return endpoints
+
+def percentile(samples, p):
+    """Nearest-rank percentile of sorted samples"""
+    rank = max(1, -(-len(samples) * p // 100))
+    return samples[int(rank) - 1]
+
+def histogram(samples):
+    """{"<=bound": count} over HISTOGRAM_BOUNDS plus an overflow bucket"""
+    buckets = dict.fromkeys([f"<={b}" for b in HISTOGRAM_BOUNDS] + [f">{HISTOGRAM_BOUNDS[-1]}"], 0)
+    names = iter(buckets)
+    bounds = iter(HISTOGRAM_BOUNDS)
+    name, bound = next(names), next(bounds)
+    for ms in samples:  # sorted, so buckets only move forward
+        while bound is not None and ms > bound:
+            name, bound = next(names), next(bounds, None)
+        buckets[name] += 1
+    return buckets
+
+class SocketIOClient:
+    """Socket.IO v5 over a raw Engine.IO v4 WebSocket transport"""
+
+    def __init__(self, host, port, recorder):
+        self.host, self.port = host, port
+        self.recorder = recorder
+        self.sid = None
+        self.waiters = defaultdict(list)
+        self.reader = self.writer = self.task = None
+        self.connected = asyncio.Event()
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((f"GET /socket.io/?EIO=4&transport=websocket HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                           f"Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                           f"Sec-WebSocket-Version: 13\r\n\r\n").encode())
+        await self.writer.drain()
+        status = (await self.reader.readuntil(b"\r\n\r\n")).split(b"\r\n", 1)[0]
+        if b" 101 " not in status:
+            raise ConnectionError(f"WebSocket upgrade refused: {status.decode()}")
+        self.task = asyncio.create_task(self.read_loop())
+        await asyncio.wait_for(self.connected.wait(), REQUEST_TIMEOUT)
+
+    def send(self, text):
+        """Write one masked text frame"""
+        payload = text.encode()
+        mask = os.urandom(4)
+        n = len(payload)
+        if n < 126:
+            head = struct.pack("!BB", 0x81, 0x80 | n)
+        elif n < 1 << 16:
+            head = struct.pack("!BBH", 0x81, 0x80 | 126, n)
+        else:
+            head = struct.pack("!BBQ", 0x81, 0x80 | 127, n)
+        masked = bytes(b ^ mask[i & 3] for i, b in enumerate(payload))
+        self.writer.write(head + mask + masked)
+
+    async def read_frame(self):
+        """(opcode, payload) of the next complete (reassembled) message"""
+        parts, opcode = [], None
+        while True:
+            b0, b1 = await self.reader.readexactly(2)
+            n = b1 & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", await self.reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+            payload = await self.reader.readexactly(n)
+            if b0 & 0x0F:
+                opcode = b0 & 0x0F
+            parts.append(payload)
+            if b0 & 0x80:
+                return opcode, b"".join(parts)
+
+    async def read_loop(self):
+        try:
+            while True:
+                opcode, payload = await self.read_frame()
+                if opcode == 8:
+                    break
+                if opcode == 9:
+                    self.writer.write(struct.pack("!BB", 0x8A, 0x80) + os.urandom(4))
+                    continue
+                if opcode != 1:
+                    continue
+                self.on_packet(payload.decode())
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for futures in self.waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(ConnectionError("socket closed"))
+
+    def on_packet(self, packet):
+        if packet.startswith("0"):        # Engine.IO open -> join the default namespace
+            self.send("40")
+        elif packet == "2":               # Engine.IO ping
+            self.send("3")
+        elif packet.startswith("40"):     # namespace connected
+            self.sid = json.loads(packet[2:] or "{}").get("sid")
+            self.connected.set()
+        elif packet.startswith("42"):     # event
+            event, *args = json.loads(packet[2:])
+            self.recorder.received[event] += 1
+            for future in self.waiters.pop(event, []):
+                if not future.done():
+                    future.set_result(args[0] if args else None)
+
+    def emit(self, event, data):
+        self.send("42" + json.dumps([event, data]))
+
+    async def wait_for(self, *events, timeout=REQUEST_TIMEOUT):
+        """(event, data) of the first of these events to arrive"""
+        futures = {}
+        for event in events:
+            future = asyncio.get_running_loop().create_future()
+            self.waiters[event].append(future)
+            futures[future] = event
+        try:
+            done, _ = await asyncio.wait(futures, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise asyncio.TimeoutError()
+            future = done.pop()
+            return futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def close(self):
+        if self.writer is not None:
+            try:
+                self.send("41")
+                self.writer.write(struct.pack("!BB", 0x88, 0x80) + os.urandom(4))
+                self.writer.close()
+            except (ConnectionError, RuntimeError):
+                pass
+        if self.task:
+            self.task.cancel()
+
+def load_sessions(path):
+    """Chat scripts from a recorded inbox: per session, [(seconds since previous message, content)]"""
+    sessions = defaultdict(list)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            for raw in f:
+                msg = parse_line(raw)
+                if msg and isinstance(msg.get("content"), str):
+                    sessions[msg.get("sessionId") or "default"].append((message_time(msg), msg["content"]))
+    scripts = []
+    for messages in sessions.values():
+        script, previous = [], None
+        for when, content in messages:
+            gap = (when - previous).total_seconds() if when and previous else MAX_CHAT_GAP / 2
+            script.append((min(max(gap, 0.0), MAX_CHAT_GAP), content))
+            previous = when or previous
+        scripts.append(script)
+    return scripts or [[(MAX_CHAT_GAP / 2, "hello"), (MAX_CHAT_GAP / 2, "how are you?")]]
+
+async def timed(recorder, name, http, method, path, body=None):
+    """One recorded request; returns the response body, or None if it failed"""
+    start = time.perf_counter()
+    try:
+        status, data = await asyncio.wait_for(http.request(method, path, body), REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        recorder.error(name, "timeout")
+        return None
+    except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+        recorder.error(name, type(e).__name__)
+        return None
+    if status >= 400:
+        recorder.error(name, f"http {status}")
+        return None
+    recorder.record(name, start)
+    return data
+
+async def chat_loop(client, script, args, recorder, stop_at):
+    """Send a recorded session's messages with its pacing; latency is until message:queued"""
+    for gap, content in itertools.cycle(script):
+        await asyncio.sleep(gap / args.speedup)
+        if time.monotonic() >= stop_at:
+            return
+        start = time.perf_counter()
+        client.emit("user:message", {"message": content, "clientInfo": {"userAgent": "load_test.py",
+                                                                       "timestamp": int(time.time() * 1000)}})
+        try:
+            event, _ = await client.wait_for("message:queued", "message:error")
+        except asyncio.TimeoutError:
+            recorder.error("socket user:message", "timeout")
+            continue
+        except ConnectionError:
+            recorder.error("socket user:message", "disconnected")
+            return
+        if event == "message:error":
+            recorder.error("socket user:message", "message:error")
+        else:
+            recorder.record("socket user:message", start)
+
+async def poll_loop(client, http, args, recorder, stop_at):
+    """GET /api/clawbot/responses every poll interval, like companion.js"""
+    since = datetime(1970, 1, 1, tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
+    await asyncio.sleep(random.uniform(0, args.poll_interval))
+    while time.monotonic() < stop_at:
+        data = await timed(recorder, "GET /api/clawbot/responses", http, "GET",
+                           f"/api/clawbot/responses?sessionId=web:{client.sid}&since={quote(since)}")
+        for response in (data or {}).get("responses") or []:
+            since = max(since, response.get("timestamp") or since)
+        await asyncio.sleep(args.poll_interval)
+
+async def decor_loop(http, catalog, args, recorder, stop_at, placed):
+    """Place new items and move this client's own ones around the room grid"""
+    while True:
+        await asyncio.sleep(random.expovariate(1 / args.decor_interval))
+        if time.monotonic() >= stop_at:
+            return
+        x, y = random.randrange(GRID[0]), random.randrange(GRID[1])
+        if placed and random.random() < 0.7:
+            await timed(recorder, "POST /api/decor/move", http, "POST", "/api/decor/move",
+                        {"placementId": random.choice(placed), "x": x, "y": y})
+        elif catalog:
+            result = await timed(recorder, "POST /api/decor/place", http, "POST", "/api/decor/place",
+                                 {"itemId": random.choice(catalog), "x": x, "y": y, "themeId": args.theme})
+            if isinstance(result, dict) and result.get("id"):
+                placed.append(result["id"])
+
+async def run_client(n, host, port, scripts, catalog, args, recorder, stop_at, placed):
+    """One simulated home for the rest of the run"""
+    client = SocketIOClient(host, port, recorder)
+    start = time.perf_counter()
+    try:
+        await client.connect()
+    except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+        recorder.error("socket connect", type(e).__name__)
+        return
+    recorder.record("socket connect", start)
+    client.emit("client:register", {"clientId": f"load-test-{n}"})
+    # A browser tab keeps several connections; polling and decor edits get one each
+    poll_http, decor_http = HttpConnection(host, port), HttpConnection(host, port)
+    try:
+        await asyncio.gather(chat_loop(client, scripts[n % len(scripts)], args, recorder, stop_at),
+                             poll_loop(client, poll_http, args, recorder, stop_at),
+                             decor_loop(decor_http, catalog, args, recorder, stop_at, placed))
+    finally:
+        poll_http.close()
+        decor_http.close()
+        await client.close()
+
+async def run_load(args):
+    """Ramp up the clients, run for the duration, clean up; returns the report"""
+    url = urlparse(args.url)
+    host, port = url.hostname, url.port or 80
+    scripts = load_sessions(args.inbox)
+    recorder = Recorder()
+    setup = HttpConnection(host, port)
+    catalog = await timed(recorder, "GET /api/decor/catalog", setup, "GET", "/api/decor/catalog")
+    if catalog is None:
+        raise ConnectionError(f"Can't load the decor catalog from {args.url}")
+    catalog = [item["id"] for item in catalog if item.get("unlocked", True)] or [item["id"] for item in catalog]
+
+    placed = []
+    started = datetime.now(timezone.utc)
+    begin = time.monotonic()
+    stop_at = begin + args.ramp + args.duration
+    tasks = []
+    for n in range(args.clients):
+        tasks.append(asyncio.create_task(run_client(n, host, port, scripts, catalog, args, recorder, stop_at, placed)))
+        if args.ramp:
+            await asyncio.sleep(args.ramp / args.clients)
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - begin
+
+    if not args.keep:
+        for placement_id in placed:
+            await timed(recorder, "DELETE /api/decor/place/:id", setup, "DELETE", f"/api/decor/place/{placement_id}")
+    setup.close()
+    return {
+        "run": {"started": started.isoformat(), "url": args.url, "clients": args.clients,
+                "duration_s": args.duration, "ramp_s": args.ramp, "elapsed_s": round(elapsed, 3),
+                "poll_interval_s": args.poll_interval, "decor_interval_s": args.decor_interval,
+                "speedup": args.speedup, "sessions_replayed": len(scripts)},
+        "endpoints": recorder.report(elapsed),
+        "events_received": dict(recorder.received),
+    }
+
+def raise_fd_limit(clients):
+    """Each client needs three sockets; lift the soft open-files limit as far as allowed"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = clients * 3 + 64
+    if soft < wanted:
+        target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        if target < wanted:
+            print(f"⚠️  Open-file limit {target} is too low for {clients} clients", file=sys.stderr)
+
+def start_server(port):
+    """Start shared-house/server.js on a scratch database; returns the process once it answers"""
+    db_dir = tempfile.mkdtemp(prefix="load-test-")
+    env = dict(os.environ, PORT=str(port), DB_PATH=os.path.join(db_dir, "agent_memory.db"))
+    log = open(os.path.join(db_dir, "server.log"), "w")
+    proc = subprocess.Popen(["node", "server.js"], cwd=HOUSE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"server.js exited with {proc.returncode}; see {log.name}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/decor/catalog", timeout=1).read()
+            print(f"🏠 Started server.js on port {port} (database and log in {db_dir})")
+            return proc
+        except OSError:
+            time.sleep(0.25)
+    proc.kill()
+    sys.exit(f"server.js didn't come up on port {port}; see {log.name}")
+
+def print_report(report):
+    print(f"\n{'endpoint / event':<34}{'count':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for name, e in report["endpoints"].items():
+        cols = [e.get(f"p{p}_ms") for p in PERCENTILES] + [e.get("max_ms")]
+        print(f"{name:<34}{e['count']:>8}{e['errors']:>6}{e['throughput_rps']:>9.1f}"
+              + "".join(f"{c:>9.1f}" if c is not None else f"{'-':>9}" for c in cols))
+    if report.get("events_received"):
+        print("\nevents received: " + ", ".join(f"{k} {v}" for k, v in sorted(report["events_received"].items())))
+
+def compare_reports(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Print per-endpoint changes between two reports; returns the names that regressed"""
+    regressed = []
+    print(f"{'endpoint / event':<34}{'p50':>18}{'p95':>18}{'p99':>18}{'rps':>16}")
+    for name in sorted(set(baseline["endpoints"]) | set(current["endpoints"])):
+        old, new = baseline["endpoints"].get(name, {}), current["endpoints"].get(name, {})
+        cells, worse = [], False
+        for p in PERCENTILES:
+            a, b = old.get(f"p{p}_ms"), new.get(f"p{p}_ms")
+            if a is None or b is None:
+                cells.append(f"{'-':>18}")
+                continue
+            change = (b - a) / a if a else 0.0
+            worse |= p != 50 and change > threshold
+            cells.append(f"{a:>7.1f}->{b:<7.1f}{change:+.0%}".rjust(18))
+        rps = f"{old.get('throughput_rps', 0):.1f}->{new.get('throughput_rps', 0):.1f}"
+        errors = new.get("errors", 0) - old.get("errors", 0)
+        worse |= errors > 0
+        print(f"{name:<34}{''.join(cells)}{rps:>16}" + (f"  +{errors} errors" if errors > 0 else "")
+              + ("  ⚠️" if worse else ""))
+        if worse:
+            regressed.append(name)
+    return regressed
+
+def main():
+    """Load test the Shared House server"""
+    parser = argparse.ArgumentParser(description="Load test the Shared House Socket.IO and REST surface")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="simulate clients and write a report")
+    run.add_argument("--url", default=DEFAULT_URL, help=f"server to test (default: {DEFAULT_URL})")
+    run.add_argument("--start", action="store_true",
+                     help="start server.js on the --url port with a scratch database first "
+                          "(chat messages still go to shared-house/inbox.jsonl)")
+    run.add_argument("-c", "--clients", type=int, default=DEFAULT_CLIENTS,
+                     help=f"simulated homes (default: {DEFAULT_CLIENTS})")
+    run.add_argument("-d", "--duration", type=float, default=DEFAULT_DURATION,
+                     help=f"seconds at full load (default: {DEFAULT_DURATION})")
+    run.add_argument("--ramp", type=float, default=10.0, help="seconds to connect all clients over (default: 10)")
+    run.add_argument("--inbox", default=DEFAULT_INBOX, help="recorded inbox to replay chat sessions from")
+    run.add_argument("--speedup", type=float, default=1.0, help="divide recorded chat gaps by this (default: 1)")
+    run.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                     help=f"seconds between response polls (default: {DEFAULT_POLL_INTERVAL})")
+    run.add_argument("--decor-interval", type=float, default=DEFAULT_DECOR_INTERVAL,
+                     help=f"mean seconds between decor edits per client (default: {DEFAULT_DECOR_INTERVAL})")
+    run.add_argument("--theme", default="default", help="theme to place decor in (default: default)")
+    run.add_argument("--keep", action="store_true", help="leave the placed decor instead of removing it")
+    run.add_argument("-o", "--out", help="report path (default: load-test-<timestamp>.json)")
+
+    compare = sub.add_parser("compare", help="diff two reports")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                         help=f"p95/p99 slowdown that counts as a regression (default: {REGRESSION_THRESHOLD})")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressed = compare_reports(baseline, current, args.threshold)
+        sys.exit(1 if regressed else 0)
+
+    raise_fd_limit(args.clients)
+    server = start_server(urlparse(args.url).port or 80) if args.start else None
+    try:
+        print(f"🚦 {args.clients} clients against {args.url} for {args.duration:g}s (+{args.ramp:g}s ramp)")
+        report = asyncio.run(run_load(args))
+    except ConnectionError as e:
+        sys.exit(str(e))
+    finally:
+        if server:
+            server.send_signal(signal.SIGINT)
+            try:
+                server.wait(10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    print_report(report)
+    out = args.out or f"load-test-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Report written to {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - Memory Search Service
+Full-text recall over the agent's `memories` table (agent/memory.js) using an
+SQLite FTS5 index that triggers keep in sync with every insert, update and
+delete. Matches are ranked by BM25 blended with the same importance, recency
+and access-count boosts AgentMemory.query applies, and served over a small
+local HTTP API the Node server can call.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.environ.get("DB_PATH", os.path.join(ROOT, "shared-house", "memory", "agent_memory.db"))
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 3091
+DEFAULT_LIMIT = 5
+# BM25 shortlist size per result; boosts only re-rank within it
+CANDIDATES_PER_RESULT = 20
+MIN_CANDIDATES = 100
+# Terms in more than this share of memories are dropped when rarer ones remain
+COMMON_TERM_SHARE = 0.5
+MAX_TERMS = 8
+# Counting a term's documents walks its whole doclist, so counts are cached for a while
+DF_CACHE_SECONDS = 300
+DF_CACHE_SIZE = 10000
+
+# (database file, term) -> ((FTS5 query term, estimated matches), time counted), least recent first
+_df_cache = OrderedDict()
+_df_lock = threading.Lock()
+# Weight of the (negated) BM25 score against the importance/recency/access boosts
+TEXT_WEIGHT = 10.0
+# AgentMemory.query drops anything scoring at or below this
+MIN_SCORE = 5
+
+# External-content FTS5 table over memories.content, kept current by triggers.
+# Access-count bumps don't touch content, so they don't touch the index.
+INDEX_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+    content, content='memories', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts_vocab USING fts5vocab(memories_fts, 'row');
+CREATE TRIGGER IF NOT EXISTS memories_fts_insert AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts (rowid, content) VALUES (new.rowid, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_fts_delete AFTER DELETE ON memories BEGIN
+    INSERT INTO memories_fts (memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_fts_update AFTER UPDATE OF content ON memories BEGIN
+    INSERT INTO memories_fts (memories_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+    INSERT INTO memories_fts (rowid, content) VALUES (new.rowid, new.content);
+END;
+"""
+
+def ensure_index(conn, rebuild=False):
+    """Create the FTS index and its triggers; returns True if it had to be (re)built"""
+    existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'memories_fts'").fetchone() is not None
+    conn.executescript(INDEX_SCHEMA)
+    if not existed or rebuild:
+        with conn:
+            conn.execute("INSERT INTO memories_fts (memories_fts) VALUES ('rebuild')")
+        return True
+    return False
+
+def fold(word):
+    """Lowercase a word and strip its diacritics, as the index's remove_diacritics 2 does"""
+    return "".join(c for c in unicodedata.normalize("NFKD", word.lower()) if not unicodedata.combining(c))
+
+def term_frequency(conn, term):
+    """(FTS5 query term, estimated matches) for one query word.
+
+    Whole words match exactly; anything that isn't a word in the index yet
+    matches as a prefix, like AgentMemory's substring test. Prefix queries
+    merge every expansion's doclist, so they're kept for when they're needed.
+    """
+    now = time.monotonic()
+    key = (conn.execute("PRAGMA database_list").fetchone()[2], term)
+    with _df_lock:
+        cached = _df_cache.get(key)
+        if cached is not None:
+            _df_cache.move_to_end(key)
+    if cached is None or now - cached[1] > DF_CACHE_SECONDS:
+        exact = conn.execute("SELECT doc FROM memories_fts_vocab WHERE term = ?", (term,)).fetchone()
+        if exact:
+            found = (f'"{term}"', exact[0])
+        else:
+            found = (f'"{term}"*', conn.execute("SELECT COALESCE(SUM(doc), 0) FROM memories_fts_vocab "
+                                                "WHERE term >= ? AND term < ?", (term, term + "\U0010ffff")).fetchone()[0])
+        cached = (found, now)
+        with _df_lock:
+            _df_cache[key] = cached
+            _df_cache.move_to_end(key)
+            while len(_df_cache) > DF_CACHE_SIZE:
+                _df_cache.popitem(last=False)
+    return cached[0]
+
+def match_terms(conn, text):
+    """FTS5 query terms worth matching, rarest first.
+
+    Terms found in most memories barely move BM25 but make every query scan
+    them, so they're dropped as long as a rarer term is left.
+    """
+    words = list(dict.fromkeys(fold(w) for w in re.findall(r"\w+", text)))
+    terms = sorted((found for found in (term_frequency(conn, w) for w in words) if found[1]),
+                   key=lambda found: found[1])[:MAX_TERMS]
+    if not terms:
+        return []
+    # MAX(rowid) is an O(log n) stand-in for the number of memories
+    total = conn.execute("SELECT MAX(rowid) FROM memories").fetchone()[0] or 0
+    kept = [t for t in terms if t[1] <= total * COMMON_TERM_SHARE] or terms[:1]
+    return [query for query, _ in kept]
+
+def recency_boost(created_at, now):
+    """Up to +5 for new memories, fading by 0.5 a day (as in AgentMemory.query)"""
+    try:
+        created = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return 0.0
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    days = (now - created).total_seconds() / 86400
+    return max(0.0, 5 - days * 0.5)
+
+def search(conn, text, limit=DEFAULT_LIMIT, now=None):
+    """Top memories for a query, each with its relevanceScore"""
+    terms = match_terms(conn, text)
+    if not terms:
+        return []
+    now = now or datetime.now(timezone.utc)
+    shortlist = max(MIN_CANDIDATES, limit * CANDIDATES_PER_RESULT)
+    rows = conn.execute("""
+        SELECT m.*, f.text_score FROM (
+            SELECT rowid, -bm25(memories_fts) AS text_score FROM memories_fts
+            WHERE memories_fts MATCH ? ORDER BY rank LIMIT ?
+        ) f JOIN memories m ON m.rowid = f.rowid""", (" OR ".join(terms), shortlist)).fetchall()
+
+    results = []
+    for row in rows:
+        memory = dict(row)
+        score = TEXT_WEIGHT * memory.pop("text_score")
+        score += memory["importance"] or 0
+        score += recency_boost(memory["created_at"], now)
+        score += min(5, (memory["access_count"] or 0) * 0.5)
+        if score > MIN_SCORE:
+            memory["relevanceScore"] = round(score, 4)
+            results.append(memory)
+    results.sort(key=lambda m: m["relevanceScore"], reverse=True)
+    return results[:limit]
+
+def connect(db_path):
+    """A connection returning rows as sqlite3.Row"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA busy_timeout = 5000")
+    return conn
+
+class SearchHandler(BaseHTTPRequestHandler):
+    """GET /search?q=...&limit=N, POST /search {"query", "limit"}, GET /health"""
+
+    server_version = "MemorySearch/1.0"
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def conn(self):
+        """One connection per handler thread"""
+        local = self.server.local
+        if not hasattr(local, "conn"):
+            local.conn = connect(self.server.db_path)
+        return local.conn
+
+    def respond(self, text, limit):
+        start = time.perf_counter()
+        try:
+            results = search(self.conn(), text or "", limit)
+        except sqlite3.Error as e:
+            self.send_json(500, {"error": str(e)})
+            return
+        self.send_json(200, {"results": results, "took_ms": round((time.perf_counter() - start) * 1000, 3)})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self.send_json(200, {"ok": True})
+        elif url.path == "/search":
+            params = parse_qs(url.query)
+            try:
+                limit = int(params.get("limit", [DEFAULT_LIMIT])[0])
+            except ValueError:
+                self.send_json(400, {"error": "limit must be an integer"})
+                return
+            self.respond(params.get("q", [""])[0], limit)
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/search":
+            self.send_json(404, {"error": "not found"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            limit = int(body.get("limit", DEFAULT_LIMIT))
+        except (ValueError, AttributeError):
+            self.send_json(400, {"error": "expected a JSON body like {\"query\": \"...\", \"limit\": 5}"})
+            return
+        self.respond(body.get("query"), limit)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(db_path, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Run the HTTP service until interrupted"""
+    server = ThreadingHTTPServer((host, port), SearchHandler)
+    server.db_path = db_path
+    server.local = threading.local()
+    print(f"🔎 Memory search listening on http://{host}:{port}/search")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main():
+    """Search the agent's memories"""
+    parser = argparse.ArgumentParser(description="Full-text search service for the agent's memories")
+    parser.add_argument("--db", default=DEFAULT_DB, help="agent memory database (default: $DB_PATH or shared-house/memory/agent_memory.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("serve", help="serve GET/POST /search over HTTP")
+    run.add_argument("--host", default=DEFAULT_HOST, help=f"bind address (default: {DEFAULT_HOST})")
+    run.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+
+    query = sub.add_parser("query", help="print the best matches for a query")
+    query.add_argument("text")
+    query.add_argument("-n", "--limit", type=int, default=DEFAULT_LIMIT)
+
+    sub.add_parser("rebuild", help="rebuild the full-text index from scratch")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        sys.exit(f"Database not found: {args.db}")
+    conn = connect(args.db)
+    try:
+        if ensure_index(conn, rebuild=args.command == "rebuild"):
+            count = conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+            print(f"🧠 Indexed {count} memories", file=sys.stderr)
+    except sqlite3.OperationalError as e:
+        sys.exit(f"Can't index memories: {e}")
+
+    if args.command == "query":
+        for memory in search(conn, args.text, args.limit):
+            print(json.dumps(memory, ensure_ascii=False))
+    elif args.command == "serve":
+        conn.close()
+        serve(args.db, args.host, args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - Message Log Reader
+Indexed access to the append-only JSONL message logs: shared-house/inbox.jsonl,
+outbox.jsonl and the per-session memory/message-queue/outgoing/<sessionId>.jsonl
+files written by bridge/message-queue.js.
+
+Every log gets rows in a small SQLite index (byte offset, length, id and
+timestamp per line) plus named consumer cursors, so a poll seeks straight to
+the new bytes instead of rescanning the file, and ids are deduplicated
+through the index instead of a growing "seen" file.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sqlite3
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+HOUSE_DIR = os.path.join(ROOT, "shared-house")
+INDEX_NAME = ".jsonl-index.db"
+DEFAULT_POLL_INTERVAL = 1.0
+# Files at least this big are replayed through mmap instead of buffered reads
+MMAP_THRESHOLD = 1 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    inode INTEGER,
+    size INTEGER DEFAULT 0,       -- bytes indexed so far (always at a line boundary)
+    lines INTEGER DEFAULT 0,
+    generation INTEGER DEFAULT 0  -- bumped whenever the file is replaced or truncated
+);
+CREATE TABLE IF NOT EXISTS lines (
+    log_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    msg_id TEXT,
+    timestamp TEXT,
+    duplicate BOOLEAN DEFAULT 0,
+    PRIMARY KEY (log_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_lines_msg ON lines(log_id, msg_id);
+CREATE INDEX IF NOT EXISTS idx_lines_time ON lines(log_id, timestamp);
+CREATE TABLE IF NOT EXISTS cursors (
+    log_id INTEGER NOT NULL,
+    consumer TEXT NOT NULL,
+    seq INTEGER DEFAULT 0,
+    msg_id TEXT,
+    timestamp TEXT,
+    generation INTEGER DEFAULT 0,
+    PRIMARY KEY (log_id, consumer)
+);
+"""
+
+def parse_line(raw):
+    """Decode one JSONL line; None for blank or corrupt lines"""
+    try:
+        msg = json.loads(raw)
+    except ValueError:
+        return None
+    return msg if isinstance(msg, dict) else None
+
+def open_index(path):
+    """Open (creating if needed) a log index database"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+class MessageLog:
+    """One append-only JSONL log and its persistent line index"""
+
+    def __init__(self, path, index_path=None):
+        self.path = os.path.abspath(path)
+        self.index_path = index_path or os.path.join(os.path.dirname(self.path), INDEX_NAME)
+        self.db = open_index(self.index_path)
+        row = self.db.execute("SELECT id FROM logs WHERE path = ?", (self.path,)).fetchone()
+        if row is None:
+            with self.db:
+                row = (self.db.execute("INSERT INTO logs (path) VALUES (?)", (self.path,)).lastrowid,)
+        self.log_id = row[0]
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _state(self):
+        return self.db.execute("SELECT inode, size, lines, generation FROM logs WHERE id = ?",
+                               (self.log_id,)).fetchone()
+
+    def refresh(self):
+        """Index lines appended since the last call; returns how many were added.
+
+        Only the bytes past the indexed size are read. A replaced or truncated
+        file (compaction, rotation) is reindexed from the start.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return 0
+        inode, size, count, generation = self._state()
+        if inode != st.st_ino or st.st_size < size:
+            with self.db:
+                self.db.execute("DELETE FROM lines WHERE log_id = ?", (self.log_id,))
+                self.db.execute("UPDATE logs SET inode = ?, size = 0, lines = 0, generation = generation + 1 "
+                                "WHERE id = ?", (st.st_ino, self.log_id))
+            size, count = 0, 0
+        if st.st_size == size:
+            return 0
+
+        with open(self.path, "rb") as f:
+            f.seek(size)
+            data = f.read(st.st_size - size)
+        # A writer may be mid-line; leave the partial tail for the next refresh
+        end = data.rfind(b"\n") + 1
+        rows = []
+        pos = 0
+        seen = {}
+        while pos < end:
+            nl = data.index(b"\n", pos)
+            msg = parse_line(data[pos:nl])
+            if msg is not None:
+                msg_id = msg.get("id")
+                msg_id = None if msg_id is None else str(msg_id)
+                duplicate = False
+                if msg_id is not None:
+                    duplicate = msg_id in seen or self.db.execute(
+                        "SELECT 1 FROM lines WHERE log_id = ? AND msg_id = ? LIMIT 1",
+                        (self.log_id, msg_id)).fetchone() is not None
+                    seen[msg_id] = True
+                count += 1
+                rows.append((self.log_id, count, size + pos, nl - pos, msg_id, msg.get("timestamp"), duplicate))
+            pos = nl + 1
+
+        with self.db:
+            self.db.executemany("INSERT INTO lines (log_id, seq, offset, length, msg_id, timestamp, duplicate) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.execute("UPDATE logs SET size = ?, lines = ? WHERE id = ?", (size + end, count, self.log_id))
+        return len(rows)
+
+    def _read(self, rows):
+        """Messages for index rows (offset, length, ...), read with one seek over their span"""
+        if not rows:
+            return []
+        start = rows[0][0]
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = f.read(rows[-1][0] + rows[-1][1] - start)
+        return [parse_line(data[offset - start:offset - start + length]) for offset, length, *_ in rows]
+
+    def get(self, msg_id):
+        """The first message with this id, or None"""
+        self.refresh()
+        row = self.db.execute("SELECT offset, length FROM lines WHERE log_id = ? AND msg_id = ? ORDER BY seq LIMIT 1",
+                              (self.log_id, str(msg_id))).fetchone()
+        return self._read([row])[0] if row else None
+
+    def _cursor_seq(self, consumer):
+        """Where a consumer left off, re-anchored by id/timestamp if the log was rewritten since"""
+        row = self.db.execute("SELECT seq, msg_id, timestamp, generation FROM cursors WHERE log_id = ? AND consumer = ?",
+                              (self.log_id, consumer)).fetchone()
+        if row is None:
+            return 0
+        seq, msg_id, timestamp, generation = row
+        if generation == self._state()[3]:
+            return seq
+        if msg_id is not None:
+            found = self.db.execute("SELECT seq FROM lines WHERE log_id = ? AND msg_id = ? ORDER BY seq LIMIT 1",
+                                    (self.log_id, msg_id)).fetchone()
+            if found:
+                return found[0]
+        if timestamp is not None:
+            found = self.db.execute("SELECT MAX(seq) FROM lines WHERE log_id = ? AND timestamp <= ?",
+                                    (self.log_id, timestamp)).fetchone()
+            return found[0] or 0
+        return 0
+
+    def pending(self, consumer, limit=None, after=None):
+        """(seq, message) pairs past the consumer's cursor (or past seq `after`), skipping repeated ids"""
+        self.refresh()
+        seq = self._cursor_seq(consumer) if after is None else after
+        rows = self.db.execute("SELECT offset, length, seq, msg_id, timestamp FROM lines "
+                               "WHERE log_id = ? AND seq > ? AND NOT duplicate ORDER BY seq LIMIT ?",
+                               (self.log_id, seq, -1 if limit is None else limit)).fetchall()
+        return list(zip((row[2] for row in rows), self._read(rows)))
+
+    def tail(self, consumer, limit=None, commit=True):
+        """New messages since the consumer's cursor, skipping repeated ids.
+
+        With commit, the cursor advances past what was returned; otherwise
+        call commit() once the messages have been handled.
+        """
+        pending = self.pending(consumer, limit)
+        if commit and pending:
+            self.commit(consumer, pending[-1][0])
+        return [msg for _, msg in pending]
+
+    def commit(self, consumer, seq=None):
+        """Move a consumer's cursor to seq (default: the end of the log)"""
+        if seq is None:
+            seq = self._state()[2]
+        row = self.db.execute("SELECT msg_id, timestamp FROM lines WHERE log_id = ? AND seq = ?",
+                              (self.log_id, seq)).fetchone() or (None, None)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO cursors (log_id, consumer, seq, msg_id, timestamp, generation) "
+                            "VALUES (?, ?, ?, ?, ?, ?)", (self.log_id, consumer, seq, *row, self._state()[3]))
+
+    def replay(self, since=None, dedupe=True):
+        """Every message in file order (optionally only newer than an ISO timestamp)"""
+        self.refresh()
+        size = self._state()[1]
+        if size == 0:
+            return
+        start = 0
+        if since is not None:
+            row = self.db.execute("SELECT MIN(offset) FROM lines WHERE log_id = ? AND timestamp > ?",
+                                  (self.log_id, since)).fetchone()
+            if row[0] is None:
+                return
+            start = row[0]
+        seen = set()
+        with open(self.path, "rb") as f:
+            if size >= MMAP_THRESHOLD:
+                data = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+            else:
+                data = f.read(size)
+            try:
+                pos = start
+                while pos < size:
+                    nl = data.find(b"\n", pos)
+                    msg = parse_line(data[pos:nl])
+                    pos = nl + 1
+                    if msg is None or (since is not None and (msg.get("timestamp") or "") <= since):
+                        continue
+                    if dedupe and msg.get("id") is not None:
+                        if msg["id"] in seen:
+                            continue
+                        seen.add(msg["id"])
+                    yield msg
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+
+    def stats(self):
+        """Indexed size, line counts and consumer positions"""
+        self.refresh()
+        inode, size, count, generation = self._state()
+        duplicates = self.db.execute("SELECT COUNT(*) FROM lines WHERE log_id = ? AND duplicate",
+                                     (self.log_id,)).fetchone()[0]
+        cursors = dict(self.db.execute("SELECT consumer, seq FROM cursors WHERE log_id = ?", (self.log_id,)))
+        return {"path": self.path, "bytes": size, "lines": count, "duplicates": duplicates,
+                "generation": generation, "cursors": cursors}
+
+def queue_logs(house_dir=HOUSE_DIR):
+    """The message logs a Shared House install writes"""
+    paths = [os.path.join(house_dir, name) for name in ("inbox.jsonl", "outbox.jsonl")]
+    outgoing = os.path.join(house_dir, "memory", "message-queue", "outgoing")
+    if os.path.isdir(outgoing):
+        paths += sorted(os.path.join(outgoing, f) for f in os.listdir(outgoing) if f.endswith(".jsonl"))
+    return [p for p in paths if os.path.exists(p)]
+
+def print_messages(messages):
+    for msg in messages:
+        print(json.dumps(msg, ensure_ascii=False))
+    sys.stdout.flush()
+
+def main():
+    """Read Shared House message logs"""
+    parser = argparse.ArgumentParser(description="Indexed reader for the Shared House JSONL message logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    tail = sub.add_parser("tail", help="print messages new since a consumer's last read")
+    tail.add_argument("log", help="JSONL log file")
+    tail.add_argument("-c", "--consumer", default="cli", help="cursor name (default: cli)")
+    tail.add_argument("-n", "--limit", type=int, help="at most this many messages")
+    tail.add_argument("-f", "--follow", action="store_true", help="keep polling for new messages")
+    tail.add_argument("--interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                      help=f"seconds between polls with --follow (default: {DEFAULT_POLL_INTERVAL})")
+
+    get = sub.add_parser("get", help="print the message with an id")
+    get.add_argument("log")
+    get.add_argument("id")
+
+    replay = sub.add_parser("replay", help="print every message in the log")
+    replay.add_argument("log")
+    replay.add_argument("--since", help="only messages with a timestamp after this ISO time")
+    replay.add_argument("--all", dest="dedupe", action="store_false", help="keep repeated ids")
+
+    stats = sub.add_parser("stats", help="index stats for logs (default: all Shared House logs)")
+    stats.add_argument("logs", nargs="*")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        for path in args.logs or queue_logs():
+            with MessageLog(path) as log:
+                print(json.dumps(log.stats()))
+        return
+
+    if not os.path.exists(args.log):
+        sys.exit(f"Log not found: {args.log}")
+    with MessageLog(args.log) as log:
+        if args.command == "get":
+            msg = log.get(args.id)
+            if msg is None:
+                sys.exit(f"No message with id {args.id}")
+            print_messages([msg])
+        elif args.command == "replay":
+            print_messages(log.replay(since=args.since, dedupe=args.dedupe))
+        else:
+            print_messages(log.tail(args.consumer, args.limit))
+            while args.follow:
+                time.sleep(args.interval)
+                print_messages(log.tail(args.consumer, args.limit))
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
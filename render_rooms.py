@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - Room Snapshot Renderer
+Composites the generate_assets.py sprites into PNG thumbnails of every
+room stored in the server's SQLite database (room_items/room_layers and
+the legacy decor_placements), so houses can be previewed without a browser.
+Only rooms whose rows changed since the last run are re-rendered.
+"""
+
+from PIL import Image, ImageDraw, ImageOps
+from functools import lru_cache, partial
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+
+import generate_assets as ga
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.environ.get("DB_PATH", os.path.join(ROOT, "shared-house", "memory", "agent_memory.db"))
+DEFAULT_OUT = os.path.join(ROOT, "shared-house", "public", "thumbnails")
+SNAPSHOT_STATE = ".snapshot-state.json"
+# Bump when the compositing changes, so every thumbnail is redrawn once
+RENDER_VERSION = 1
+
+# Room grid (matches public/room-renderer.js) and the pixel size of one cell
+GRID_WIDTH = 20
+GRID_HEIGHT = 15
+CELL_SIZE = 32
+FLOOR_START = 0.7  # floor covers the bottom 30% of the room
+DEFAULT_THUMB_WIDTH = 320
+SPRITE_CACHE_SIZE = 256
+
+DEFAULT_FLOOR = ("wood", "#3d3d5c")
+DEFAULT_WALL = ("paint", "#3a3a55")
+
+# Floor/wall types that have a generated tile; anything else is a flat color
+FLOOR_TILES = {"wood": "floor_wood.png", "carpet": "floor_carpet.png", "tile": "floor_tiles.png"}
+WALL_TILES = {"brick": "wall_brick.png"}
+
+# Catalog keys and decor_items subcategories -> generated sprite
+SPRITES = {
+    "sofa": "sofa.png", "armchair": "sofa_fancy.png", "bean_bag": "sofa_fancy.png",
+    "coffee_table": "coffee_table.png", "desk": "coffee_table.png", "dining": "dining_table.png",
+    "dining_table": "dining_table.png", "bookshelf": "bookshelf.png", "cabinet": "bookshelf.png",
+    "plant": "plant.png", "plant_monstera": "plant_big.png", "plant_big": "plant_big.png",
+    "lamp": "lamp.png", "bed": "bed.png", "rug": "rug.png", "tv": "tv.png",
+}
+
+@lru_cache(maxsize=SPRITE_CACHE_SIZE)
+def load_sprite(assets_dir, filename):
+    """Decode a sprite once per process, trimmed to its opaque pixels"""
+    path = os.path.join(assets_dir, filename)
+    if not os.path.exists(path):
+        return None
+    with Image.open(path) as img:
+        img = img.convert("RGBA")
+    bbox = img.getbbox()
+    return img.crop(bbox) if bbox else None
+
+@lru_cache(maxsize=SPRITE_CACHE_SIZE)
+def placed_sprite(assets_dir, filename, size, rotation=0, flipped=False):
+    """A sprite scaled to a footprint of size (w, h) pixels.
+    
+    Sprites fill the footprint's width and may stand up to twice its height,
+    the way furniture rises above its floor cells.
+    """
+    sprite = load_sprite(assets_dir, filename)
+    if sprite is None:
+        return None
+    if flipped:
+        sprite = ImageOps.mirror(sprite)
+    if rotation % 360:
+        sprite = sprite.rotate(-rotation, expand=True)
+    fit = min(size[0] / sprite.width, 2 * size[1] / sprite.height)
+    return sprite.resize((max(1, round(sprite.width * fit)), max(1, round(sprite.height * fit))), Image.NEAREST)
+
+def sprite_candidates(item):
+    """Sprite files that could stand in for an item, best first"""
+    names = []
+    for key in (item["key"], item.get("subcategory")):
+        if key in SPRITES:
+            stem = os.path.splitext(SPRITES[key])[0]
+            if item.get("color"):
+                names.append(f"{stem}_{item['color'].lstrip('#').lower()}.png")
+            names.append(SPRITES[key])
+    return names
+
+def fill_tiled(img, box, tile):
+    """Repeat a tile over box"""
+    x0, y0, x1, y1 = box
+    for y in range(y0, y1, tile.height):
+        for x in range(x0, x1, tile.width):
+            img.alpha_composite(tile.crop((0, 0, min(tile.width, x1 - x), min(tile.height, y1 - y))), (x, y))
+
+def draw_surface(img, draw, box, surface, tiles, assets_dir):
+    """Paint a floor or wall: flat color, then its tile pattern if there is one"""
+    kind, color = surface
+    draw.rectangle([box[0], box[1], box[2] - 1, box[3] - 1], fill=ga.hex_to_rgb(color or "#000000") + (255,))
+    tile = tiles.get(kind) and load_sprite(assets_dir, tiles[kind])
+    if tile is not None:
+        fill_tiled(img, box, tile)
+
+def render_room(room, assets_dir, width=DEFAULT_THUMB_WIDTH):
+    """Composite one room into an RGBA image `width` pixels wide"""
+    w, h = GRID_WIDTH * CELL_SIZE, GRID_HEIGHT * CELL_SIZE
+    img = Image.new("RGBA", (w, h), (0, 0, 0, 255))
+    draw = ImageDraw.Draw(img)
+    floor_y = round(h * FLOOR_START)
+    draw_surface(img, draw, (0, 0, w, floor_y), room["wall"], WALL_TILES, assets_dir)
+    draw_surface(img, draw, (0, floor_y, w, h), room["floor"], FLOOR_TILES, assets_dir)
+
+    # Items arrive sorted by layer, z-index, then y/x, so later ones draw on top
+    for item in room["items"]:
+        scale = item.get("scale") or 1.0
+        size = (round(item["width"] * CELL_SIZE * scale), round(item["height"] * CELL_SIZE * scale))
+        x, y = round(item["x"] * CELL_SIZE), round(item["y"] * CELL_SIZE)
+        sprite = None
+        for name in sprite_candidates(item):
+            sprite = placed_sprite(assets_dir, name, size, item.get("rotation") or 0, bool(item.get("flipped")))
+            if sprite is not None:
+                break
+        if sprite is None:
+            # No generated art for this item yet: draw its footprint in its catalog color
+            color = ga.hex_to_rgb(item.get("color") or "#808080")
+            draw.rounded_rectangle([x + 1, y + 1, x + size[0] - 2, y + size[1] - 2], radius=4,
+                                   fill=color + (255,), outline=(0, 0, 0, 96))
+            continue
+        img.alpha_composite(sprite, (x + (size[0] - sprite.width) // 2, y + size[1] - sprite.height))
+
+    if width != w:
+        img = img.resize((width, round(h * width / w)), Image.LANCZOS)
+    return img
+
+def table_exists(conn, name):
+    """Whether the database has this table (the server creates them lazily)"""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+def item_row(row):
+    """Normalize a joined placement row into the item dict render_room expects"""
+    return {
+        "id": row["id"], "key": row["item_key"], "subcategory": row["subcategory"],
+        "x": row["x"], "y": row["y"], "width": row["width"] or 1, "height": row["height"] or 1,
+        "rotation": row["rotation"], "scale": row["scale"], "flipped": row["flipped"], "color": row["color"],
+    }
+
+def load_rooms(db_path):
+    """Read every room from the database: {room key: room dict}"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    rooms = {}
+    try:
+        has_catalog = table_exists(conn, "decor_items")
+        # Footprint and color come from the decor catalog, when the server has created it
+        if has_catalog:
+            catalog = "d.subcategory, d.width, d.height, d.color FROM room_items i LEFT JOIN decor_items d ON i.item_key = d.id"
+        else:
+            catalog = "NULL AS subcategory, NULL AS width, NULL AS height, NULL AS color FROM room_items i"
+
+        if table_exists(conn, "room_items") or table_exists(conn, "room_layers"):
+            if table_exists(conn, "room_layers"):
+                for row in conn.execute("SELECT * FROM room_layers"):
+                    rooms[f"room_{row['room_id']}"] = {
+                        "floor": (row["floor_type"], row["floor_color"]),
+                        "wall": (row["wall_type"], row["wall_color"]),
+                        "items": [],
+                    }
+            hidden = set()
+            if table_exists(conn, "layer_visibility"):
+                hidden = {(r["room_id"], r["layer"]) for r in
+                          conn.execute("SELECT room_id, layer FROM layer_visibility WHERE visible = 0")}
+            if table_exists(conn, "room_items"):
+                rows = conn.execute(f"""
+                    SELECT i.id, i.room_id, i.item_key, i.x, i.y, i.rotation, i.scale, i.layer, 0 AS flipped,
+                           {catalog}
+                    WHERE i.visible = 1
+                    ORDER BY i.room_id, i.layer, i.z_index, i.y, i.x""")
+                for row in rows:
+                    if (row["room_id"], row["layer"]) in hidden:
+                        continue
+                    room = rooms.setdefault(f"room_{row['room_id']}",
+                                            {"floor": DEFAULT_FLOOR, "wall": DEFAULT_WALL, "items": []})
+                    room["items"].append(item_row(row))
+
+        if table_exists(conn, "decor_placements") and has_catalog:
+            themes = {}
+            if table_exists(conn, "decor_themes"):
+                themes = {r["id"]: r for r in conn.execute("SELECT * FROM decor_themes")}
+            rows = conn.execute("""
+                SELECT p.id, p.theme_id, p.item_id AS item_key, p.x, p.y, p.rotation, p.scale, p.flipped,
+                       d.subcategory, d.width, d.height, d.color
+                FROM decor_placements p JOIN decor_items d ON p.item_id = d.id
+                ORDER BY p.theme_id, d.layer, p.y, p.x""")
+            for row in rows:
+                theme = themes.get(row["theme_id"])
+                room = rooms.setdefault(f"decor_{row['theme_id']}", {
+                    "floor": (DEFAULT_FLOOR[0], theme["floor_color"] if theme else DEFAULT_FLOOR[1]),
+                    "wall": (DEFAULT_WALL[0], theme["wall_color"] if theme else DEFAULT_WALL[1]),
+                    "items": [],
+                })
+                room["items"].append(item_row(row))
+    finally:
+        conn.close()
+    return rooms
+
+def thumbnail_name(key):
+    """Filesystem-safe thumbnail filename for a room key"""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", key) + ".png"
+
+def assets_fingerprint(assets_dir):
+    """Changes whenever generate_assets.py rewrites any sprite"""
+    path = os.path.join(assets_dir, ga.CACHE_MANIFEST)
+    if not os.path.exists(path):
+        return None
+    return ga.file_digest(path)
+
+def room_signature(room, fingerprint, width):
+    """Hash of everything a room's thumbnail depends on"""
+    data = json.dumps([RENDER_VERSION, fingerprint, width, room], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+def render_snapshot(job, assets_dir, out_dir, width):
+    """Render and write one room thumbnail (process pool worker)"""
+    key, room = job
+    data = ga.encode_png(render_room(room, assets_dir, width))
+    path = os.path.join(out_dir, thumbnail_name(key))
+    with open(path, "wb") as f:
+        f.write(data)
+    return key, len(data)
+
+def load_state(out_dir):
+    """Signatures of the thumbnails written by the last run"""
+    path = os.path.join(out_dir, SNAPSHOT_STATE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_state(out_dir, state):
+    """Atomically replace the snapshot state file"""
+    path = os.path.join(out_dir, SNAPSHOT_STATE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def render_rooms(rooms, assets_dir, out_dir, workers=None, width=DEFAULT_THUMB_WIDTH, force=False, selected=None):
+    """Render rooms whose rows changed since the last run; returns (rendered, unchanged, removed).
+    
+    With selected, only those room keys are considered; the rest keep their
+    thumbnails and state untouched.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    state = load_state(out_dir)
+    fingerprint = assets_fingerprint(assets_dir)
+    keys = sorted(rooms) if selected is None else sorted(selected)
+    signatures = {key: room_signature(rooms[key], fingerprint, width) for key in keys}
+
+    stale = [(key, rooms[key]) for key in keys
+             if force or state.get(key) != signatures[key]
+             or not os.path.exists(os.path.join(out_dir, thumbnail_name(key)))]
+    render = partial(render_snapshot, assets_dir=assets_dir, out_dir=out_dir, width=width)
+    for key, size in ga.map_jobs(render, stale, workers):
+        print(f"Rendered: {thumbnail_name(key)} ({len(rooms[key]['items'])} items, {size} bytes)")
+
+    # Thumbnails of rooms that no longer exist
+    removed = []
+    if selected is None:
+        removed = sorted(set(state) - set(rooms))
+        state = {}
+    for key in removed:
+        path = os.path.join(out_dir, thumbnail_name(key))
+        if os.path.exists(path):
+            os.remove(path)
+        print(f"Removed: {thumbnail_name(key)}")
+
+    save_state(out_dir, {**state, **signatures})
+    return len(stale), len(keys) - len(stale), len(removed)
+
+def main():
+    """Render room thumbnails"""
+    parser = argparse.ArgumentParser(description="Render Shared House room thumbnails from the game database")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database (default: $DB_PATH or shared-house/memory/agent_memory.db)")
+    parser.add_argument("--assets", help="generated sprites directory (default: output_dir of asset-spec.json)")
+    parser.add_argument("-o", "--out", default=DEFAULT_OUT, help="thumbnail directory (default: shared-house/public/thumbnails)")
+    parser.add_argument("--room", action="append", metavar="KEY",
+                        help="only render this room key, e.g. room_main or decor_default (repeatable)")
+    parser.add_argument("-w", "--width", type=int, default=DEFAULT_THUMB_WIDTH,
+                        help=f"thumbnail width in pixels (default: {DEFAULT_THUMB_WIDTH})")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="re-render every room")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        sys.exit(f"Database not found: {args.db}")
+    assets_dir = args.assets or ga.load_spec(os.path.join(ROOT, "asset-spec.json"))["output_dir"]
+
+    print("🖼️ Cozy Claw Studio - Room Snapshot Renderer")
+    print("=" * 50)
+    rooms = load_rooms(args.db)
+    missing = set(args.room or ()) - set(rooms)
+    if missing:
+        sys.exit(f"Unknown room(s): {', '.join(sorted(missing))}")
+    print(f"\n🏠 Found {len(rooms)} room(s) in {args.db}")
+    rendered, unchanged, removed = render_rooms(rooms, assets_dir, args.out, workers=args.workers,
+                                                width=args.width, force=args.force, selected=args.room)
+
+    print("\n" + "=" * 50)
+    print(f"✅ Rendered {rendered} room(s) ({unchanged} unchanged, {removed} removed)")
+    print(f"📁 Thumbnails saved to: {args.out}")
+
+if __name__ == "__main__":
+    main()
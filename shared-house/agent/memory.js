@@ -9,6 +9,9 @@
  * - Conversation history
  */
 
+// How long to wait on the full-text search service before scanning locally
+const MEMORY_SEARCH_TIMEOUT_MS = 2000;
+
 class AgentMemory {
     constructor(database) {
         this.db = database;
@@ -72,6 +75,24 @@ class AgentMemory {
     
     // Query memories based on search terms
     async query(query, limit = 5) {
+        // Full-text search service (memory_search.py), when one is configured
+        if (process.env.MEMORY_SEARCH_URL) {
+            try {
+                const res = await fetch(`${process.env.MEMORY_SEARCH_URL}/search`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ query, limit }),
+                    // Fall back to the local scan rather than stall on a hung service
+                    signal: AbortSignal.timeout(MEMORY_SEARCH_TIMEOUT_MS)
+                });
+                if (res.ok) {
+                    return (await res.json()).results;
+                }
+            } catch (err) {
+                console.error('Memory search service unavailable, falling back:', err.message);
+            }
+        }
+        
         const terms = query.toLowerCase().split(/\s+/);
         
         // Get all memories and score them
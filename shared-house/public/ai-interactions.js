@@ -30,6 +30,9 @@ const AIInteractions = (function() {
         WINDOW: 4
     };
 
+    // Decor grid the walk grid service (walk_grid.py) plans in, in cells
+    const WALK_GRID = { width: 20, height: 15 };
+
     // Celest's preferences by room type
     const CELEST_PREFERENCES = {
         living_room: {
@@ -668,45 +671,102 @@ const AIInteractions = (function() {
         // Start walking animation
         startWalkingAnimation();
         
-        // Calculate travel time with pathfinding consideration
-        const distance = Math.sqrt(
-            Math.pow(celest.x - pathTarget.x, 2) + 
-            Math.pow(celest.y - pathTarget.y, 2)
-        );
-        
-        // Add slight delay for "pathfinding around furniture"
-        const travelTime = Math.min(distance * 10, 3000) + 200;
-        
-        setTimeout(() => {
-            isMoving = false;
-            stopWalkingAnimation();
+        // Route around furniture, or straight there if the walk grid is unavailable
+        requestPath(furniture, pathTarget).then(route => {
+            const waypoints = route || [pathTarget];
+            pathTarget = waypoints[waypoints.length - 1];
             
-            // Position at furniture
-            if (celest) {
-                celest.x = pathTarget.x;
-                celest.y = pathTarget.y;
+            walkRoute(waypoints, () => {
+                isMoving = false;
+                stopWalkingAnimation();
                 
                 // Set z-index based on layer for proper visual stacking
-                if (furniture.layer !== undefined) {
+                if (celest && furniture.layer !== undefined) {
                     celest.zIndex = 20 + furniture.layer;
                 }
-            }
-            
-            // Start activity
-            setActivity(activityKey, furniture);
-            
-            // Emit interaction event for other systems
-            const event = new CustomEvent('celestLayerInteraction', {
-                detail: { 
-                    activity: activityKey, 
-                    furniture: furniture,
-                    layer: furniture.layer,
-                    room: currentRoom
-                }
+                
+                // Start activity
+                setActivity(activityKey, furniture);
+                
+                // Emit interaction event for other systems
+                const event = new CustomEvent('celestLayerInteraction', {
+                    detail: { 
+                        activity: activityKey, 
+                        furniture: furniture,
+                        layer: furniture.layer,
+                        room: currentRoom
+                    }
+                });
+                document.dispatchEvent(event);
             });
-            document.dispatchEvent(event);
+        });
+    }
+
+    /**
+     * Ask the walk grid service for a route to a furniture item.
+     * Resolves to room-pixel waypoints (excluding the start), or null.
+     */
+    async function requestPath(furniture, target) {
+        const room = RoomManager.getCurrentRoom ? 
+            RoomManager.getCurrentRoom() : { width: 800, height: 600 };
+        const panel = typeof decorPanel !== 'undefined' ? decorPanel : null;
+        const grid = (panel && panel.gridSize) || WALK_GRID;
+        const cellW = room.width / grid.width;
+        const cellH = room.height / grid.height;
+        
+        // Always send the layer target; the id only helps when it is a server
+        // placement id (RoomManager's client-side furn_* ids are not), in which
+        // case the service picks the free spot in front of the item instead
+        const query = {
+            from: [celest.x / cellW, celest.y / cellH],
+            to: [target.x / cellW, target.y / cellH]
+        };
+        if (furniture.id && !String(furniture.id).startsWith('furn_')) {
+            query.item = furniture.id;
+        }
+        
+        try {
+            const response = await fetch('/api/walk/paths', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    // Same theme the decor panel places and loads by
+                    room: `decor_${(panel && panel.currentTheme) || 'cozy'}`,
+                    queries: [query]
+                })
+            });
+            if (!response.ok) return null;
             
-        }, travelTime);
+            const { paths } = await response.json();
+            if (!paths || !paths[0] || !paths[0].points) return null;
+            return paths[0].points.slice(1).map(([x, y]) => ({ x: x * cellW, y: y * cellH }));
+        } catch (error) {
+            return null;
+        }
+    }
+
+    /**
+     * Walk through waypoints one leg at a time, then call onArrive
+     */
+    function walkRoute(waypoints, onArrive) {
+        const [next, ...rest] = waypoints;
+        if (!next || !celest) {
+            onArrive();
+            return;
+        }
+        
+        const distance = Math.sqrt(
+            Math.pow(celest.x - next.x, 2) + 
+            Math.pow(celest.y - next.y, 2)
+        );
+        
+        setTimeout(() => {
+            if (celest) {
+                celest.x = next.x;
+                celest.y = next.y;
+            }
+            walkRoute(rest, onArrive);
+        }, Math.min(distance * 10, 3000));
     }
 
     /**
@@ -106,10 +106,38 @@ class AudioManager {
         }
     }
 
+    /**
+     * Preload the SFX sprite (generate_audio.py) with one fetch and one decode,
+     * slicing each cue into its own buffer
+     */
+    async preloadSprite(manifestUrl = '/audio/sfx_sprite.json') {
+        const manifest = await (await fetch(manifestUrl)).json();
+        const response = await fetch(`/audio/${manifest.file}?v=${manifest.sha256.slice(0, 8)}`);
+        const sprite = await this.audioContext.decodeAudioData(await response.arrayBuffer());
+        const channel = sprite.getChannelData(0);
+
+        for (const [name, cue] of Object.entries(manifest.sprites)) {
+            // decodeAudioData resamples to the context rate, so go by seconds
+            const start = Math.round(cue.offset * sprite.sampleRate);
+            const length = Math.round(cue.duration * sprite.sampleRate);
+            const buffer = this.audioContext.createBuffer(1, length, sprite.sampleRate);
+            buffer.copyToChannel(channel.subarray(start, start + length), 0);
+            this.preloadedSounds.set(name, buffer);
+        }
+    }
+
     /**
      * Preload all game sounds
      */
     async preloadAllSounds() {
+        try {
+            await this.preloadSprite();
+            console.log('🎵 All sounds preloaded (sprite)');
+            return;
+        } catch (error) {
+            console.warn('SFX sprite unavailable, loading sounds individually', error);
+        }
+
         const sounds = [
             ['step_wood', '/audio/step_wood.wav'],
             ['step_carpet', '/audio/step_carpet.wav'],
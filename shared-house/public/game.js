@@ -1023,6 +1023,7 @@ function setRoomTheme(themeName) {
     
     // Save theme preference
     localStorage.setItem('roomTheme', themeName);
+    applyThemeBackground(themeName);
     
     // Celest reacts to theme change
     const reactions = {
@@ -1039,6 +1040,7 @@ function setRoomTheme(themeName) {
 function setCustomWallColor(color) {
     const room = document.querySelector('.room');
     if (room) {
+        clearThemeBackground();
         room.style.setProperty('--wall-color', color);
         localStorage.setItem('customWallColor', color);
     }
@@ -1047,6 +1049,7 @@ function setCustomWallColor(color) {
 function setCustomFloorColor(color) {
     const room = document.querySelector('.room');
     if (room) {
+        clearThemeBackground();
         room.style.setProperty('--floor-color', color);
         localStorage.setItem('customFloorColor', color);
     }
@@ -1154,6 +1157,8 @@ function loadRoomTheme() {
     const savedTheme = localStorage.getItem('roomTheme');
     if (savedTheme) {
         setRoomTheme(savedTheme);
+    } else {
+        applyThemeBackground('cozy');
     }
 }
 
@@ -1468,6 +1473,7 @@ function uploadBackground(input) {
     reader.onload = function(e) {
         const room = document.querySelector('.room');
         if (room) {
+            clearThemeBackground();
             room.style.backgroundImage = `url(${e.target.result})`;
             room.style.backgroundSize = 'cover';
             room.style.backgroundPosition = 'center';
@@ -1484,6 +1490,7 @@ function resetBackground() {
         room.style.backgroundImage = '';
         room.style.background = 'linear-gradient(180deg, var(--wall-color, #3a3a55) 0%, var(--floor-color, #2d2d44) 100%)';
         localStorage.removeItem('customBackground');
+        applyThemeBackground(localStorage.getItem('roomTheme') || 'cozy');
         gameAddMessage('Celest', 'Back to the classic look! 🏠', true);
     }
 }
@@ -1500,6 +1507,63 @@ function loadCustomBackground() {
     }
 }
 
+// ==================== THEME BACKGROUNDS ====================
+
+let themeBackgrounds = null;
+
+// Wang-tiled wall and floor art per theme, pre-baked by generate_assets.py
+async function loadThemeBackgrounds() {
+    if (!themeBackgrounds) {
+        try {
+            const response = await fetch('/assets/backgrounds.json');
+            themeBackgrounds = response.ok ? (await response.json()).themes : {};
+        } catch (error) {
+            themeBackgrounds = {};
+        }
+    }
+    return themeBackgrounds;
+}
+
+// Draw a theme's background as its few large chunks, layered as CSS backgrounds
+async function applyThemeBackground(themeName) {
+    const sizes = (await loadThemeBackgrounds())[themeName];
+    const room = document.querySelector('.room');
+    if (!room) return;
+    
+    // Custom backgrounds and colors win over the baked art
+    const custom = ['customBackground', 'customWallColor', 'customFloorColor']
+        .some(key => localStorage.getItem(key));
+    if (!sizes || custom) {
+        clearThemeBackground();
+        return;
+    }
+    
+    // Pick the size whose aspect ratio is closest to the room's
+    const aspect = room.clientWidth / room.clientHeight;
+    const fit = bg => Math.abs(bg.width / bg.height - aspect);
+    const bg = Object.values(sizes).reduce((best, next) => fit(next) < fit(best) ? next : best);
+    const percent = (offset, size, total) => size === total ? '0%' : `${offset / (total - size) * 100}%`;
+    
+    room.style.backgroundImage = bg.chunks.map(c => `url(/assets/${c.file})`).join(', ');
+    room.style.backgroundSize = bg.chunks
+        .map(c => `${c.w / bg.width * 100}% ${c.h / bg.height * 100}%`).join(', ');
+    room.style.backgroundPosition = bg.chunks
+        .map(c => `${percent(c.x, c.w, bg.width)} ${percent(c.y, c.h, bg.height)}`).join(', ');
+    room.style.backgroundRepeat = 'no-repeat';
+    room.classList.add('baked-background');
+}
+
+function clearThemeBackground() {
+    const room = document.querySelector('.room');
+    if (room && room.classList.contains('baked-background')) {
+        room.classList.remove('baked-background');
+        room.style.backgroundImage = '';
+        room.style.backgroundSize = '';
+        room.style.backgroundPosition = '';
+        room.style.backgroundRepeat = '';
+    }
+}
+
 // ==================== AVATAR MOVEMENT ====================
 
 let avatarMovementInterval = null;
@@ -3,7 +3,7 @@
  * Enables offline play and caching
  */
 
-const CACHE_NAME = 'shared-house-v1';
+// Fallback app shell when no generated precache manifest is deployed
 const STATIC_ASSETS = [
     '/',
     '/index.html',
@@ -12,18 +12,40 @@ const STATIC_ASSETS = [
     '/mobile.css'
 ];
 
+const PRECACHE_NAME = 'shared-house-precache';
+const IMMUTABLE_CACHE_NAME = 'shared-house-immutable';
 const DYNAMIC_CACHE_NAME = 'shared-house-dynamic-v1';
+const CACHE_NAMES = [PRECACHE_NAME, IMMUTABLE_CACHE_NAME, DYNAMIC_CACHE_NAME];
+const MAX_IMMUTABLE_ITEMS = 500;
 
-// Install event - cache static assets
+// Content-hashed files from generate_assets.py, e.g. sofa_v1.3f9a2c1d.png
+const FINGERPRINTED = /\.[0-9a-f]{8}\.\w+$/;
+
+// Written by generate_assets.py: [{ url, revision }], where revision is null
+// for fingerprinted URLs. A changed manifest is a changed worker, so an asset
+// build triggers an update that refetches only the entries that changed.
+// Without one the static list is cached as-is; it only backs offline use,
+// since the shell itself is always fetched network first.
+try {
+    importScripts('/precache-manifest.js');
+} catch (error) {
+    console.warn('[Service Worker] No precache manifest, using the static asset list');
+}
+const PRECACHE_MANIFEST = self.__PRECACHE_MANIFEST ||
+    STATIC_ASSETS.map((url) => ({ url, revision: null }));
+
+// URL path -> cache key; revisioned entries are keyed by revision too
+const PRECACHE_KEYS = new Map(PRECACHE_MANIFEST.map(({ url, revision }) => [
+    url,
+    new URL(revision ? `${url}?__rev=${revision}` : url, self.location).href
+]));
+
+// Install event - fetch precache entries that aren't cached yet
 self.addEventListener('install', (event) => {
     console.log('[Service Worker] Installing...');
     
     event.waitUntil(
-        caches.open(CACHE_NAME)
-            .then((cache) => {
-                console.log('[Service Worker] Caching static assets');
-                return cache.addAll(STATIC_ASSETS);
-            })
+        precacheMissing()
             .then(() => {
                 console.log('[Service Worker] Static assets cached successfully');
                 return self.skipWaiting();
@@ -34,7 +56,23 @@ self.addEventListener('install', (event) => {
     );
 });
 
-// Activate event - clean up old caches
+async function precacheMissing() {
+    const cache = await caches.open(PRECACHE_NAME);
+    const cached = new Set((await cache.keys()).map((request) => request.url));
+    const missing = PRECACHE_MANIFEST.filter(({ url }) => !cached.has(PRECACHE_KEYS.get(url)));
+    
+    console.log(`[Service Worker] Precaching ${missing.length} changed of ${PRECACHE_MANIFEST.length} assets`);
+    await Promise.all(missing.map(async ({ url, revision }) => {
+        // Revisioned URLs must skip the HTTP cache, or a stale copy could be stored under the new revision
+        const response = await fetch(url, { cache: revision ? 'no-cache' : 'default' });
+        if (!response.ok) {
+            throw new Error(`${url}: HTTP ${response.status}`);
+        }
+        await cache.put(PRECACHE_KEYS.get(url), response);
+    }));
+}
+
+// Activate event - clean up old caches and superseded precache entries
 self.addEventListener('activate', (event) => {
     console.log('[Service Worker] Activating...');
     
@@ -45,8 +83,7 @@ self.addEventListener('activate', (event) => {
                     cacheNames
                         .filter((name) => {
                             return name.startsWith('shared-house-') && 
-                                   name !== CACHE_NAME && 
-                                   name !== DYNAMIC_CACHE_NAME;
+                                   !CACHE_NAMES.includes(name);
                         })
                         .map((name) => {
                             console.log('[Service Worker] Deleting old cache:', name);
@@ -54,6 +91,8 @@ self.addEventListener('activate', (event) => {
                         })
                 );
             })
+            .then(() => prunePrecache())
+            .then(() => trimCache(IMMUTABLE_CACHE_NAME, MAX_IMMUTABLE_ITEMS))
             .then(() => {
                 console.log('[Service Worker] Activated successfully');
                 return self.clients.claim();
@@ -61,6 +100,24 @@ self.addEventListener('activate', (event) => {
     );
 });
 
+async function prunePrecache() {
+    const cache = await caches.open(PRECACHE_NAME);
+    const current = new Set(PRECACHE_KEYS.values());
+    const stale = (await cache.keys()).filter((request) => !current.has(request.url));
+    await Promise.all(stale.map((request) => cache.delete(request)));
+}
+
+async function trimCache(cacheName, maxItems) {
+    const cache = await caches.open(cacheName);
+    const requests = await cache.keys();
+    
+    if (requests.length > maxItems) {
+        // Remove oldest items
+        const toDelete = requests.slice(0, requests.length - maxItems);
+        await Promise.all(toDelete.map(req => cache.delete(req)));
+    }
+}
+
 // Fetch event - serve from cache or network
 self.addEventListener('fetch', (event) => {
     const { request } = event;
@@ -77,88 +134,66 @@ self.addEventListener('fetch', (event) => {
         return;
     }
     
-    // Strategy: Cache First for static assets, Network First for dynamic content
-    if (isStaticAsset(url)) {
-        event.respondWith(cacheFirst(request));
+    // Strategy: Cache First (never revalidated) only for fingerprinted files,
+    // Stale While Revalidate for other images, Network First for everything
+    // else - navigations and the shell included, so query-string cache
+    // busting like game.js?v=13 keeps working. The precache backs them offline.
+    const sameOrigin = url.origin === self.location.origin;
+    
+    if (FINGERPRINTED.test(url.pathname)) {
+        event.respondWith(immutable(request, sameOrigin && PRECACHE_KEYS.get(url.pathname)));
     } else if (isImageAsset(url)) {
-        event.respondWith(cacheFirstWithExpiration(request));
+        event.respondWith(staleWhileRevalidate(request));
     } else {
-        event.respondWith(networkFirst(request));
+        const fallback = request.mode === 'navigate' ? PRECACHE_KEYS.get('/') : PRECACHE_KEYS.get(url.pathname);
+        event.respondWith(networkFirst(request, sameOrigin && fallback));
     }
 });
 
-// Check if URL is a static asset
-function isStaticAsset(url) {
-    const staticExtensions = ['.html', '.js', '.css', '.json'];
-    return staticExtensions.some(ext => url.pathname.endsWith(ext));
-}
-
 // Check if URL is an image asset
 function isImageAsset(url) {
     const imageExtensions = ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp'];
     return imageExtensions.some(ext => url.pathname.endsWith(ext));
 }
 
-// Cache First strategy
-async function cacheFirst(request) {
-    const cached = await caches.match(request);
+// Fingerprinted files never change, so a cached copy is never revalidated
+async function immutable(request, precacheKey) {
+    const cached = (precacheKey && await caches.match(precacheKey, { cacheName: PRECACHE_NAME })) ||
+        await caches.match(request);
     
     if (cached) {
         return cached;
     }
     
-    try {
-        const response = await fetch(request);
-        
-        if (response.status === 200) {
-            const cache = await caches.open(CACHE_NAME);
-            cache.put(request, response.clone());
-        }
-        
-        return response;
-    } catch (error) {
-        console.error('[Service Worker] Cache first failed:', error);
-        // Return offline fallback if available
-        return caches.match('/offline.html');
+    const response = await fetch(request);
+    if (response.status === 200) {
+        const cache = await caches.open(IMMUTABLE_CACHE_NAME);
+        cache.put(request, response.clone());
     }
+    return response;
 }
 
-// Cache First with expiration for images
-async function cacheFirstWithExpiration(request) {
+// Stale While Revalidate for images: answer from cache, refresh it behind
+async function staleWhileRevalidate(request) {
     const cached = await caches.match(request);
-    
-    if (cached) {
-        // Check if cache is fresh (less than 7 days old)
-        const dateHeader = cached.headers.get('date');
-        if (dateHeader) {
-            const cachedTime = new Date(dateHeader).getTime();
-            const maxAge = 7 * 24 * 60 * 60 * 1000; // 7 days
-            
-            if (Date.now() - cachedTime < maxAge) {
-                return cached;
+    const refresh = fetch(request)
+        .then(async (response) => {
+            if (response.status === 200) {
+                const cache = await caches.open(DYNAMIC_CACHE_NAME);
+                await cache.put(request, response.clone());
             }
-        }
-    }
+            return response;
+        });
     
-    try {
-        const response = await fetch(request);
-        
-        if (response.status === 200) {
-            const cache = await caches.open(DYNAMIC_CACHE_NAME);
-            cache.put(request, response.clone());
-        }
-        
-        return response;
-    } catch (error) {
-        if (cached) {
-            return cached;
-        }
-        throw error;
+    if (cached) {
+        refresh.catch(() => {});
+        return cached;
     }
+    return refresh;
 }
 
-// Network First strategy
-async function networkFirst(request) {
+// Network First strategy; offline, the last response or the precached copy
+async function networkFirst(request, precacheKey) {
     try {
         const networkResponse = await fetch(request);
         
@@ -169,7 +204,8 @@ async function networkFirst(request) {
         
         return networkResponse;
     } catch (error) {
-        const cached = await caches.match(request);
+        const cached = await caches.match(request) ||
+            (precacheKey && await caches.match(precacheKey, { cacheName: PRECACHE_NAME }));
         
         if (cached) {
             return cached;
@@ -254,7 +290,7 @@ self.addEventListener('message', (event) => {
         self.skipWaiting();
     } else if (event.data.type === 'CACHE_ASSETS') {
         event.waitUntil(
-            caches.open(CACHE_NAME)
+            caches.open(DYNAMIC_CACHE_NAME)
                 .then((cache) => cache.addAll(event.data.assets))
         );
     }
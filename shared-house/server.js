@@ -445,7 +445,16 @@ class AgentSystem extends EventEmitter {
 
 app.use(cors({ origin: '*' }));
 app.use(express.json({ limit: '1mb' }));
-app.use(express.static(path.join(__dirname, 'public')));
+// Content-hashed assets (sofa_v1.3f9a2c1d.png, from generate_assets.py) never
+// change, so browsers may keep them without revalidating
+const FINGERPRINTED_ASSET = /\.[0-9a-f]{8}\.\w+$/;
+app.use(express.static(path.join(__dirname, 'public'), {
+    setHeaders: (res, filePath) => {
+        if (FINGERPRINTED_ASSET.test(filePath)) {
+            res.set('Cache-Control', 'public, max-age=31536000, immutable');
+        }
+    }
+}));
 
 // ==================== API ROUTES ====================
 
@@ -628,6 +637,7 @@ app.post('/api/decor/place', async (req, res) => {
         
         // Broadcast to all clients
         io.emit('decor:changed', { type: 'place', ...result });
+        notifyWalkGrid({ placement: result.id });
         
         res.json(result);
     } catch (err) {
@@ -642,6 +652,7 @@ app.post('/api/decor/move', async (req, res) => {
         const result = await decorDB.moveItem(placementId, x, y, rotation);
         
         io.emit('decor:changed', { type: 'move', ...result });
+        notifyWalkGrid({ placement: placementId });
         
         res.json(result);
     } catch (err) {
@@ -655,6 +666,7 @@ app.delete('/api/decor/place/:id', async (req, res) => {
         await decorDB.removeItem(req.params.id);
         
         io.emit('decor:changed', { type: 'remove', id: req.params.id });
+        notifyWalkGrid({ placement: req.params.id });
         
         res.json({ success: true });
     } catch (err) {
@@ -669,6 +681,7 @@ app.delete('/api/decor/clear', async (req, res) => {
         await decorDB.clearTheme(themeId);
         
         io.emit('decor:changed', { type: 'clear', themeId });
+        notifyWalkGrid({ room: `decor_${themeId}` });
         
         res.json({ success: true });
     } catch (err) {
@@ -720,18 +733,55 @@ app.get('/api/decor/unlocks', async (req, res) => {
 // Get decor stats
 app.get('/api/decor/stats', async (req, res) => {
     try {
-        const stats = await decorDB.getStats();
+        const stats = await readSummary('decor.stats', ANALYTICS.DECOR_MAX_AGE) || await decorDB.getStats();
         res.json(stats);
     } catch (err) {
         res.status(500).json({ error: err.message });
     }
 });
 
-/*
+// ==================== ANALYTICS SUMMARIES ====================
+// Precomputed by game_analytics.py into their own database, so stats reads
+// never query (or hold read locks on) the gameplay databases
+
+const ANALYTICS = {
+    DB_PATH: process.env.ANALYTICS_DB_PATH || path.join(__dirname, 'memory', 'analytics.db'),
+    DECOR_MAX_AGE: 5 * 60 * 1000 // older decor summaries fall back to a live query
+};
+let analyticsDb = null;
+
+// A stored summary document, or null if missing (or older than maxAge ms)
+function readSummary(key, maxAge = Infinity) {
+    return new Promise((resolve) => {
+        if (!analyticsDb) {
+            if (!require('fs').existsSync(ANALYTICS.DB_PATH)) return resolve(null);
+            analyticsDb = new sqlite3.Database(ANALYTICS.DB_PATH, sqlite3.OPEN_READONLY);
+        }
+        analyticsDb.get('SELECT value, updated_at FROM summaries WHERE key = ?', [key], (err, row) => {
+            if (err || !row || Date.now() - new Date(row.updated_at).getTime() > maxAge) {
+                return resolve(null);
+            }
+            resolve(JSON.parse(row.value));
+        });
+    });
+}
+
+async function sendSummary(res, key) {
+    const summary = await readSummary(key);
+    if (!summary) {
+        return res.status(503).json({ error: `No ${key} summary yet - run game_analytics.py` });
+    }
+    res.json(summary);
+}
+
 // Get current economy data (for dashboard)
 app.get('/api/economy', async (req, res) => {
     try {
-        res.json(summary);
+        const [weekly, stats] = await Promise.all([readSummary('economy.weekly'), readSummary('economy.stats')]);
+        if (!weekly || !stats) {
+            return res.status(503).json({ error: 'No economy summary yet - run game_analytics.py' });
+        }
+        res.json({ weekly, stats });
     } catch (err) {
         console.error('Economy API error:', err);
         res.status(500).json({ error: err.message });
@@ -741,7 +791,7 @@ app.get('/api/economy', async (req, res) => {
 // Get weekly economy summary
 app.get('/api/economy/weekly', async (req, res) => {
     try {
-        res.json(summary);
+        await sendSummary(res, 'economy.weekly');
     } catch (err) {
         res.status(500).json({ error: err.message });
     }
@@ -750,12 +800,74 @@ app.get('/api/economy/weekly', async (req, res) => {
 // Get all-time stats
 app.get('/api/economy/stats', async (req, res) => {
     try {
-        res.json(stats);
+        await sendSummary(res, 'economy.stats');
     } catch (err) {
         res.status(500).json({ error: err.message });
     }
 });
-*/
+
+// ==================== ON-DEMAND SPRITES ====================
+// Color/scale variants rendered and cached by sprite_server.py, proxied so the
+// browser loads them same-origin, e.g. /sprite/sofa?color=%238B4513&scale=2
+
+const SPRITE_SERVICE_URL = process.env.SPRITE_SERVICE_URL;
+const SPRITE_HEADERS = ['content-type', 'etag', 'cache-control', 'x-sprite-cache'];
+
+app.get('/sprite/:name', async (req, res) => {
+    if (!SPRITE_SERVICE_URL) {
+        return res.status(503).json({ error: 'Sprite service not configured - set SPRITE_SERVICE_URL' });
+    }
+    try {
+        const query = new URLSearchParams(req.query).toString();
+        const headers = req.get('If-None-Match') ? { 'If-None-Match': req.get('If-None-Match') } : {};
+        const upstream = await fetch(
+            `${SPRITE_SERVICE_URL}/sprite/${encodeURIComponent(req.params.name)}${query ? '?' + query : ''}`,
+            { headers }
+        );
+        for (const name of SPRITE_HEADERS) {
+            const value = upstream.headers.get(name);
+            if (value) res.set(name, value);
+        }
+        res.status(upstream.status).send(Buffer.from(await upstream.arrayBuffer()));
+    } catch (err) {
+        console.error('Sprite service unavailable:', err.message);
+        res.status(502).json({ error: 'Sprite service unavailable' });
+    }
+});
+
+// ==================== WALK GRID ====================
+// Companion pathfinding by walk_grid.py. Decor changes are pushed to it so it
+// restamps just the changed item instead of re-reading every room.
+
+const WALKGRID_URL = process.env.WALKGRID_URL;
+
+// Fire-and-forget: a stale grid only costs a slightly odd route
+function notifyWalkGrid(body) {
+    if (!WALKGRID_URL) return;
+    fetch(`${WALKGRID_URL}/invalidate`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    }).catch(err => console.error('Walk grid unavailable:', err.message));
+}
+
+// Batched path queries: { room, queries: [{ from: [x, y], to: [x, y] | item: placementId }] }
+app.post('/api/walk/paths', async (req, res) => {
+    if (!WALKGRID_URL) {
+        return res.status(503).json({ error: 'Walk grid not configured - set WALKGRID_URL' });
+    }
+    try {
+        const upstream = await fetch(`${WALKGRID_URL}/paths`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(req.body)
+        });
+        res.status(upstream.status).json(await upstream.json());
+    } catch (err) {
+        console.error('Walk grid unavailable:', err.message);
+        res.status(502).json({ error: 'Walk grid unavailable' });
+    }
+});
 
 // ==================== OPENCLAW WEBHOOK RECEIVER ====================
 
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - On-Demand Sprite Service
+Renders any sprite variant when it is first asked for, e.g.
+GET /sprite/sofa?color=%238B4513&scale=2, by running the same create_*
+generators (and the same derived RNG) generate_assets.py builds with, so a
+variant is byte-identical to its pre-rendered file. Encoded PNGs are kept in
+a bounded in-memory LRU over a bounded on-disk LRU, concurrent requests for
+the same sprite share one render, and every response carries a strong ETag.
+"""
+
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from generate_assets import (DEFAULT_SEED, GENERATORS, asset_job, density_images, encode_png,
+                             freeze, job_cache_key, load_spec, render_image)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SPEC = os.path.join(ROOT, "asset-spec.json")
+DEFAULT_CACHE_DIR = os.path.join(ROOT, "shared-house", ".sprite-cache")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 3092
+# Budgets for encoded PNG bytes, not entry counts: a 4x bed weighs 50 icons
+MEMORY_CACHE_BYTES = 32 * 1024 * 1024
+DISK_CACHE_BYTES = 256 * 1024 * 1024
+MAX_SCALE = 8
+# Output only changes when the generator code does, which restarts the service,
+# so clients may reuse a sprite for a while and then revalidate by ETag
+CACHE_CONTROL = "public, max-age=3600"
+
+COLOR_RE = re.compile(r"#?([0-9A-Fa-f]{6})")
+
+Sprite = namedtuple('Sprite', ['data', 'etag'])
+
+def etag_for(data):
+    """Strong validator: the same PNG bytes always get the same tag"""
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+class SpriteError(Exception):
+    """A request that names no renderable sprite; carries the HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class SpriteRoutes:
+    """Maps sprite names to generator jobs using the asset spec.
+
+    Every family is addressable by its name (sofa, plant_big, coffee_table...).
+    A color request uses the recolor family for that catalog item (sofa_colors
+    for sofa, bed_single_colors for bed_single) so its tint and anchor match the
+    build; families without one are recolored with the default palette swap.
+    """
+
+    def __init__(self, spec):
+        self.families = {}
+        self.recolors = {}
+        for family in spec["families"]:
+            if "catalog_item" in family:
+                self.recolors[family["catalog_item"]] = family
+            else:
+                self.families[family["name"]] = family
+
+    def names(self):
+        return sorted(set(self.families) | set(self.recolors))
+
+    def job(self, name, variant=1, color=None, scale=1):
+        """The AssetJob for one request, raising SpriteError if there is none"""
+        if not 1 <= scale <= MAX_SCALE:
+            raise SpriteError(400, f"scale must be between 1 and {MAX_SCALE}")
+        if color is not None:
+            m = COLOR_RE.fullmatch(color)
+            if not m:
+                raise SpriteError(400, f"color must look like #8B4513, not {color!r}")
+            # The catalog spells colors in upper case; so does every cache key
+            color = "#" + m.group(1).upper()
+
+        family = self.families.get(name)
+        recolor = self.recolors.get(name)
+        if family is None and recolor is None:
+            raise SpriteError(404, f"unknown sprite {name!r}")
+        if color is not None and recolor is not None:
+            # The build's own palette swap for this catalog item
+            return self.family_job(recolor, name, variant, scale, color=color)
+        if color is None and family is None:
+            # Uncolored catalog item: its recolor source as drawn
+            recolor = dict(recolor, generator=recolor["options"]["source"], options={})
+            return self.family_job(recolor, name, variant, scale)
+        if color is None:
+            return self.family_job(family, name, variant, scale)
+        if family.get("options") or family["generator"] == "create_recolor":
+            # recolor_base renders its source without options, so it can't reproduce these
+            raise SpriteError(400, f"{name} has no color variants")
+        recolor = dict(family, generator="create_recolor", options={"source": family["generator"]})
+        return self.family_job(recolor, name, variant, scale, color=color)
+
+    def family_job(self, family, name, variant, scale, **extra):
+        if variant not in family["variants"]:
+            raise SpriteError(400, f"{name} has variants {family['variants']}, not {variant}")
+        options = {k: freeze(v) for k, v in family.get("options", {}).items()}
+        return asset_job(GENERATORS[family["generator"]], variant + family.get("offset", 0),
+                         f"{name}.png", (scale,), **options, **extra)
+
+def render_sprite(job, seed=DEFAULT_SEED):
+    """Render one job at its single density and encode it (runs in a worker process)"""
+    img = render_image(job, seed)
+    (_, scaled), = density_images(img, job.filename, job.scales)
+    return encode_png(scaled)
+
+class MemoryCache:
+    """Least-recently-used map of encoded sprites, bounded by total bytes"""
+
+    def __init__(self, max_bytes=MEMORY_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            sprite = self.entries.get(key)
+            if sprite is not None:
+                self.entries.move_to_end(key)
+            return sprite
+
+    def put(self, key, sprite):
+        if len(sprite.data) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old.data)
+            self.entries[key] = sprite
+            self.size += len(sprite.data)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted.data)
+
+class DiskCache:
+    """Least-recently-used directory of PNGs named by their build cache key.
+
+    Recency is the file's mtime, bumped on every hit, so the order survives
+    restarts; the index is rebuilt from a directory scan at startup.
+    """
+
+    def __init__(self, path, max_bytes=DISK_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        found = []
+        for entry in os.scandir(path):
+            if entry.name.endswith(".png"):
+                st = entry.stat()
+                found.append((st.st_mtime, entry.name[:-4], st.st_size))
+            elif entry.name.endswith(".tmp"):
+                os.remove(entry.path)
+        self.entries = OrderedDict((key, size) for _, key, size in sorted(found))
+        self.size = sum(self.entries.values())
+        self.evict()
+
+    def file(self, key):
+        return os.path.join(self.path, key + ".png")
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+        try:
+            with open(self.file(key), "rb") as f:
+                data = f.read()
+            os.utime(self.file(key))
+        except OSError:
+            # Removed behind our back; forget it and render again
+            with self.lock:
+                self.size -= self.entries.pop(key, 0)
+            return None
+        return data
+
+    def put(self, key, data):
+        path = self.file(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self.lock:
+            self.size += len(data) - self.entries.pop(key, 0)
+            self.entries[key] = len(data)
+            self.evict()
+
+    def evict(self):
+        """Drop the least recently used files until under budget (lock held)"""
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            key, size = self.entries.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(self.file(key))
+            except FileNotFoundError:
+                pass
+
+class SpriteService:
+    """Memory LRU -> disk LRU -> render, with one render in flight per sprite"""
+
+    def __init__(self, routes, cache_dir, seed=DEFAULT_SEED, workers=None,
+                 memory_bytes=MEMORY_CACHE_BYTES, disk_bytes=DISK_CACHE_BYTES):
+        self.routes = routes
+        self.seed = seed
+        self.memory = MemoryCache(memory_bytes)
+        self.disk = DiskCache(cache_dir, disk_bytes)
+        workers = os.cpu_count() if workers is None else workers
+        # Rendering is CPU-bound Python; a process pool keeps it off the GIL
+        self.pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.stats = Counter()
+
+    def render(self, job):
+        if self.pool is None:
+            return render_sprite(job, self.seed)
+        return self.pool.submit(render_sprite, job, self.seed).result()
+
+    def get(self, job):
+        """(sprite, source) for a job; source is memory, disk, render or coalesced"""
+        sprite = self.memory.get(job)
+        if sprite is not None:
+            self.count("memory")
+            return sprite, "memory"
+
+        with self.lock:
+            future = self.inflight.get(job)
+            leader = future is None
+            if leader:
+                future = self.inflight[job] = Future()
+        if not leader:
+            self.count("coalesced")
+            return future.result(), "coalesced"
+
+        try:
+            key = job_cache_key(job, self.seed)
+            data = self.disk.get(key)
+            source = "disk"
+            if data is None:
+                start = time.perf_counter()
+                data = self.render(job)
+                self.disk.put(key, data)
+                source = "render"
+                self.count("render_ms", round((time.perf_counter() - start) * 1000))
+            sprite = Sprite(data, etag_for(data))
+            # Published to memory before leaving inflight, so no request can miss both
+            self.memory.put(job, sprite)
+            future.set_result(sprite)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[job]
+        self.count(source)
+        return sprite, source
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.stats[name] += n
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+            inflight = len(self.inflight)
+        return {
+            "requests": stats,
+            "inflight": inflight,
+            "memory": {"entries": len(self.memory.entries), "bytes": self.memory.size,
+                       "max_bytes": self.memory.max_bytes},
+            "disk": {"entries": len(self.disk.entries), "bytes": self.disk.size,
+                     "max_bytes": self.disk.max_bytes},
+        }
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+def etag_matches(header, etag):
+    """If-None-Match check (weak comparison, as RFC 9110 asks for GET)"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+class SpriteHandler(BaseHTTPRequestHandler):
+    """GET /sprite/<name>?color=&scale=&v=, GET /sprites, GET /stats, GET /health"""
+
+    server_version = "SpriteService/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def send_body(self, status, data, content_type, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def send_json(self, status, body):
+        self.send_body(status, json.dumps(body).encode(), "application/json")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        service = self.server.service
+        if url.path == "/health":
+            self.send_json(200, {"ok": True})
+        elif url.path == "/stats":
+            self.send_json(200, service.snapshot())
+        elif url.path == "/sprites":
+            self.send_json(200, {"sprites": service.routes.names(), "max_scale": MAX_SCALE})
+        elif url.path.startswith("/sprite/"):
+            self.send_sprite(unquote(url.path[len("/sprite/"):]), parse_qs(url.query))
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    do_HEAD = do_GET
+
+    def send_sprite(self, name, params):
+        service = self.server.service
+        try:
+            try:
+                scale = int(params.get("scale", ["1"])[0])
+                variant = int(params.get("v", ["1"])[0])
+            except ValueError:
+                raise SpriteError(400, "scale and v must be integers")
+            job = service.routes.job(name.removesuffix(".png"), variant, params.get("color", [None])[0], scale)
+            sprite, source = service.get(job)
+        except SpriteError as e:
+            self.send_json(e.status, {"error": str(e)})
+            return
+        except Exception as e:
+            self.send_json(500, {"error": f"render failed: {e}"})
+            return
+
+        headers = [("ETag", sprite.etag), ("Cache-Control", CACHE_CONTROL), ("X-Sprite-Cache", source)]
+        if etag_matches(self.headers.get("If-None-Match"), sprite.etag):
+            service.count("not_modified")
+            self.send_response(304)
+            for header in headers:
+                self.send_header(*header)
+            self.end_headers()
+        else:
+            self.send_body(200, sprite.data, "image/png", headers)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Run the HTTP service until interrupted"""
+    server = ThreadingHTTPServer((host, port), SpriteHandler)
+    server.daemon_threads = True
+    server.service = service
+    print(f"🎨 Sprite service listening on http://{host}:{port}/sprite/<name>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+def main():
+    """Serve sprites rendered on demand"""
+    parser = argparse.ArgumentParser(description="Render Shared House sprites on demand over HTTP")
+    parser.add_argument("--spec", default=DEFAULT_SPEC, help="asset spec to resolve sprite names with (default: asset-spec.json)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="disk cache directory (default: shared-house/.sprite-cache)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"build seed; must match generate_assets.py's (default: {DEFAULT_SEED})")
+    parser.add_argument("--memory-mb", type=float, default=MEMORY_CACHE_BYTES / 2**20, help="in-memory cache budget in MiB (default: %(default)g)")
+    parser.add_argument("--disk-mb", type=float, default=DISK_CACHE_BYTES / 2**20, help="disk cache budget in MiB (default: %(default)g)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="render processes; 1 renders in the request thread (default: CPU count)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"bind address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    args = parser.parse_args()
+
+    try:
+        routes = SpriteRoutes(load_spec(args.spec))
+    except (OSError, ValueError) as e:
+        sys.exit(f"Can't load spec {args.spec}: {e}")
+    service = SpriteService(routes, args.cache_dir, args.seed, args.workers,
+                            int(args.memory_mb * 2**20), int(args.disk_mb * 2**20))
+    print(f"🗂️  {len(service.disk.entries)} cached sprites on disk ({service.disk.size} bytes)")
+    serve(service, args.host, args.port)
+
+if __name__ == "__main__":
+    main()
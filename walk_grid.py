@@ -0,0 +1,678 @@
+#!/usr/bin/env python3
+"""
+Cozy Claw Studio - Walkability Grid & Path Service
+Rasterizes every room's placed items (decor_placements and room_items) into
+an occupancy grid at SUBDIV cells per room grid cell. Footprints come from
+the catalog size, shaped by the item sprite's trimmed hit mask when
+generate_assets.py has built one. A capped Euclidean distance field over
+the grid gives each cell its clearance, so the companion keeps a body
+radius away from furniture. Paths are searched with A*; a goal asked for
+again gets a cached flow field, and either way the route is string-pulled
+into a few waypoints. When the server reports a placed, moved or removed
+item, only that footprint is restamped, only the clearance around it
+recomputed, and cached flow fields are patched rather than dropped.
+"""
+
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+import argparse
+import base64
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+import numpy as np
+
+import generate_assets as ga
+import render_rooms as rr
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = rr.DEFAULT_DB
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 3093
+
+# Walk cells per room grid cell (rooms are rr.GRID_WIDTH x rr.GRID_HEIGHT cells)
+SUBDIV = 4
+# Companion body radius, in room grid cells
+AGENT_RADIUS = 0.4
+# Clearance is only tracked this far (in room cells); it bounds incremental updates
+CLEARANCE_CAP = 2.0
+# decor_items layers that stand on the floor: 1 furniture, 2 decor (0 rugs, 3 wall art don't)
+BLOCKING_LAYERS = (1, 2)
+# room_items layers, used when an item has no catalog row: 3 furniture, 4 decor
+ROOM_BLOCKING_LAYERS = (3, 4)
+# Flow fields (one Dijkstra from a goal) kept per room
+FLOW_CACHE_SIZE = 32
+# Recent one-off goals remembered per room; a repeat gets a flow field
+GOAL_HISTORY = 256
+
+ROOM_KEY_RE = re.compile(r"(decor|room)_[\w-]+")
+STEPS = [(-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+         (-1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (1, 1, math.sqrt(2))]
+
+def distance_field(blocked, cap):
+    """Euclidean distance (in cells) from every cell to the nearest blocked one, capped.
+
+    Exact two-pass transform: a vectorized column scan, then for each row the
+    minimum of (x - x')^2 + g(x')^2 over all x' by broadcasting.
+    """
+    h, w = blocked.shape
+    far = h + w
+    g = np.where(blocked, 0, far).astype(np.int32)
+    for y in range(1, h):
+        g[y] = np.minimum(g[y], g[y - 1] + 1)
+    for y in range(h - 2, -1, -1):
+        g[y] = np.minimum(g[y], g[y + 1] + 1)
+    xs = np.arange(w)
+    d2 = ((xs[:, None] - xs[None, :]) ** 2)[None, :, :] + (g.astype(np.int64) ** 2)[:, None, :]
+    return np.minimum(np.sqrt(d2.min(axis=2)), cap).astype(np.float32)
+
+def relax(cost, walkable, heap):
+    """Dijkstra over 8-connected walkable cells (nested lists), lowering cost in place from heap"""
+    while heap:
+        d, (y, x) = heapq.heappop(heap)
+        if d > cost[y, x]:
+            continue
+        for dy, dx, step in STEPS:
+            ny, nx = y + dy, x + dx
+            if not walkable[ny][nx]:
+                continue
+            if dy and dx and not (walkable[y + dy][x] and walkable[y][x + dx]):
+                continue
+            nd = d + step
+            if nd < cost[ny, nx]:
+                cost[ny, nx] = nd
+                heapq.heappush(heap, (nd, (ny, nx)))
+
+def resample_any(solid, shape):
+    """Scale a bool mask to shape; a cell is set if any source pixel under it is"""
+    mh, mw = solid.shape
+    fh, fw = shape
+    integral = np.zeros((mh + 1, mw + 1), np.int32)
+    integral[1:, 1:] = solid.cumsum(0).cumsum(1)
+    r0 = np.arange(fh) * mh // fh
+    r1 = np.maximum(r0 + 1, -(-(np.arange(fh) + 1) * mh // fh))
+    c0 = np.arange(fw) * mw // fw
+    c1 = np.maximum(c0 + 1, -(-(np.arange(fw) + 1) * mw // fw))
+    sums = (integral[r1][:, c1] - integral[r0][:, c1] - integral[r1][:, c0] + integral[r0][:, c0])
+    return sums > 0
+
+def item_footprint(item, masks, subdiv=SUBDIV):
+    """(row, col, mask) of an item in walk cells: catalog size, shaped by its sprite mask"""
+    scale = item.get("scale") or 1.0
+    w, h = item["width"] * scale, item["height"] * scale
+    rotation = (item.get("rotation") or 0) % 360
+    if rotation in (90, 270):
+        w, h = h, w
+    col, row = round(item["x"] * subdiv), round(item["y"] * subdiv)
+    shape = (max(1, round(h * subdiv)), max(1, round(w * subdiv)))
+
+    for name in rr.sprite_candidates(item):
+        mask = masks.get(name)
+        if mask is None:
+            continue
+        solid = mask.solid
+        if item.get("flipped"):
+            solid = solid[:, ::-1]
+        if rotation in (90, 180, 270):
+            # Sprites rotate clockwise, as render_rooms draws them
+            solid = np.rot90(solid, -rotation // 90)
+        footprint = resample_any(solid, shape)
+        if footprint.any():
+            return row, col, footprint
+        break
+    return row, col, np.ones(shape, bool)
+
+def item_blocks(row):
+    """Whether a placed item stands in the companion's way"""
+    if row["layer"] is not None:
+        return row["layer"] in BLOCKING_LAYERS
+    return row["item_layer"] in ROOM_BLOCKING_LAYERS
+
+def load_items(db_path, placement=None):
+    """Placed items by room key, or just those with id == placement.
+
+    Room keys match render_rooms: room_<room_id> for room_items and
+    decor_<theme_id> for decor_placements.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    rooms = {}
+    try:
+        has_catalog = rr.table_exists(conn, "decor_items")
+        queries = []
+        if rr.table_exists(conn, "room_items"):
+            catalog = ("d.subcategory, d.width, d.height, d.color, d.layer FROM room_items i "
+                       "LEFT JOIN decor_items d ON i.item_key = d.id" if has_catalog else
+                       "NULL AS subcategory, NULL AS width, NULL AS height, NULL AS color, NULL AS layer FROM room_items i")
+            queries.append(("room_", f"""
+                SELECT i.id, i.room_id AS room, i.item_key, i.x, i.y, i.rotation, i.scale, 0 AS flipped,
+                       i.layer AS item_layer, {catalog}
+                WHERE i.visible = 1""", "i.id"))
+        if rr.table_exists(conn, "decor_placements") and has_catalog:
+            queries.append(("decor_", """
+                SELECT p.id, p.theme_id AS room, p.item_id AS item_key, p.x, p.y, p.rotation, p.scale, p.flipped,
+                       NULL AS item_layer, d.subcategory, d.width, d.height, d.color, d.layer
+                FROM decor_placements p JOIN decor_items d ON p.item_id = d.id
+                WHERE 1 = 1""", "p.id"))
+        for prefix, sql, id_column in queries:
+            params = ()
+            if placement is not None:
+                sql += f" AND {id_column} = ?"
+                params = (placement,)
+            for row in conn.execute(sql, params):
+                item = rr.item_row(row)
+                item["blocks"] = item_blocks(row)
+                rooms.setdefault(f"{prefix}{row['room']}", []).append(item)
+    finally:
+        conn.close()
+    return rooms
+
+class WalkGrid:
+    """Occupancy counts, clearance and connectivity for one room.
+
+    Arrays are padded by one cell of wall on every side, so the room edge
+    blocks like furniture does. Coordinates in and out are room grid units.
+    """
+
+    def __init__(self, key, width=rr.GRID_WIDTH, height=rr.GRID_HEIGHT, subdiv=SUBDIV,
+                 radius=AGENT_RADIUS, cap=CLEARANCE_CAP):
+        self.key = key
+        self.subdiv = subdiv
+        self.shape = (height * subdiv + 2, width * subdiv + 2)
+        self.cap = math.ceil(cap * subdiv)
+        # A cell is walkable when the nearest blocked cell center is beyond the
+        # body radius plus that cell's half width
+        self.min_clearance = radius * subdiv + 0.5
+        self.count = np.zeros(self.shape, np.int16)
+        self.count[0, :] = self.count[-1, :] = self.count[:, 0] = self.count[:, -1] = 1
+        self.items = {}
+        self.flows = OrderedDict()
+        self.goals = OrderedDict()
+        self.version = 0
+        self.refresh()
+
+    def stamp(self, item, masks):
+        """Add an item's footprint; returns the changed rect, or None if it doesn't block"""
+        if not item["blocks"]:
+            self.items[item["id"]] = (item, None)
+            return None
+        row, col, footprint = item_footprint(item, masks, self.subdiv)
+        # Clip to the room interior (padded coordinates)
+        y0, x0 = max(row + 1, 1), max(col + 1, 1)
+        y1 = min(row + 1 + footprint.shape[0], self.shape[0] - 1)
+        x1 = min(col + 1 + footprint.shape[1], self.shape[1] - 1)
+        if y0 >= y1 or x0 >= x1:
+            self.items[item["id"]] = (item, None)
+            return None
+        part = footprint[y0 - row - 1:y1 - row - 1, x0 - col - 1:x1 - col - 1]
+        self.count[y0:y1, x0:x1] += part
+        self.items[item["id"]] = (item, (y0, x0, part))
+        return (y0, x0, y1, x1)
+
+    def unstamp(self, item_id):
+        """Remove an item's footprint; returns the changed rect, or None"""
+        _, placed = self.items.pop(item_id, (None, None))
+        if placed is None:
+            return None
+        y0, x0, part = placed
+        self.count[y0:y0 + part.shape[0], x0:x0 + part.shape[1]] -= part
+        return (y0, x0, y0 + part.shape[0], x0 + part.shape[1])
+
+    def refresh(self, rect=None):
+        """Recompute clearance (all of it, or just within reach of rect) and connectivity"""
+        blocked = self.count > 0
+        if rect is None:
+            self.clearance = distance_field(blocked, self.cap)
+        else:
+            # Cells farther than cap from rect keep their (capped) clearance; cells
+            # within cap of it only see obstacles within 2 * cap of it
+            h, w = self.shape
+            y0, x0, y1, x1 = rect
+            inner = (max(y0 - self.cap, 0), max(x0 - self.cap, 0), min(y1 + self.cap, h), min(x1 + self.cap, w))
+            outer = (max(y0 - 2 * self.cap, 0), max(x0 - 2 * self.cap, 0),
+                     min(y1 + 2 * self.cap, h), min(x1 + 2 * self.cap, w))
+            field = distance_field(blocked[outer[0]:outer[2], outer[1]:outer[3]], self.cap)
+            self.clearance[inner[0]:inner[2], inner[1]:inner[3]] = \
+                field[inner[0] - outer[0]:inner[2] - outer[0], inner[1] - outer[1]:inner[3] - outer[1]]
+        self.walkable = self.clearance > self.min_clearance
+        self.open = self.walkable.tolist()
+        self.label_components()
+        self.patch_flows()
+        self.version += 1
+
+    def patch_flows(self):
+        """Carry cached flow fields over a walkability change.
+
+        A field is exact over the cells it was relaxed on. Cells that opened up
+        are relaxed into it from their reachable neighbors, so it stays exact
+        over old and new walkable cells together; cells that closed are caught
+        when a route is read off it (see descend).
+        """
+        for cost, graph in self.flows.values():
+            opened = self.walkable & ~graph
+            if not opened.any():
+                continue
+            graph |= self.walkable
+            near = opened.copy()
+            near[1:] |= opened[:-1]
+            near[:-1] |= opened[1:]
+            rows = near.copy()
+            near[:, 1:] |= rows[:, :-1]
+            near[:, :-1] |= rows[:, 1:]
+            seeds = [(cost[y, x], (y, x)) for y, x in zip(*np.nonzero(near & np.isfinite(cost)))]
+            heapq.heapify(seeds)
+            relax(cost, graph.tolist(), seeds)
+
+    def label_components(self):
+        """Connected walkable regions (4-connected; diagonal moves never cut corners)"""
+        labels = np.full(self.shape, -1, np.int32)
+        walkable = self.walkable
+        h, w = self.shape
+        n = 0
+        for start in zip(*np.nonzero(walkable)):
+            if labels[start] >= 0:
+                continue
+            labels[start] = n
+            queue = deque([start])
+            while queue:
+                y, x = queue.popleft()
+                for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+                    if 0 <= ny < h and 0 <= nx < w and walkable[ny, nx] and labels[ny, nx] < 0:
+                        labels[ny, nx] = n
+                        queue.append((ny, nx))
+            n += 1
+        self.labels = labels
+        self.cells = np.argwhere(walkable)
+
+    def to_cell(self, x, y):
+        """Room units -> padded (row, col) of the cell containing the point"""
+        return (min(max(int(y * self.subdiv) + 1, 1), self.shape[0] - 2),
+                min(max(int(x * self.subdiv) + 1, 1), self.shape[1] - 2))
+
+    def to_point(self, cell):
+        """Padded (row, col) -> room units of the cell center"""
+        return [round((cell[1] - 0.5) / self.subdiv, 3), round((cell[0] - 0.5) / self.subdiv, 3)]
+
+    def nearest_walkable(self, x, y, component=None):
+        """The walkable cell closest to a point (optionally within one component), or None"""
+        cells = self.cells
+        if component is not None:
+            cells = cells[self.labels[cells[:, 0], cells[:, 1]] == component]
+        if not len(cells):
+            return None
+        target = np.array([y * self.subdiv + 0.5, x * self.subdiv + 0.5])
+        best = cells[np.argmin(((cells - target) ** 2).sum(axis=1))]
+        return int(best[0]), int(best[1])
+
+    def approach(self, item_id):
+        """Where to stand to use an item: just in front of (below) it if it blocks, else on it"""
+        item, placed = self.items[item_id]
+        if placed is None:
+            scale = item.get("scale") or 1.0
+            return item["x"] + item["width"] * scale / 2, item["y"] + item["height"] * scale / 2
+        y0, x0, part = placed
+        rows, cols = np.nonzero(part)
+        bottom = y0 + rows.max() + 1
+        center = x0 + (cols.min() + cols.max() + 1) / 2
+        return (center - 1) / self.subdiv, (bottom - 1 + self.min_clearance) / self.subdiv
+
+    def route(self, begin, end):
+        """Cells from begin to end: down end's flow field if it has one, else by A*"""
+        if end not in self.flows and end in self.goals:
+            self.flow(end)
+        if end in self.flows:
+            self.flows.move_to_end(end)
+            cost, graph = self.flows[end]
+            cells = self.descend(cost, graph, begin)
+            if cells is not None:
+                return cells
+            # The way closed since the field was built; rebuild it next time
+            del self.flows[end]
+        self.goals[end] = True
+        self.goals.move_to_end(end)
+        if len(self.goals) > GOAL_HISTORY:
+            self.goals.popitem(last=False)
+        return self.astar(begin, end)
+
+    def flow(self, goal):
+        """Cost-to-goal of every cell reachable from goal, cached with the cells it covers"""
+        cost = np.full(self.shape, np.inf)
+        cost[goal] = 0.0
+        relax(cost, self.open, [(0.0, goal)])
+        self.flows[goal] = (cost, self.walkable.copy())
+        if len(self.flows) > FLOW_CACHE_SIZE:
+            self.flows.popitem(last=False)
+        return cost
+
+    def astar(self, begin, end):
+        """Cells from begin to end by A* with the octile distance (end must be reachable)"""
+        walkable = self.open
+        ey, ex = end
+
+        def estimate(y, x):
+            dy, dx = abs(y - ey), abs(x - ex)
+            return max(dy, dx) + (math.sqrt(2) - 1) * min(dy, dx)
+
+        best = {begin: 0.0}
+        parent = {begin: None}
+        heap = [(estimate(*begin), 0.0, begin)]
+        while heap:
+            _, d, cell = heapq.heappop(heap)
+            if cell == end:
+                break
+            if d > best[cell]:
+                continue
+            y, x = cell
+            for dy, dx, step in STEPS:
+                ny, nx = y + dy, x + dx
+                if not walkable[ny][nx]:
+                    continue
+                if dy and dx and not (walkable[y + dy][x] and walkable[y][x + dx]):
+                    continue
+                nd = d + step
+                if nd < best.get((ny, nx), math.inf):
+                    best[ny, nx] = nd
+                    parent[ny, nx] = cell
+                    heapq.heappush(heap, (nd + estimate(ny, nx), nd, (ny, nx)))
+        cells = []
+        cell = end
+        while cell is not None:
+            cells.append(cell)
+            cell = parent[cell]
+        return cells[::-1]
+
+    def descend(self, cost, graph, start):
+        """Cells from start to the goal down a flow field, or None if a step has closed since.
+
+        Steps follow the cells the field was relaxed on; a route that only uses
+        cells still walkable is as short as any through the current grid.
+        """
+        if not np.isfinite(cost[start]):
+            return None
+        walkable = self.walkable
+        cells = [start]
+        y, x = start
+        while cost[y, x] > 0:
+            best = None
+            for dy, dx, step in STEPS:
+                ny, nx = y + dy, x + dx
+                if dy and dx and not (graph[y + dy, x] and graph[y, x + dx]):
+                    continue
+                total = cost[ny, nx] + step
+                if best is None or total < best[0]:
+                    best = (total, ny, nx)
+            ny, nx = best[1], best[2]
+            if not walkable[ny, nx] or (ny != y and nx != x and not (walkable[ny, x] and walkable[y, nx])):
+                return None
+            y, x = ny, nx
+            cells.append((y, x))
+        return cells
+
+    def line_of_sight(self, a, b):
+        """True if the straight segment between two cell centers stays on walkable cells"""
+        (y0, x0), (y1, x1) = a, b
+        steps = int(max(abs(y1 - y0), abs(x1 - x0)) * 4) + 1
+        ys = np.rint(np.linspace(y0, y1, steps + 1)).astype(int)
+        xs = np.rint(np.linspace(x0, x1, steps + 1)).astype(int)
+        return bool(self.walkable[ys, xs].all())
+
+    def smooth(self, cells):
+        """String-pull a cell path down to the waypoints where it has to turn"""
+        waypoints = [cells[0]]
+        i = 0
+        while i < len(cells) - 1:
+            j = len(cells) - 1
+            while j > i + 1 and not self.line_of_sight(cells[i], cells[j]):
+                j -= 1
+            waypoints.append(cells[j])
+            i = j
+        return waypoints
+
+    def path(self, start, goal=None, item=None):
+        """One path query: {"points", "length", "goal"} or {"error"}"""
+        begin = self.to_cell(*start)
+        if not self.walkable[begin]:
+            begin = self.nearest_walkable(*start)
+        if begin is None:
+            return {"error": "no walkable space in this room"}
+        if item is not None and item in self.items:
+            goal = self.approach(item)
+        elif goal is None:
+            return {"error": f"unknown item {item!r}"}
+        end = self.nearest_walkable(*goal, component=self.labels[begin])
+        cells = self.smooth(self.route(begin, end))
+        if self.to_cell(*start) == begin:
+            # Already standing on the path's first cell: leave from the exact spot
+            cells = cells[1:]
+        points = [[round(float(start[0]), 3), round(float(start[1]), 3)]] + [self.to_point(c) for c in cells]
+        length = sum(math.dist(a, b) for a, b in zip(points, points[1:]))
+        return {"points": points, "length": round(length, 3), "goal": self.to_point(end)}
+
+    def summary(self):
+        return {"width": (self.shape[1] - 2) // self.subdiv, "height": (self.shape[0] - 2) // self.subdiv,
+                "subdiv": self.subdiv, "version": self.version, "items": len(self.items),
+                "walkable": int(self.walkable.sum()), "components": int(self.labels.max() + 1)}
+
+    def packed(self):
+        """Compact grid for clients: bit-packed walkability and clearance in quarter cells"""
+        inner = (slice(1, -1), slice(1, -1))
+        clearance = np.minimum(np.rint(self.clearance[inner] * 4), 255).astype(np.uint8)
+        return {**self.summary(),
+                "walkable": base64.b64encode(np.packbits(self.walkable[inner], axis=1).tobytes()).decode(),
+                "clearance": base64.b64encode(clearance.tobytes()).decode()}
+
+    def render(self):
+        """ASCII map: # blocked, + too close to furniture, . walkable"""
+        chars = np.where(self.count > 0, "#", np.where(self.walkable, ".", "+"))
+        return "\n".join("".join(row) for row in chars[1:-1, 1:-1])
+
+class WalkService:
+    """Every room's WalkGrid, built from the database and patched per changed item"""
+
+    def __init__(self, db_path, assets_dir):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        try:
+            self.masks = ga.load_hit_masks(assets_dir)
+        except (OSError, ValueError, KeyError):
+            # No hit masks built yet: footprints are plain catalog rectangles
+            self.masks = {}
+        self.grids = {}
+        self.rebuild()
+
+    def rebuild(self, key=None):
+        """Rasterize every room (or one) from scratch"""
+        rooms = load_items(self.db_path)
+        with self.lock:
+            for room in ([key] if key else sorted(set(rooms) | set(self.grids))):
+                grid = WalkGrid(room)
+                for item in rooms.get(room, []):
+                    grid.stamp(item, self.masks)
+                grid.refresh()
+                self.grids[room] = grid
+
+    def grid(self, key):
+        """A room's grid; rooms with nothing placed yet are empty grids (lock held)"""
+        if key not in self.grids:
+            self.grids[key] = WalkGrid(key)
+        return self.grids[key]
+
+    def invalidate(self, placement):
+        """Re-read one placement and restamp it wherever it was and now is.
+
+        Returns the keys of the rooms that changed.
+        """
+        current = [(key, item) for key, items in load_items(self.db_path, placement).items() for item in items]
+        changed = []
+        with self.lock:
+            for key, grid in self.grids.items():
+                rect = grid.unstamp(placement)
+                if rect or placement in grid.items:
+                    grid.items.pop(placement, None)
+                    changed.append((grid, [rect]))
+            for key, item in current:
+                grid = self.grid(key)
+                entry = next((c for c in changed if c[0] is grid), None)
+                if entry is None:
+                    entry = (grid, [])
+                    changed.append(entry)
+                entry[1].append(grid.stamp(item, self.masks))
+            for grid, rects in changed:
+                rects = [r for r in rects if r]
+                if rects:
+                    grid.refresh((min(r[0] for r in rects), min(r[1] for r in rects),
+                                  max(r[2] for r in rects), max(r[3] for r in rects)))
+                else:
+                    grid.version += 1
+        return [grid.key for grid, _ in changed]
+
+    def paths(self, key, queries):
+        """Answer a batch of path queries against one room"""
+        with self.lock:
+            grid = self.grid(key)
+            results = []
+            for query in queries:
+                try:
+                    start = tuple(map(float, query["from"]))
+                    goal = tuple(map(float, query["to"])) if "to" in query else None
+                    if goal is None and "item" not in query:
+                        raise KeyError("to")
+                    results.append(grid.path(start, goal, query.get("item")))
+                except (KeyError, TypeError, ValueError) as e:
+                    results.append({"error": f"bad query: {e}"})
+            return {"room": key, "version": grid.version, "paths": results}
+
+class WalkHandler(BaseHTTPRequestHandler):
+    """POST /paths, POST /invalidate, GET /rooms, GET /rooms/<key>, GET /health"""
+
+    server_version = "WalkGrid/1.0"
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_json(self):
+        return json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        service = self.server.service
+        if path == "/health":
+            self.send_json(200, {"ok": True})
+        elif path == "/rooms":
+            with service.lock:
+                self.send_json(200, {key: grid.summary() for key, grid in sorted(service.grids.items())})
+        elif path.startswith("/rooms/"):
+            key = unquote(path[len("/rooms/"):])
+            if not ROOM_KEY_RE.fullmatch(key):
+                self.send_json(404, {"error": f"bad room key {key!r}"})
+                return
+            with service.lock:
+                self.send_json(200, service.grid(key).packed())
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        service = self.server.service
+        try:
+            body = self.read_json()
+        except ValueError:
+            self.send_json(400, {"error": "expected a JSON body"})
+            return
+        start = time.perf_counter()
+        try:
+            if path == "/paths":
+                room = body.get("room", "decor_default")
+                queries = body.get("queries")
+                if not ROOM_KEY_RE.fullmatch(str(room)) or not isinstance(queries, list):
+                    self.send_json(400, {"error": 'expected {"room": "decor_default", "queries": [{"from": [x, y], "to": [x, y]}]}'})
+                    return
+                result = service.paths(room, queries)
+            elif path == "/invalidate":
+                if "placement" in body:
+                    result = {"rooms": service.invalidate(str(body["placement"]))}
+                else:
+                    room = body.get("room")
+                    if room is not None and not ROOM_KEY_RE.fullmatch(str(room)):
+                        self.send_json(400, {"error": f"bad room key {room!r}"})
+                        return
+                    service.rebuild(room)
+                    result = {"rooms": [room] if room else sorted(service.grids)}
+            else:
+                self.send_json(404, {"error": "not found"})
+                return
+        except sqlite3.Error as e:
+            self.send_json(500, {"error": str(e)})
+            return
+        result["took_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        self.send_json(200, result)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Run the HTTP service until interrupted"""
+    server = ThreadingHTTPServer((host, port), WalkHandler)
+    server.service = service
+    print(f"🧭 Walk grid listening on http://{host}:{port}/paths")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main():
+    """Build walk grids and answer path queries"""
+    parser = argparse.ArgumentParser(description="Walkability grids and pathfinding for the companion")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite database (default: $DB_PATH or shared-house/memory/agent_memory.db)")
+    parser.add_argument("--assets", help="generated sprites directory with hitmasks.json (default: output_dir of asset-spec.json)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("serve", help="serve batched path queries over HTTP")
+    run.add_argument("--host", default=DEFAULT_HOST, help=f"bind address (default: {DEFAULT_HOST})")
+    run.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+
+    show = sub.add_parser("show", help="print rooms' walk grids as ASCII maps")
+    show.add_argument("room", nargs="*", help="room keys, e.g. decor_default (default: all)")
+
+    query = sub.add_parser("path", help="print one path")
+    query.add_argument("room")
+    query.add_argument("start", nargs=2, type=float, metavar=("X", "Y"))
+    query.add_argument("goal", nargs=2, type=float, metavar=("X", "Y"))
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        sys.exit(f"Database not found: {args.db}")
+    assets_dir = args.assets or ga.load_spec(os.path.join(ROOT, "asset-spec.json"))["output_dir"]
+
+    start = time.perf_counter()
+    service = WalkService(args.db, assets_dir)
+    print(f"🧭 Built {len(service.grids)} walk grid(s) in {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"({len(service.masks)} sprite masks)", file=sys.stderr)
+
+    if args.command == "serve":
+        serve(service, args.host, args.port)
+    elif args.command == "show":
+        for key in args.room or sorted(service.grids):
+            grid = service.grid(key)
+            print(f"\n{key}: {json.dumps(grid.summary())}")
+            print(grid.render())
+    elif args.command == "path":
+        print(json.dumps(service.paths(args.room, [{"from": args.start, "to": args.goal}])["paths"][0]))
+
+if __name__ == "__main__":
+    main()